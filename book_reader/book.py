@@ -1,12 +1,11 @@
 import os
-import re
-import subprocess as sp
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable
 
 from tqdm import tqdm
 
 from book_reader.constants import ReadSettingsKeys, Actions
-from book_reader.pdf_page import PdfPage
+from book_reader.pdf_page import PdfPage, clean_page_text, guess_page_type
+from book_reader.pdf_text import PdfText, get_pdf_text
 from util.log_util import print_styled, STYLES
 
 if TYPE_CHECKING:
@@ -32,6 +31,7 @@ class Book:
         self.priority = 0
         self.target_file_name: str | None = None
         self.target_system_file: 'SystemFile' or None = None
+        self._detached_book = None  # For the page cache
         self.read_config(book_config)
 
         if file_path.endswith('.epub'):
@@ -75,56 +75,85 @@ class Book:
 
     def read_as_pdf(self):
         text_file_path = self.file_path.replace('.pdf', '.txt')
-        if not os.path.exists(text_file_path):
-            self.pdftotext()  # Save a text file of the pdf.
+        workers = self.settings.get(ReadSettingsKeys.PAGE_WORKERS)
+        # Save a text file of the pdf, or reuse the one saved before if the pdf is unchanged.
+        pdf_text = get_pdf_text(self.file_path, text_file_path, workers)
         self.file_path = text_file_path
-        with open(self.file_path, "r", encoding='utf-8') as f:
-            pdf = f.read()
-            # If the next page doesn't have information to help identify it,
-            # we can guess that it's still the previous page type.
-            prev_page_type = None
-            page_offset = None  # Consider pulling default page offset from book json.
-            for page_counter, page_text in tqdm(enumerate(pdf.split('')), unit="Pages"):
-                # Replace backspace characters with whitespace. This is appearing at ends of entries.
-                page_text = re.sub("", " ", page_text)
-                page_number = try_get_page_number(page_text)
-                if page_counter < 5 and page_offset is not None:  # Try getting page number for the first 5 pages.
-                    page_offset = try_get_page_offset(page_text, page_counter)
-                if page_number:
-                    pass  # Use the page number from try get
-                elif page_offset:
-                    page_number = page_counter + page_offset
-                    # print(f"Page number is {page_number}, from {page_counter} + {page_offset}")
-                else:
-                    page_number = page_counter
-                page = PdfPage(self, page_text, page_number, prev_page_type=prev_page_type,
-                               file_page_number=page_counter)
-                self.pages.append(page)
-                prev_page_type = page.page_type
-
-    def pdftotext(self):
+        # Pages are read from the text file as they're needed, rather than all held at once.
+        page_numbers = get_page_numbers(pdf_text)
+
+        if workers and workers >= 2 and len(pdf_text) >= 2:
+            self.read_pdf_pages_in_parallel(pdf_text, page_numbers, workers)
+            return
+        # If the next page doesn't have information to help identify it,
+        # we can guess that it's still the previous page type.
+        prev_page_type = None
+        for page_counter in tqdm(range(len(pdf_text)), unit="Pages"):
+            page = self.read_pdf_page(pdf_text[page_counter], page_numbers[page_counter], page_counter,
+                                      prev_page_type)
+            self.pages.append(page)
+            prev_page_type = page.page_type
+
+    @property
+    def page_cache_directory(self) -> str or None:
+        return self.system.cache_directory
+
+    def read_pdf_page(self, page_text: str, page_number: int, page_counter: int,
+                      prev_page_type: str or None) -> PdfPage:
+        """
+        Read a page, or get it from the page cache if the same page was read before with the same parser.
         """
-        Generate a text rendering of a PDF file in the form of a list of lines.
-        # Because the python wrapper doesn't give us as good of output...
+        cache_directory = self.page_cache_directory
+        if not cache_directory:
+            return PdfPage(self, page_text, page_number, prev_page_type=prev_page_type,
+                           file_page_number=page_counter)
+        from book_reader.page_cache import get_page_key, load_cached_page, store_cached_page
+        from book_reader.parallel_pages import DetachedBook
+
+        if self._detached_book is None:
+            self._detached_book = DetachedBook(self)
+        detached_book = self._detached_book
+        key = get_page_key(detached_book, page_text, page_number, prev_page_type)
+        page = load_cached_page(cache_directory, key)
+        if page is not None:
+            page.file_page_number = page_counter
+            page.attach_to_book(self)
+            return page
+        page = PdfPage(self, page_text, page_number, prev_page_type=prev_page_type, file_page_number=page_counter)
+        store_cached_page(cache_directory, key, page, detached_book)
+        return page
+
+    def read_pdf_pages_in_parallel(self, pdf_text: PdfText, page_numbers: list[int], workers: int):
         """
-        # Need pdftotext 23, not 4.x
-        path_to_pdftotext = os.path.expanduser("~/miniconda3/Library/bin/pdftotext.exe")
-        program_args = ['-layout', '-enc', 'UTF-8', self.file_path]
-        try:
-            raise Exception("test")
-            args = [path_to_pdftotext]
-            args += program_args
-            sp.run(
-                args, stdout=sp.PIPE, stderr=sp.DEVNULL,
-                check=True
-            )
-        except Exception:
-            args = ['pdftotext']
-            args += program_args
-            sp.run(
-                args, stdout=sp.PIPE, stderr=sp.DEVNULL,
-                check=True
-            )
+        Pages only depend on each other through prev_page_type, so first guess every page's type from its headers,
+        then read the pages in a process pool with the guessed type of the page before.
+        Going through them in order after, any page read with the wrong prev_page_type is read again.
+        """
+        from book_reader.parallel_pages import read_pages
+
+        game = self.system.game
+        page_args = []
+        guessed_type = None
+        for page_counter, page_text in enumerate(pdf_text):
+            page_number = page_numbers[page_counter]
+            page_args.append((page_text, page_number, page_counter, guessed_type))
+            config_type = self.page_configs.get(page_number, {}).get('type')
+            guessed_type = guess_page_type(clean_page_text(page_text, page_number), config_type, guessed_type, game)
+
+        prev_page_type = None
+        reread_count = 0
+        pages = read_pages(self, page_args, workers, self.page_cache_directory)
+        for page_counter, page in tqdm(enumerate(pages), unit="Pages", total=len(page_args)):
+            page_text, page_number, _, guessed_prev_page_type = page_args[page_counter]
+            if guessed_prev_page_type == prev_page_type:
+                page.attach_to_book(self)
+            else:
+                page = self.read_pdf_page(page_text, page_number, page_counter, prev_page_type)
+                reread_count += 1
+            self.pages.append(page)
+            prev_page_type = page.page_type
+        if reread_count:
+            print(f"Read {reread_count} of {len(page_args)} pages again, as their previous page type was guessed wrong")
 
     def get_target_sys_file(self, target_file_name):
         if not target_file_name:
@@ -138,6 +167,24 @@ class Book:
         return target_system_file
 
 
+def get_page_numbers(page_texts: Iterable[str]) -> list[int]:
+    page_numbers = []
+    page_offset = None  # Consider pulling default page offset from book json.
+    for page_counter, page_text in enumerate(page_texts):
+        page_number = try_get_page_number(page_text)
+        if page_counter < 5 and page_offset is not None:  # Try getting page number for the first 5 pages.
+            page_offset = try_get_page_offset(page_text, page_counter)
+        if page_number:
+            pass  # Use the page number from try get
+        elif page_offset:
+            page_number = page_counter + page_offset
+            # print(f"Page number is {page_number}, from {page_counter} + {page_offset}")
+        else:
+            page_number = page_counter
+        page_numbers.append(page_number)
+    return page_numbers
+
+
 def try_get_page_offset(page_text, page_counter):
     page_read_from_pdf = try_get_page_number(page_text)
     if page_read_from_pdf:
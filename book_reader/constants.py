@@ -4,6 +4,7 @@ from enum import StrEnum
 class ReadSettingsKeys(StrEnum):
     FIRST_PARAGRAPH_IS_FLAVOR = 'first_paragraph_is_flavor'
     ACTIONS = "actions"
+    PAGE_WORKERS = "page_workers"  # Processes used to extract and read pdf pages, 0 or 1 to read them in order in this process
 
 
 class Actions(StrEnum):
@@ -40,6 +40,14 @@ class Page:
     def settings(self) -> dict[ReadSettingsKeys: str | dict]:
         return self.book.settings
 
+    def attach_to_book(self, book: 'Book'):
+        """
+        Point a page read against a DetachedBook in a worker process back at the real book.
+        """
+        self.book = book
+        config = book.page_configs.get(self.page_number, {})
+        self.target_system_file = config.get('target_system_file', book.target_system_file)
+
     def serialize(self):
         dict_to_serialize = {'page_type': self.page_type, }
         if self.units:
@@ -0,0 +1,87 @@
+import functools
+import hashlib
+import importlib
+import os
+import pickle
+from typing import TYPE_CHECKING
+
+from book_reader.pdf_page import PdfPage, clean_page_text
+
+if TYPE_CHECKING:
+    from book_reader.parallel_pages import DetachedBook
+    from system.game.game import Game
+
+# Bump when the layout of cache entries changes, so old entries are ignored.
+PAGE_CACHE_VERSION = 1
+
+# Changing any of these changes how pages are read, so their source is part of every key.
+PARSER_MODULES = ['book_reader.page', 'book_reader.pdf_page', 'book_reader.raw_entry', 'util.text_utils',
+                  'import_scripts.text_to_rules']
+
+
+@functools.cache
+def get_parser_version(game_class: type) -> str:
+    """
+    Hash of the source of the page parser and the game it's reading for, so entries are never served
+    for pages the current code would read differently.
+    """
+    version_hash = hashlib.sha1(str(PAGE_CACHE_VERSION).encode('utf-8'))
+    modules = [importlib.import_module(module_name) for module_name in PARSER_MODULES]
+    modules += [importlib.import_module(cls.__module__) for cls in game_class.__mro__ if cls is not object]
+    for module in modules:
+        with open(module.__file__, 'rb') as f:
+            version_hash.update(f.read())
+    return version_hash.hexdigest()
+
+
+def get_page_key(detached_book: 'DetachedBook', page_text: str, page_number: int, prev_page_type: str or None) -> str:
+    """
+    Key for a page, from everything reading it depends on: its cleaned text and number, its config from books.json,
+    the game and the parser version, and the type of the page before.
+    """
+    game: 'Game' = detached_book.system.game
+    config = detached_book.page_configs.get(page_number, {})
+    key_data = (get_parser_version(type(game)), game.GAME_FORMAT_CONSTANT, sorted(config.items()),
+                clean_page_text(page_text, page_number), page_number, prev_page_type)
+    return hashlib.sha256(repr(key_data).encode('utf-8')).hexdigest()
+
+
+def get_page_cache_path(cache_directory: str, key: str) -> str:
+    return os.path.join(cache_directory, "pages", key[:2], key + ".pickle")
+
+
+def load_cached_page(cache_directory: str, key: str) -> PdfPage or None:
+    """
+    :return: The page, still attached to the DetachedBook it was read with, or None if it needs reading.
+    """
+    cache_path = get_page_cache_path(cache_directory, key)
+    if not os.path.isfile(cache_path):
+        return None
+    try:
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
+    except Exception:
+        # Unpickling a partially written entry, or one pickled from classes that have since moved or changed,
+        # can raise almost anything. Any unreadable entry is a miss, and will be overwritten.
+        return None
+
+
+def store_cached_page(cache_directory: str, key: str, page: PdfPage, detached_book: 'DetachedBook'):
+    """
+    Cache a page, along with its units, profiles and everything else read from it.
+    Pages attached to a real Book are stored detached from it, so the System isn't pickled with them.
+    """
+    book = page.book
+    target_system_file = page.target_system_file
+    page.book = detached_book
+    page.target_system_file = None
+    try:
+        cache_path = get_page_cache_path(cache_directory, key)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            pickle.dump(page, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)  # Never leave a half written entry in place
+    finally:
+        page.book = book
+        page.target_system_file = target_system_file
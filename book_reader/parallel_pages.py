@@ -0,0 +1,63 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Iterator
+
+from book_reader.page_cache import get_page_key, load_cached_page, store_cached_page
+from book_reader.pdf_page import PdfPage
+
+if TYPE_CHECKING:
+    from book_reader.book import Book
+
+
+class DetachedBook:
+    """
+    The parts of a Book that reading a page uses, without the System or SystemFiles, so it can be sent to a worker.
+    Pages read against it are pointed back at the real book with Page.attach_to_book.
+    """
+
+    def __init__(self, book: 'Book'):
+        self.name = book.name
+        self.settings = book.settings
+        self.page_configs = {page_number: {key: value for key, value in config.items()
+                                           if key != 'target_system_file'}
+                             for page_number, config in book.page_configs.items()}
+        self.target_system_file = None
+        self.system = SimpleNamespace(game=book.system.game)
+        self.pages = []
+
+
+def read_page(detached_book: DetachedBook, cache_directory: str or None,
+              page_args: tuple[str, int, int, str or None]) -> PdfPage:
+    """
+    Read a page in a worker process. If a cache_directory is given, the worker also writes the cache entry for it.
+    """
+    page_text, page_number, file_page_number, prev_page_type = page_args
+    page = PdfPage(detached_book, page_text, page_number, prev_page_type=prev_page_type,
+                   file_page_number=file_page_number)
+    if cache_directory:
+        store_cached_page(cache_directory, get_page_key(detached_book, page_text, page_number, prev_page_type),
+                          page, detached_book)
+    return page
+
+
+def read_pages(book: 'Book', page_args: list[tuple[str, int, int, str or None]], workers: int,
+               cache_directory: str = None) -> Iterator[PdfPage]:
+    """
+    Read (page text, page number, file page number, prev page type) in a process pool,
+    yielding pages in order as soon as each is ready. Pages in the cache aren't sent to the pool.
+    Pages still need attaching to the book.
+    """
+    detached_book = DetachedBook(book)
+    cached_pages = [None] * len(page_args)
+    if cache_directory:
+        for i, (page_text, page_number, file_page_number, prev_page_type) in enumerate(page_args):
+            cached_pages[i] = load_cached_page(cache_directory,
+                                               get_page_key(detached_book, page_text, page_number, prev_page_type))
+            if cached_pages[i] is not None:
+                cached_pages[i].file_page_number = file_page_number
+    to_read = [args for args, page in zip(page_args, cached_pages) if page is None]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        read_pages_iterator = executor.map(partial(read_page, detached_book, cache_directory), to_read, chunksize=4)
+        for page in cached_pages:
+            yield page if page is not None else next(read_pages_iterator)
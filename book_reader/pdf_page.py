@@ -14,18 +14,75 @@ from util.text_utils import split_into_columns, split_at_header, split_after_hea
     split_into_columns_at_divider, split_at_dot, option_process_line
 
 
+def clean_page_text(raw_text: str, page_number: int) -> str:
+    raw_text = text_utils.replace_quote_alikes(raw_text)
+    raw_text = raw_text.replace("\ue536", "1")  # This seems to be something odd in hh3
+    raw_text = raw_text.replace("\ue537", "2")  # This as well
+    raw_text = text_utils.remove_copyright_footer(raw_text)
+    if page_number and raw_text.rstrip().endswith(str(page_number)):
+        raw_text = raw_text.rstrip()[:-len(str(page_number))]
+    return raw_text
+
+
+def has_page_type_header(page_type: str, text: str) -> bool:
+    """
+    Whether text has the header that starts a page of page_type.
+    Only special rules, weapon profiles, wargear and types pages are found by their headers.
+    """
+    lines = text.lstrip().splitlines()
+    if not lines:
+        return False
+    first_line = lines[0].lower()
+    if page_type == PageTypes.SPECIAL_RULES:
+        return len(lines) > 2 and "special rules" in lines[2].lower()
+    if page_type == PageTypes.WEAPON_PROFILES:
+        return "armoury" in first_line
+    if page_type == PageTypes.WARGEAR:
+        return "wargear" in first_line and "additional" not in first_line
+    if page_type == PageTypes.TYPES_AND_SUBTYPES:
+        return "unit types" in first_line
+    return False
+
+
+def is_page_of_type(page_type: str, text: str, prev_page_type: str or None) -> bool:
+    """
+    A page is of a type with a header if it has the header, or continues a page of that type.
+    """
+    return prev_page_type == page_type or has_page_type_header(page_type, text)
+
+
+def guess_page_type(raw_text: str, page_type: str or None, prev_page_type: str or None, game: 'Game') -> str or None:
+    """
+    Cheaply guess the type PdfPage will give a page, with the same header checks, without parsing any units or
+    columns. Used to guess each page's prev_page_type before parsing pages in parallel.
+    Wargear headers are looked for in the whole page rather than the text above its columns.
+    :param raw_text: Text from clean_page_text
+    :param page_type: The type from the page config, if any
+    """
+    if raw_text.strip() == "" or len(raw_text.strip().splitlines()) < 3:
+        return PageTypes.BLANK_OR_IGNORED
+    if page_type and page_type not in [PageTypes.SPECIAL_RULES, PageTypes.WEAPON_PROFILES, PageTypes.WARGEAR,
+                                       PageTypes.TYPES_AND_SUBTYPES]:
+        return page_type
+    if not page_type and game.ProfileLocator in raw_text:
+        return PageTypes.UNIT_PROFILES
+    if page_type == PageTypes.WEAPON_PROFILES:
+        return PageTypes.WEAPON_PROFILES
+    # In the order PdfPage tries them
+    for detected_type in [PageTypes.SPECIAL_RULES, PageTypes.WEAPON_PROFILES, PageTypes.WARGEAR,
+                          PageTypes.TYPES_AND_SUBTYPES]:
+        if (not page_type or page_type == detected_type) and is_page_of_type(detected_type, raw_text, prev_page_type):
+            return detected_type
+    return page_type
+
+
 class PdfPage(Page):
 
     def __init__(self, book, raw_text, page_number, file_page_number, prev_page_type=None):
         super().__init__(book, page_number, file_page_number)
-        self.raw_text = text_utils.replace_quote_alikes(raw_text)
-        self.raw_text = self.raw_text.replace("\ue536", "1")  # This seems to be something odd in hh3
-        self.raw_text = self.raw_text.replace("\ue537", "2")  # This as well
-        self.raw_text = text_utils.remove_copyright_footer(self.raw_text)
+        self.raw_text = clean_page_text(raw_text, page_number)
         self.cleaned_text = None
         self.faq_entries = []
-        if self.page_number and self.raw_text.rstrip().endswith(str(self.page_number)):
-            self.raw_text = self.raw_text.rstrip()[:-len(str(self.page_number))]
 
         debug_specific_page = 0
         if debug_specific_page:
@@ -97,12 +154,11 @@ class PdfPage(Page):
 
     def handle_special_rules_page(self, prev_page_type):
         # Special rules pages are two-column format
-        has_special_rules_header = "Special Rules".lower() in self.raw_text.lower().lstrip().splitlines()[2]
         header_text, col_1, col_2 = self.handle_simple_two_column_page()
 
         # If page doesn't have a special rules header and isn't after a previous special rules page,
         # then it's not a special rules page.
-        if not has_special_rules_header and not prev_page_type == PageTypes.SPECIAL_RULES:
+        if not is_page_of_type(PageTypes.SPECIAL_RULES, self.raw_text, prev_page_type):
             return
 
         self.page_type = PageTypes.SPECIAL_RULES
@@ -110,20 +166,14 @@ class PdfPage(Page):
         self.special_rules_text = col_1 + "\n" + col_2
 
     def handle_weapon_profiles_page(self, prev_page_type):
-        if not self.page_type:
-            has_armoury_header = "Armoury".lower() in self.raw_text.lstrip().splitlines()[0].lower()
-            if not has_armoury_header and not prev_page_type == PageTypes.WEAPON_PROFILES:
-                return
+        if not self.page_type and not is_page_of_type(PageTypes.WEAPON_PROFILES, self.raw_text, prev_page_type):
+            return
         self.page_type = PageTypes.WEAPON_PROFILES
         self.special_rules_text = self.raw_text
 
     def handle_wargear_page(self, prev_page_type):
         header_text, col_1, col_2 = self.handle_simple_two_column_page()
-        first_line = ""
-        if header_text.lstrip().splitlines():
-            first_line = header_text.lstrip().splitlines()[0].lower()
-        has_wargear_header = "Wargear".lower() in first_line and "ADDITIONAL".lower() not in first_line
-        if not has_wargear_header and not prev_page_type == PageTypes.WARGEAR:
+        if not is_page_of_type(PageTypes.WARGEAR, header_text, prev_page_type):
             return
         self.page_type = PageTypes.WARGEAR
         self.special_rules_text = col_1 + "\n" + col_2
@@ -181,8 +231,7 @@ class PdfPage(Page):
             self.wargear_lists.append(group)
 
     def handle_types_page(self, prev_page_type):
-        has_types_header = "Unit Types".lower() in self.raw_text.lstrip().splitlines()[0].lower()
-        if not has_types_header and not prev_page_type == PageTypes.TYPES_AND_SUBTYPES:
+        if not is_page_of_type(PageTypes.TYPES_AND_SUBTYPES, self.raw_text, prev_page_type):
             return
         self.page_type = PageTypes.TYPES_AND_SUBTYPES
         self.special_rules_text = self.raw_text
@@ -0,0 +1,205 @@
+import hashlib
+import marshal
+import os
+import re
+import subprocess as sp
+
+# Bump when the layout of the index changes, so old indexes are rebuilt.
+INDEX_VERSION = 1
+
+PAGE_BREAK = b'\x0c'  # pdftotext ends every page with a form feed
+
+# Below this many pages per process, starting the extra pdftotext processes costs more than it saves.
+MIN_PAGES_PER_RANGE = 20
+
+
+def get_file_hash(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def get_index_path(text_path: str) -> str:
+    return text_path + ".index"
+
+
+class PdfText:
+    """
+    The pdftotext output of a pdf, with the byte offset every page starts at,
+    so single pages can be read without reading and splitting the whole text.
+    """
+
+    def __init__(self, text_path: str, page_offsets: list[int]):
+        self.text_path = text_path
+        self.page_offsets = page_offsets
+
+    def __len__(self):
+        return len(self.page_offsets)
+
+    def __iter__(self):
+        with open(self.text_path, 'rb') as f:
+            for page_index in range(len(self)):
+                yield self._read_page(f, page_index)
+
+    def get_page(self, page_index: int) -> str:
+        """
+        :param page_index: Index of the page in the file, not its printed page number.
+        """
+        with open(self.text_path, 'rb') as f:
+            return self._read_page(f, page_index)
+
+    def __getitem__(self, page_index: int) -> str:
+        return self.get_page(page_index)
+
+    def _read_page(self, f, page_index: int) -> str:
+        start = self.page_offsets[page_index]
+        f.seek(start)
+        if page_index + 1 < len(self.page_offsets):
+            page_bytes = f.read(self.page_offsets[page_index + 1] - start - len(PAGE_BREAK))
+        else:
+            page_bytes = f.read()
+        page_text = page_bytes.decode('utf-8')
+        if "\r" in page_text:
+            # Reading the whole file in text mode used to turn these into newlines.
+            page_text = page_text.replace("\r\n", "\n").replace("\r", "\n")
+        # Replace backspace characters with whitespace. This is appearing at ends of entries.
+        return re.sub("\x08", " ", page_text)
+
+
+def get_pdf_text(pdf_path: str, text_path: str, workers: int = None) -> PdfText:
+    """
+    Get the text of a pdf, running pdftotext if there is no text file for it yet or the pdf changed since.
+    The pdf's size, mtime and hash are kept in an index next to the text file, along with where each page starts.
+    A text file with no index (written before indexes, or by hand) is regenerated if the pdf was modified after it,
+    and otherwise assumed to match the pdf as it is now.
+    :param workers: pdftotext processes to split the pages between.
+    """
+    index_path = get_index_path(text_path)
+    index = load_index(index_path)
+    if os.path.exists(pdf_path):
+        stat = os.stat(pdf_path)
+        if not os.path.exists(text_path):
+            pdf_hash = None
+        elif index is None:
+            if stat.st_mtime_ns > os.stat(text_path).st_mtime_ns:
+                print(f"{os.path.basename(pdf_path)} is newer than {os.path.basename(text_path)}")
+                pdf_hash = None
+            else:
+                pdf_hash = get_file_hash(pdf_path)
+        else:
+            pdf_hash = index['pdf_hash']
+            if index['pdf_size'] != stat.st_size or (index['pdf_mtime_ns'] != stat.st_mtime_ns
+                                                     and pdf_hash != get_file_hash(pdf_path)):
+                print(f"{os.path.basename(pdf_path)} changed since {os.path.basename(text_path)} was written")
+                pdf_hash = None
+        if pdf_hash is None:
+            pdftotext(pdf_path, text_path, workers)
+            pdf_hash = get_file_hash(pdf_path)
+            index = None
+        pdf_details = {'pdf_size': stat.st_size, 'pdf_mtime_ns': stat.st_mtime_ns, 'pdf_hash': pdf_hash}
+    elif index is not None:
+        pdf_details = {key: index[key] for key in ['pdf_size', 'pdf_mtime_ns', 'pdf_hash']}
+    else:
+        pdf_details = {'pdf_size': None, 'pdf_mtime_ns': None, 'pdf_hash': None}  # Only the text file was given
+
+    text_stat = os.stat(text_path)
+    if (index is None or index['text_size'] != text_stat.st_size or index['text_mtime_ns'] != text_stat.st_mtime_ns
+            or any(index[key] != value for key, value in pdf_details.items())):
+        # Also when the text file was edited by hand, which is kept.
+        index = dict(pdf_details, text_size=text_stat.st_size, text_mtime_ns=text_stat.st_mtime_ns,
+                     page_offsets=get_page_offsets(text_path))
+        store_index(index_path, index)
+    return PdfText(text_path, index['page_offsets'])
+
+
+def get_page_offsets(text_path: str) -> list[int]:
+    page_offsets = [0]
+    with open(text_path, 'rb') as f:
+        content = f.read()
+    offset = content.find(PAGE_BREAK)
+    while offset != -1:
+        page_offsets.append(offset + len(PAGE_BREAK))
+        offset = content.find(PAGE_BREAK, offset + len(PAGE_BREAK))
+    return page_offsets
+
+
+def load_index(index_path: str) -> dict or None:
+    if not os.path.isfile(index_path):
+        return None
+    try:
+        with open(index_path, 'rb') as f:
+            index = marshal.load(f)
+    except (EOFError, ValueError, TypeError):
+        return None  # Partially written or otherwise unreadable, it will be rebuilt.
+    if not isinstance(index, dict) or index.get('version') != INDEX_VERSION:
+        return None
+    return index
+
+
+def store_index(index_path: str, index: dict):
+    temp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        marshal.dump(dict(index, version=INDEX_VERSION), f)
+    os.replace(temp_path, index_path)
+
+
+def get_pdftotext_command() -> list[str]:
+    # Need pdftotext 23, not 4.x, which conda installs here on Windows. Otherwise whichever is on the path.
+    path_to_pdftotext = os.path.expanduser("~/miniconda3/Library/bin/pdftotext.exe")
+    if os.path.isfile(path_to_pdftotext):
+        return [path_to_pdftotext]
+    return ['pdftotext']
+
+
+def get_pdf_page_count(pdf_path: str) -> int or None:
+    try:
+        result = sp.run(['pdfinfo', pdf_path], stdout=sp.PIPE, stderr=sp.DEVNULL, check=True, text=True)
+    except (OSError, sp.CalledProcessError):
+        return None
+    match = re.search(r"^Pages:\s+(\d+)", result.stdout, re.MULTILINE)
+    return int(match.group(1)) if match else None
+
+
+def pdftotext(pdf_path: str, text_path: str, workers: int = None):
+    """
+    Generate a text rendering of a PDF file.
+    # Because the python wrapper doesn't give us as good of output...
+    With more than one worker, page ranges are extracted by separate pdftotext processes at the same time,
+    then joined. pdftotext lays out each page on its own, so this is the same as extracting the whole pdf at once.
+    """
+    program_args = ['-layout', '-enc', 'UTF-8']
+    temp_path = f"{text_path}.{os.getpid()}.tmp"
+    page_count = get_pdf_page_count(pdf_path) if workers and workers >= 2 else None
+    if not page_count or page_count < 2 * MIN_PAGES_PER_RANGE:
+        try:
+            sp.run(get_pdftotext_command() + program_args + [pdf_path, temp_path],
+                   stdout=sp.PIPE, stderr=sp.DEVNULL, check=True)
+            os.replace(temp_path, text_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return
+
+    range_count = min(workers, page_count // MIN_PAGES_PER_RANGE)
+    range_size = -(-page_count // range_count)
+    page_ranges = [(first_page, min(first_page + range_size - 1, page_count))
+                   for first_page in range(1, page_count + 1, range_size)]
+    range_paths = [f"{temp_path}.{first_page}" for first_page, _ in page_ranges]
+    try:
+        # Each range is its own process already, so they only need starting and waiting on.
+        processes = [sp.Popen(get_pdftotext_command() + ['-f', str(first_page), '-l', str(last_page)]
+                              + program_args + [pdf_path, range_path], stdout=sp.PIPE, stderr=sp.DEVNULL)
+                     for (first_page, last_page), range_path in zip(page_ranges, range_paths)]
+        for process in processes:
+            process.communicate()
+        for process in processes:
+            if process.returncode:
+                raise sp.CalledProcessError(process.returncode, process.args)
+        with open(temp_path, 'wb') as f:
+            for range_path in range_paths:
+                with open(range_path, 'rb') as range_file:
+                    f.write(range_file.read())
+        os.replace(temp_path, text_path)  # Never leave a partial text file, it would be taken as the whole pdf
+    finally:
+        for path in range_paths + [temp_path]:
+            if os.path.exists(path):
+                os.remove(path)
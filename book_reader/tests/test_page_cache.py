@@ -0,0 +1,51 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from book_reader.page_cache import get_page_cache_path, load_cached_page
+
+KEY = "ab" + "0" * 62
+
+# Pickle of an instance of a class that no longer exists
+MISSING_CLASS_PICKLE = b"\x80\x04\x95\x1f\x00\x00\x00\x00\x00\x00\x00\x8c\x0emissing_module\x94\x8c\x07Missing\x94\x93\x94)\x81\x94."
+
+
+class PageCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        cache_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_directory.cleanup)
+        self.cache_directory = cache_directory.name
+        self.cache_path = get_page_cache_path(self.cache_directory, KEY)
+        os.makedirs(os.path.dirname(self.cache_path))
+
+    def write_entry(self, content: bytes):
+        with open(self.cache_path, 'wb') as f:
+            f.write(content)
+
+    def test_missing_entry(self):
+        os.rmdir(os.path.dirname(self.cache_path))
+        self.assertIsNone(load_cached_page(self.cache_directory, KEY))
+
+    def test_entry_loaded(self):
+        self.write_entry(pickle.dumps({"page_number": 3}))
+        self.assertEqual({"page_number": 3}, load_cached_page(self.cache_directory, KEY))
+
+    def test_corrupt_entries_are_misses(self):
+        complete_entry = pickle.dumps({"page_number": 3}, protocol=pickle.HIGHEST_PROTOCOL)
+        corrupt_entries = {
+            "empty": b"",
+            "truncated": complete_entry[:len(complete_entry) // 2],
+            "not a pickle": b"<?xml version='1.0'?>",
+            "missing class": MISSING_CLASS_PICKLE,
+            "bad opcode arguments": b"\x80\x04K\x01K\x02\x86R.",  # Calls an int
+        }
+        for name, content in corrupt_entries.items():
+            with self.subTest(name):
+                self.write_entry(content)
+                self.assertIsNone(load_cached_page(self.cache_directory, KEY))
+
+
+if __name__ == '__main__':
+    unittest.main()
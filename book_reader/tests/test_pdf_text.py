@@ -0,0 +1,104 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from book_reader.pdf_text import get_index_path, get_pdf_text
+
+OLD_MTIME_NS = 1_000_000_000_000_000_000
+
+
+class PdfTextTests(unittest.TestCase):
+    """
+    get_pdf_text only runs pdftotext again when the pdf has changed, by its size, mtime and hash.
+    pdftotext is replaced with one writing the pdf's own content, split into pages at each "|".
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.pdf_path = os.path.join(directory.name, "book.pdf")
+        self.text_path = os.path.join(directory.name, "book.txt")
+        self.write_pdf(b"one|two|three")
+        self.pdftotext_runs = 0
+
+    def write_pdf(self, content: bytes, mtime_ns: int = None):
+        with open(self.pdf_path, 'wb') as f:
+            f.write(content)
+        if mtime_ns is not None:
+            os.utime(self.pdf_path, ns=(mtime_ns, mtime_ns))
+
+    def fake_pdftotext(self, pdf_path: str, text_path: str, workers: int = None):
+        self.pdftotext_runs += 1
+        with open(pdf_path, 'rb') as f:
+            pages = f.read().split(b"|")
+        with open(text_path, 'wb') as f:
+            f.write(b"".join(page + b"\x0c" for page in pages))
+
+    def get_pages(self) -> list[str]:
+        with mock.patch("book_reader.pdf_text.pdftotext", self.fake_pdftotext), \
+                contextlib.redirect_stdout(io.StringIO()):
+            pdf_text = get_pdf_text(self.pdf_path, self.text_path)
+        pages = list(pdf_text)
+        self.assertEqual(pages, [pdf_text[index] for index in range(len(pdf_text))])
+        return pages
+
+    def test_text_reused_until_pdf_changes(self):
+        self.assertEqual(["one", "two", "three", ""], self.get_pages())
+        self.assertEqual(1, self.pdftotext_runs)
+        self.assertTrue(os.path.isfile(get_index_path(self.text_path)))
+        self.get_pages()
+        self.assertEqual(1, self.pdftotext_runs)
+
+        # Touched but not changed, so the hash still matches
+        os.utime(self.pdf_path, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+        self.get_pages()
+        self.assertEqual(1, self.pdftotext_runs)
+
+        # Same size, different content
+        self.write_pdf(b"one|two|THREE", OLD_MTIME_NS + 1)
+        self.assertEqual(["one", "two", "THREE", ""], self.get_pages())
+        self.assertEqual(2, self.pdftotext_runs)
+
+        # Different size, even with the same mtime
+        self.write_pdf(b"one|two|three|four", OLD_MTIME_NS + 1)
+        self.assertEqual(["one", "two", "three", "four", ""], self.get_pages())
+        self.assertEqual(3, self.pdftotext_runs)
+
+    def test_text_edited_by_hand_kept(self):
+        self.get_pages()
+        with open(self.text_path, 'wb') as f:
+            f.write(b"one\x0cfixed two\x0cthree\x0c")
+        self.assertEqual(["one", "fixed two", "three", ""], self.get_pages())
+        self.assertEqual(1, self.pdftotext_runs)
+
+    def test_text_without_index(self):
+        self.get_pages()
+        os.remove(get_index_path(self.text_path))
+        self.get_pages()  # The pdf is older than the text, so it's assumed to match
+        self.assertEqual(1, self.pdftotext_runs)
+
+        os.remove(get_index_path(self.text_path))
+        text_mtime_ns = os.stat(self.text_path).st_mtime_ns
+        self.write_pdf(b"new|pdf", text_mtime_ns + 1_000_000_000)
+        self.assertEqual(["new", "pdf", ""], self.get_pages())
+        self.assertEqual(2, self.pdftotext_runs)
+
+    def test_corrupt_index_rebuilt(self):
+        self.get_pages()
+        with open(get_index_path(self.text_path), 'wb') as f:
+            f.write(b"\x00not an index")
+        self.assertEqual(["one", "two", "three", ""], self.get_pages())
+        self.assertEqual(1, self.pdftotext_runs)
+
+    def test_only_text_file(self):
+        self.get_pages()
+        os.remove(self.pdf_path)
+        self.assertEqual(["one", "two", "three", ""], self.get_pages())
+        self.assertEqual(1, self.pdftotext_runs)
+
+
+if __name__ == '__main__':
+    unittest.main()
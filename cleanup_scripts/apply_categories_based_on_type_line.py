@@ -13,7 +13,7 @@ if __name__ == '__main__':
     model_count = 0
     models_with_profiles_count = 0
     models_without_profiles = []
-    for model_node in system.nodes_with_ids.filter(lambda x: x.type == "selectionEntry:model"):
+    for model_node in system.query(tag='selectionEntry', type_name='model'):
         print(model_node)
         model_count += 1
         profile_node = model_node.get_profile_node()
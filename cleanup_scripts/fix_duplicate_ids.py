@@ -20,7 +20,7 @@ if __name__ == '__main__':
     duplicate_sets = []
     for node_id in duplicates.keys():
         original_node = None
-        for count, node in enumerate(system.nodes_with_ids.filter(lambda x: x.id == node_id)):
+        for count, node in enumerate(system.nodes_with_ids.get_all_by_id(node_id)):
             if count == 0:
                 original_node = node
                 print(f"{node}")
@@ -29,7 +29,7 @@ if __name__ == '__main__':
                 print(f"\tDeleting likely duplicate {node}")
                 node.delete()
             else:
-                node.attrib.update({"id": get_random_bs_id()})
+                node.update_attributes({"id": get_random_bs_id()})
                 print(f"\tGenerating new ID for {node}")
 
     system.save_system()
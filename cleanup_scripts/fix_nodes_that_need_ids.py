@@ -9,6 +9,6 @@ if __name__ == '__main__':
     for node in system.all_nodes:
         if node.tag in elements_that_get_id and (node.id is None or node.id == ""):
             print(f"Setting ID for {node}")
-            node.attrib.update({"id": get_random_bs_id()})
+            node.update_attributes({"id": get_random_bs_id()})
 
     system.save_system()
@@ -9,4 +9,4 @@ if __name__ == '__main__':
                     },
                     include_raw=False,
                     )
-    system.save_system()
\ No newline at end of file
+    system.save_system(all_files=True)
\ No newline at end of file
@@ -9,7 +9,7 @@ if __name__ == '__main__':
                     },
                     )
     for type_category in system.model_types_and_subtypes.values():
-        for type_link in system.nodes_with_ids.filter(lambda x: x.target_id == type_category.id):
+        for type_link in system.get_nodes_referencing(type_category.id, ['targetId']):
             se = type_link.parent.parent
             if se.type != "selectionEntry:model":
                 type_link.delete()
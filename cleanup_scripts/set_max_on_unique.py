@@ -19,17 +19,15 @@ if __name__ == '__main__':
                         SystemSettingsKeys.GAME_IMPORT_SPEC: GameImportSpecs.HERESY3E,
                     },
                     )
-    for unique_type_link in system.nodes_with_ids.filter(lambda x:
-                                                         x.tag == "categoryLink"
-                                                         and x.target_name == "Unique Model Sub-Type"
-                                                         ):
+    for unique_type_link in system.query(tag="categoryLink",
+                                         condition=lambda x: x.target_name == "Unique Model Sub-Type"):
         unit = unique_type_link.find_ancestor_with(lambda x: x.type == "selectionEntry:unit")
         if unit is None:
             continue
         constraints = unit.get_or_create_child("constraints")
         if len(constraints.children) <= 1:
             max_constraint = constraints.get_or_create_child("constraint", {"type": "max"})
-            max_constraint.attrib.update(expected_attribs)
+            max_constraint.update_attributes(expected_attribs)
             continue
         for constraint in constraints.children:
             copy_with_no_child_forces_or_id = constraint.attrib.copy()
@@ -37,7 +35,7 @@ if __name__ == '__main__':
             copy_with_no_child_forces_or_id.pop("includeChildForces", None)
             if Node.are_attribs_equal(copy_with_no_child_forces_or_id, expected_attribs_with_no_include_child):
                 # Update any existing that don't have includeChildForces.
-                constraint.attrib.update({"includeChildForces": "true"})
+                constraint.update_attributes({"includeChildForces": "true"})
                 break
 
     system.save_system()
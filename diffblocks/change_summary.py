@@ -0,0 +1,160 @@
+from typing import TYPE_CHECKING, Iterator
+
+from diffblocks.diffblock import DiffBlock
+from diffblocks.tree_diff import TreeDiff, get_match_key, get_own_text
+
+if TYPE_CHECKING:
+    from diffblocks.system_diff import SystemDiff
+    from system.node import Node
+    from system.system_file import SystemFile
+
+# Nodes whose attributes are summed up by their generated name, so a change is shown as the name before and after.
+GENERATED_NAME_TAGS = ["modifier", "condition", "conditionGroup", "constraint"]
+
+
+def get_anchor(node: 'Node') -> 'Node':
+    """
+    The root selection entry, rule or the like a node is part of, which changes are grouped by,
+    or the root node for nodes outside of those.
+    """
+    if node.is_base_level or node.is_root_node:
+        return node
+    return node.find_ancestor_with(lambda ancestor: ancestor.is_base_level or ancestor.is_root_node)
+
+
+def describe(node: 'Node') -> str:
+    name = node.generated_name
+    if name:
+        # Generated names already say what type of modifier and so on they are
+        return f"{node.tag if node.tag in GENERATED_NAME_TAGS else node.type} {name.strip()}"
+    if node.id:
+        return f"{node.type} ({node.id})"
+    return node.type
+
+
+def is_container(node: 'Node') -> bool:
+    """
+    Nodes like selectionEntries or modifiers that only hold other nodes, so are described by what they hold.
+    """
+    return not node.attrib and not get_own_text(node)
+
+
+class ChangeSummary:
+    """
+    What changed between two versions of a system, entry by entry rather than line by line:
+    points changed, a profile's characteristic changed from one value to another, a link retargeted, a modifier added.
+    Each changed file is compared as in a tree diff, and changes are grouped by the root entry they're part of.
+    """
+
+    def __init__(self, system_diff: 'SystemDiff'):
+        self.system_diff = system_diff
+        # File name: {match key of the root entry: (heading, [changes])}, in the order first changed
+        self.files: dict[str, dict[tuple, tuple[str, list[str]]]] = {}
+        for file in system_diff.files:
+            if file.system_file_left is None:
+                self.files[file.name] = {(file.name, ""): ("", ["File was added"])}
+            elif file.system_file_right is None:
+                self.files[file.name] = {(file.name, ""): ("", ["File was removed"])}
+            else:
+                self.files[file.name] = self.summarize_file(file.system_file_left, file.system_file_right)
+
+    def summarize_file(self, left_file: 'SystemFile', right_file: 'SystemFile') \
+            -> dict[tuple, tuple[str, list[str]]]:
+        groups = {}
+        tree_diff = TreeDiff(left_file, right_file)
+        for item in tree_diff.iter_changes():
+            if isinstance(item, DiffBlock):
+                node = item.node
+                change_type = item.get_type()
+                if change_type == DiffBlock.REMOVE:
+                    changes = self.summarize_added_or_removed("Removed", node, tree_diff.left_to_right)
+                elif change_type == DiffBlock.ADD:
+                    changes = self.summarize_added_or_removed("Added", node, tree_diff.right_to_left)
+                elif change_type == DiffBlock.MOVE:
+                    left_node = tree_diff.right_to_left[node]
+                    changes = [f"Moved {describe(node)} from {left_node.parent_name or left_node.parent.type}"
+                               f" to {node.parent_name or node.parent.type}"]
+                else:  # Children that couldn't be matched up, compared line by line
+                    changes = [f"Changed {len(item.left_lines)} lines to {len(item.right_lines)} lines"
+                               f" in {describe(node)} that couldn't be matched by id"]
+            else:
+                node = item[1]
+                changes = self.summarize_modified(*item)
+            if not changes:
+                continue
+            anchor = get_anchor(node)
+            name = anchor.root_name or anchor.generated_name or anchor.id or ""
+            key = get_match_key(anchor) or (anchor.type, name)  # By id where possible, as names can be shared
+            if key not in groups:
+                heading = f"{anchor.type} {name}".strip() + (f" ({anchor.id})" if anchor.id else "")
+                groups[key] = (heading, [])
+            groups[key][1].extend(changes)
+        return groups
+
+    @staticmethod
+    def summarize_added_or_removed(verb: str, node: 'Node', matched: dict['Node', 'Node']) -> list[str]:
+        """
+        :param matched: Nodes matched on the other side, which are listed as moved rather than added or removed.
+        """
+        if is_container(node):
+            return [f"{verb} {describe(child)}" for child in node.children if child not in matched]
+        return [f"{verb} {describe(node)}"]
+
+    @staticmethod
+    def summarize_modified(left_node: 'Node', right_node: 'Node') -> list[str]:
+        """
+        Changes to a matched node's own attributes and text. Changes under it are found along with its children.
+        """
+        changes = []
+        left_text = get_own_text(left_node)
+        right_text = get_own_text(right_node)
+        if left_text != right_text:
+            if right_node.tag == "characteristic":
+                profile = right_node.parent.parent  # characteristics is in between
+                changes.append(f"{profile.name} {right_node.name} changed from {left_text} to {right_text}")
+            else:
+                changes.append(f"{right_node.tag} changed")  # Usually rules text, too long to repeat
+
+        left_attrib = left_node.attrib
+        right_attrib = right_node.attrib
+        if left_attrib == right_attrib:
+            return changes
+        changed_keys = [key for key in left_attrib.keys() | right_attrib.keys()
+                        if left_attrib.get(key) != right_attrib.get(key)]
+        if right_node.tag in GENERATED_NAME_TAGS:
+            changes.append(f"{right_node.tag} changed from {left_node.generated_name} to {right_node.generated_name}")
+            return changes
+        for key in sorted(changed_keys):
+            left_value = left_attrib.get(key)
+            right_value = right_attrib.get(key)
+            if right_node.tag == "cost" and key == "value":
+                changes.append(f"{right_node.name} changed from {left_value} to {right_value}")
+            elif key == "targetId":
+                changes.append(f"{left_node.generated_name} retargeted to {right_node.target_name}")
+            elif key == "name":
+                changes.append(f"Renamed {right_node.type} {left_value} to {right_value}")
+            elif right_node.tag == "characteristic" or right_node.tag == "cost":
+                continue  # Ids or type ids of these aren't worth a line
+            elif key == "type" and "targetId" in changed_keys:
+                continue  # The type of what a retargeted link points to
+            else:
+                changes.append(f"{describe(right_node)} {key} changed from {left_value} to {right_value}")
+        return changes
+
+    def get_pretty_summary(self):
+        return "".join(self.iter_pretty_summary())
+
+    def iter_pretty_summary(self) -> Iterator[str]:
+        """
+        The summary a group at a time, to be chunked like the pretty diff.
+        """
+        yield "# Summary of Changes"
+        for file_name, groups in self.files.items():
+            if not groups:
+                continue
+            yield f"\n## {file_name}\n"
+            for heading, changes in groups.values():
+                lines = [f"### {heading}"] if heading else []
+                lines += [f"- {change}" for change in changes]
+                yield "\n".join(lines) + "\n"
+        yield "\n"
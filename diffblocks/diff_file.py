@@ -1,14 +1,25 @@
-import difflib
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable, Iterator
 
 from diffblocks.diffblock import DiffLine, DiffBlock
+from diffblocks.parallel_diff import compare_lines
+from diffblocks.tree_diff import TreeDiff
 
 if TYPE_CHECKING:
     from diffblocks.system_diff import SystemDiff
 
 
+def read_texts(diff_item) -> tuple[str, str]:
+    """
+    Both versions of a changed file from a diff item.
+    """
+    return diff_item.a_blob.data_stream.read().decode('utf-8'), diff_item.b_blob.data_stream.read().decode('utf-8')
+
+
 class DiffFile:
-    def __init__(self, system_diff: 'SystemDiff', diff_item):
+    def __init__(self, system_diff: 'SystemDiff', diff_item, compared_lines: list[str or int] = None):
+        """
+        :param compared_lines: The output of compare_lines for the file, if already run, such as in a worker process.
+        """
         self.name = diff_item.a_path
         self.system_diff = system_diff
 
@@ -32,25 +43,35 @@ class DiffFile:
 
         self.blocks: {int: DiffBlock} = {}
 
-        a_file = diff_item.a_blob.data_stream.read().decode('utf-8')
-        b_file = diff_item.b_blob.data_stream.read().decode('utf-8')
-        diff_lib = difflib.Differ()
+        if system_diff.tree_diff:
+            tree_diff = TreeDiff(self.system_file_left, self.system_file_right)
+            self.blocks = dict(enumerate(tree_diff.get_blocks()))
+            return
+
+        if compared_lines is None:
+            compared_lines = compare_lines(*read_texts(diff_item))
+        self.read_compared_lines(compared_lines)
+
+    def read_compared_lines(self, compared_lines: Iterable[str or int]):
+        """
+        Group changed lines into blocks, annotated with the nodes they belong to.
+        :param compared_lines: Differ output, with runs of unchanged lines as their count.
+        """
         debug = False
         a_count = 0
         b_count = 0
         block_counter = 0
         last_line_is_left = False
         justify = 16
-        for line in diff_lib.compare(a_file.splitlines(), b_file.splitlines()):
-            line = line.rstrip()
-            if line.startswith('  ') or line == " " or line == "":
-                a_count += 1
-                b_count += 1
+        for line in compared_lines:
+            if isinstance(line, int):  # A run of unchanged lines
+                a_count += line
+                b_count += line
                 if block_counter in self.blocks.keys():  # End the block
                     block_counter += 1
                 last_line_is_left = False
                 if debug:
-                    print(f"l {a_count} | r {b_count}".ljust(justify) + line)
+                    print(f"l {a_count} | r {b_count}".ljust(justify) + f"({line} unchanged)")
             elif line.startswith(DiffLine.REMOVE):
                 a_count += 1
                 diff_line = DiffLine(a_count, DiffLine.REMOVE, line[2:], self.system_file_left)
@@ -77,13 +98,18 @@ class DiffFile:
                 self.blocks[block_counter].add_line(diff_line, note_is_left=last_line_is_left)
 
     def get_pretty_diff(self):
-        output_lines = [f"## {self.name}"]
+        return "".join(self.iter_pretty_diff())
+
+    def iter_pretty_diff(self) -> Iterator[str]:
+        """
+        The pretty diff a block at a time, so it can be written out without building it all first.
+        """
+        yield f"## {self.name}"
         if self.system_file_left is None:
-            output_lines.append("File was added")
+            yield "\nFile was added"
         elif self.system_file_right is None:
-            output_lines.append("File was removed")
+            yield "\nFile was removed"
         else:
             for block in self.blocks.values():
-                output_lines.append(block.get_pretty_diff())
-        output_lines.append("")
-        return "\n".join(output_lines)
+                yield "\n" + block.get_pretty_diff()
+        yield "\n"
@@ -2,11 +2,17 @@ from system.system_file import SystemFile
 
 
 class DiffBlock:
+    ADD = "Add"
+    REMOVE = "Remove"
+    MODIFY = "Modify"
+    MOVE = "Move"
 
-    def __init__(self):
+    def __init__(self, change_type: str = None):
         self.left_lines: ['DiffLine'] = []
         self.right_lines: ['DiffLine'] = []
         self.node = None
+        self.enclosing_node = None  # Of the first line, for blocks with no line that starts a node
+        self.change_type = change_type  # Otherwise worked out from the lines
 
     def add_line(self, line: 'DiffLine', note_is_left: bool = False):
 
@@ -21,14 +27,18 @@ class DiffBlock:
                 self.right_lines.append(line)
         if self.node is None:
             self.node = line.node
+        if self.enclosing_node is None:
+            self.enclosing_node = line.enclosing_node
 
     def get_type(self):
+        if self.change_type:
+            return self.change_type
         if self.left_lines and self.right_lines:
-            return "Modify"
+            return self.MODIFY
         if self.left_lines:
-            return "Remove"
+            return self.REMOVE
         if self.right_lines:
-            return "Add"
+            return self.ADD
 
     def get_pretty_diff(self):
         output_lines = []
@@ -38,6 +48,8 @@ class DiffBlock:
         title = f"### {change_type}"
         if self.node is not None:
             title += f" {self.node}"
+        elif self.enclosing_node is not None:
+            title += f" in {self.enclosing_node}"
         output_lines.append(title)
         output_lines.append("```xml")
 
@@ -64,13 +76,14 @@ class DiffLine:
         self.number = line_number
         self.content = line_content
         self.node = None
+        self.enclosing_node = None  # The innermost node this line is part of, when no node starts on it
 
         # See if we can find a node for this line
         if file is None:
             return
-        node_candidates = file.all_nodes.filter(lambda x: x.start_line_number == line_number)
-        if len(node_candidates) == 1:
-            self.node = node_candidates[0]
+        self.node = file.line_index.get_node_starting_at(line_number)
+        if self.node is None:
+            self.enclosing_node = file.line_index.get_enclosing_node(line_number)
 
     def get_pretty_line(self, number_justification, line_justification):
         info_str = f"{self.change_type} {str(self.number).rjust(number_justification)} {self.content.ljust(line_justification)}"
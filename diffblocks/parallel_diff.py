@@ -0,0 +1,37 @@
+import difflib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
+
+# Kept free of System/Node imports, so spawned workers start quickly.
+
+
+def compare_lines(a_text: str, b_text: str) -> list[str or int]:
+    """
+    The Differ output for two versions of a file, with trailing whitespace stripped,
+    and each run of unchanged lines replaced by its length, as most of a file is unchanged.
+    """
+    compared_lines = []
+    unchanged_count = 0
+    for line in difflib.Differ().compare(a_text.splitlines(), b_text.splitlines()):
+        line = line.rstrip()
+        if line.startswith('  ') or line == " " or line == "":
+            unchanged_count += 1
+            continue
+        if unchanged_count:
+            compared_lines.append(unchanged_count)
+            unchanged_count = 0
+        compared_lines.append(line)
+    if unchanged_count:
+        compared_lines.append(unchanged_count)
+    return compared_lines
+
+
+def compare_files(texts: list[tuple[str, str]], workers: int) -> Iterator[list[str or int]]:
+    """
+    Run compare_lines for each (a_text, b_text) in a process pool,
+    yielding the results in the order of texts as soon as each is ready.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(compare_lines, a_text, b_text) for a_text, b_text in texts]
+        for future in futures:
+            yield future.result()
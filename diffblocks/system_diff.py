@@ -1,20 +1,83 @@
-from diffblocks.diff_file import DiffFile
+from typing import Iterable, Iterator
+
+from diffblocks.diff_file import DiffFile, read_texts
 from system.system import System
 
+CODE_BLOCK_FENCE = "```"
+
 
 class SystemDiff:
-    def __init__(self, system_left: 'System', system_right: 'System', diff_index):
+    def __init__(self, system_left: 'System', system_right: 'System', diff_index, tree_diff: bool = False,
+                 workers: int = None):
+        """
+        :param tree_diff: Compare files node by node, matching nodes by id, rather than line by line.
+        :param workers: Processes to compare files line by line in, 0 or 1 to compare them in this process.
+        """
         self.system_left: 'System' = system_left
         self.system_right: 'System' = system_right
+        self.tree_diff = tree_diff
+
+        diff_items = [diff_item for diff_item in diff_index
+                      if diff_item.a_path.endswith('.cat') or diff_item.a_path.endswith('.gst')]
+        compared_lines = [None] * len(diff_items)
+        if workers and workers >= 2 and not tree_diff:
+            # Only the line comparisons run in the pool, as nodes stay in this process for annotating the lines.
+            from diffblocks.parallel_diff import compare_files
+
+            to_compare = [index for index, diff_item in enumerate(diff_items)
+                          if diff_item.a_blob is not None and diff_item.b_blob is not None]
+            texts = [read_texts(diff_items[index]) for index in to_compare]
+            for index, file_compared_lines in zip(to_compare, compare_files(texts, workers)):
+                compared_lines[index] = file_compared_lines
 
         self.files: [DiffFile] = []
-        for diff_item in diff_index:
-            if not (diff_item.a_path.endswith('.cat') or diff_item.a_path.endswith('.gst')):
-                continue
-            self.files.append(DiffFile(self, diff_item))
+        for diff_item, file_compared_lines in zip(diff_items, compared_lines):
+            self.files.append(DiffFile(self, diff_item, file_compared_lines))
 
     def get_pretty_diff(self):
-        output_lines = ["# Annotated Summary of Changes"]
+        return "".join(self.iter_pretty_diff())
+
+    def iter_pretty_diff(self) -> Iterator[str]:
+        """
+        The pretty diff a block at a time, in the order of the diff index.
+        """
+        yield "# Annotated Summary of Changes"
         for file in self.files:
-            output_lines.append(file.get_pretty_diff())
-        return "\n".join(output_lines)
+            yield "\n"
+            yield from file.iter_pretty_diff()
+
+
+def chunk_pretty_diff(pieces: Iterable[str], max_length: int) -> Iterator[str]:
+    """
+    Join pieces of a pretty diff into chunks of at most max_length characters, such as for comments with a size limit.
+    Chunks are split between pieces where possible. A piece too long for a chunk of its own is split between lines,
+    closing any code block at the end of one chunk and opening it again at the start of the next.
+    Only a single line longer than max_length makes a longer chunk.
+    """
+    chunk = []
+    chunk_length = 0
+    for piece in pieces:
+        if chunk and chunk_length + len(piece) > max_length:
+            yield "".join(chunk)
+            chunk = []
+            chunk_length = 0
+        if len(piece) <= max_length:
+            chunk.append(piece)
+            chunk_length += len(piece)
+            continue
+
+        code_block_start = None  # The fence line of the code block the lines so far are in
+        for line in piece.splitlines(keepends=True):
+            closing_length = len("\n" + CODE_BLOCK_FENCE) if code_block_start else 0
+            if chunk and chunk_length + len(line) + closing_length > max_length:
+                if code_block_start:
+                    chunk.append("\n" + CODE_BLOCK_FENCE)
+                yield "".join(chunk)
+                chunk = [code_block_start] if code_block_start else []
+                chunk_length = len(code_block_start) if code_block_start else 0
+            chunk.append(line)
+            chunk_length += len(line)
+            if line.startswith(CODE_BLOCK_FENCE):
+                code_block_start = None if code_block_start else line
+    if chunk:
+        yield "".join(chunk)
@@ -0,0 +1,51 @@
+import contextlib
+import io
+import types
+import unittest
+
+from diffblocks.change_summary import ChangeSummary
+from diffblocks.system_diff import SystemDiff
+from diffblocks.tests.test_tree_diff import load_fixture_system
+
+
+class ChangeSummaryTests(unittest.TestCase):
+    """
+    The tree diff fixtures, summed up by root entry.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.system_left = load_fixture_system("left")
+        cls.system_right = load_fixture_system("right")
+
+    def get_groups(self, file_name: str) -> list[tuple[str, list[str]]]:
+        diff_items = [types.SimpleNamespace(a_path=file_name, b_path=file_name)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            system_diff = SystemDiff(self.system_left, self.system_right, diff_items, tree_diff=True)
+        return list(ChangeSummary(system_diff).files[file_name].values())
+
+    def test_summary_of_moved_link(self):
+        # il-0001 moved out of se-sword's removed infoLinks, so is only listed as moved
+        self.assertEqual([
+            ("selectionEntry:upgrade Power Sword (se-sword)", ["Pts changed from 10 to 15"]),
+            ("selectionEntry:upgrade Chainsword (se-new)", [
+                "Added selectionEntry:upgrade Chainsword",
+                "Moved infoLink:rule Link to Fearless from Power Sword to Chainsword",
+            ]),
+            ("selectionEntry:upgrade Duplicate (se-dupe)", ["Removed selectionEntry:upgrade Duplicate"]),
+            ("rule Local Rule (rule-local)", ["description changed"]),
+        ], self.get_groups("Test.cat"))
+
+    def test_summary_of_modifiers_and_line_fallback(self):
+        self.assertEqual([
+            ("selectionEntry:upgrade A (se-a)", ["modifier changed from set hidden to true to set hidden to false"]),
+            ("selectionEntry:upgrade B (se-b)", [
+                "Moved modifier set name to A1 from A to B",
+                "modifier changed from set name to B1 to set name to B2",
+                "Changed 3 lines to 3 lines in selectionEntry:upgrade B that couldn't be matched by id",
+            ]),
+        ], self.get_groups("Keys.cat"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+from diffblocks.system_diff import chunk_pretty_diff
+
+CODE_BLOCK = "```xml\n<a/>\n<b/>\n<c/>\n```\n"
+
+
+class ChunkPrettyDiffTests(unittest.TestCase):
+
+    def test_split_between_pieces(self):
+        pieces = ["# Heading\n", "aaaa\n", "bbbb\n", "cccc\n"]
+        chunks = list(chunk_pretty_diff(pieces, 15))
+        self.assertEqual(["# Heading\naaaa\n", "bbbb\ncccc\n"], chunks)
+        self.assertEqual("".join(pieces), "".join(chunks))
+
+    def test_everything_fits(self):
+        pieces = ["# Heading\n", CODE_BLOCK]
+        self.assertEqual(["".join(pieces)], list(chunk_pretty_diff(pieces, 1000)))
+
+    def test_long_piece_split_between_lines(self):
+        chunks = list(chunk_pretty_diff(["intro\n", CODE_BLOCK], 21))
+        # The code block is closed at the end of a chunk and opened again at the start of the next
+        self.assertEqual(["intro\n", "```xml\n<a/>\n<b/>\n\n```", "```xml\n<c/>\n```\n"], chunks)
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk), 21)
+            self.assertEqual(0, chunk.count("```") % 2)
+
+    def test_long_line(self):
+        long_line = "x" * 30 + "\n"
+        chunks = list(chunk_pretty_diff(["a\n", long_line, "b\n"], 20))
+        self.assertEqual(["a\n", long_line, "b\n"], chunks)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import contextlib
+import io
+import os
+import unittest
+
+from diffblocks.diffblock import DiffBlock, DiffLine
+from diffblocks.tree_diff import TreeDiff
+from system.constants import SystemSettingsKeys
+from system.system import System
+
+FIXTURES_DIRECTORY = os.path.join(os.path.dirname(__file__), "fixtures")
+SYSTEM_NAME = "testsys"
+
+
+def load_fixture_system(side: str) -> System:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return System(SYSTEM_NAME, os.path.join(FIXTURES_DIRECTORY, side),
+                      settings={SystemSettingsKeys.CACHE_DIRECTORY: None, "diff": True})
+
+
+def get_file(system: System, name: str):
+    return next(file for file in system.files if file.name == name)
+
+
+def describe_block(block: DiffBlock) -> tuple:
+    return (block.get_type(), block.node.id or block.node.tag,
+            [(line.change_type, line.number, line.content) for line in block.left_lines + block.right_lines])
+
+
+class TreeDiffTests(unittest.TestCase):
+    """
+    Two versions of a small system, in fixtures/left and fixtures/right.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.system_left = load_fixture_system("left")
+        cls.system_right = load_fixture_system("right")
+
+    def get_blocks(self, file_name: str) -> list[tuple]:
+        tree_diff = TreeDiff(get_file(self.system_left, file_name), get_file(self.system_right, file_name))
+        return [describe_block(block) for block in tree_diff.get_blocks()]
+
+    def test_add_remove_move_and_modify(self):
+        # se-same is unchanged, so skipped by its hash. il-0001 moved from se-sword into the new se-new,
+        # so is only shown as moved, not in the blocks for the removed infoLinks or added se-new.
+        self.assertEqual([
+            (DiffBlock.MODIFY, "cost", [
+                (DiffLine.REMOVE, 9, '<cost name="Pts" typeId="pts-0001" value="10"/>'),
+                (DiffLine.ADD, 6, '<cost name="Pts" typeId="pts-0001" value="15"/>'),
+            ]),
+            (DiffBlock.REMOVE, "infoLinks", [
+                (DiffLine.REMOVE, 5, '<infoLinks>'),
+                (DiffLine.REMOVE, "", '</infoLinks>'),
+            ]),
+            (DiffBlock.ADD, "se-new", [
+                (DiffLine.ADD, 14, '<selectionEntry id="se-new" name="Chainsword" hidden="false" collective="false"'
+                                   ' import="true" type="upgrade">'),
+                (DiffLine.ADD, "", '  <infoLinks>'),
+                (DiffLine.ADD, "", '  </infoLinks>'),
+                (DiffLine.ADD, "", '</selectionEntry>'),
+            ]),
+            (DiffBlock.MOVE, "il-0001", [
+                (DiffLine.REMOVE, 6, 'From catalogue:catalogue(cat-test) > sharedSelectionEntries'
+                                     ' > selectionEntry:upgrade(se-sword) > infoLinks'),
+                (DiffLine.ADD, 16, 'To catalogue:catalogue(cat-test) > sharedSelectionEntries'
+                                   ' > selectionEntry:upgrade(se-new) > infoLinks'),
+            ]),
+            (DiffBlock.REMOVE, "se-dupe", [
+                (DiffLine.REMOVE, 17, '<selectionEntry id="se-dupe" name="Duplicate" hidden="false"'
+                                      ' collective="false" import="true" type="upgrade"/>'),
+            ]),
+            (DiffBlock.MODIFY, "description", [
+                (DiffLine.REMOVE, "", 'Old text'),
+                (DiffLine.ADD, "", 'New text'),
+            ]),
+        ], self.get_blocks("Test.cat"))
+
+    def test_node_and_template_ids_and_line_fallback(self):
+        # Modifiers are matched by the node and template ids in their comments, the one without either by tag,
+        # and the profiles and rules under se-b, with nothing to pair them up, are compared line by line.
+        self.assertEqual([
+            (DiffBlock.MODIFY, "modifier", [
+                (DiffLine.REMOVE, 9, '<modifier type="set" field="hidden" value="true">'),
+                (DiffLine.ADD, 6, '<modifier type="set" field="hidden" value="false">'),
+            ]),
+            (DiffBlock.MOVE, "modifier", [
+                (DiffLine.REMOVE, 6, 'From catalogue:catalogue(cat-keys) > sharedSelectionEntries'
+                                     ' > selectionEntry:upgrade(se-a) > modifiers'),
+                (DiffLine.ADD, 13, 'To catalogue:catalogue(cat-keys) > sharedSelectionEntries'
+                                   ' > selectionEntry:upgrade(se-b) > modifiers'),
+            ]),
+            (DiffBlock.MODIFY, "modifier", [
+                (DiffLine.REMOVE, 16, '<modifier type="set" field="name" value="B1"/>'),
+                (DiffLine.ADD, 16, '<modifier type="set" field="name" value="B2"/>'),
+            ]),
+            (DiffBlock.MODIFY, "se-b", [
+                (DiffLine.REMOVE, "", '<profiles>'),
+                (DiffLine.REMOVE, "", '  <profile name="Old" hidden="false" typeName="Weapon"/>'),
+                (DiffLine.REMOVE, "", '</profiles>'),
+                (DiffLine.ADD, "", '<rules>'),
+                (DiffLine.ADD, "", '  <rule name="New" hidden="false"/>'),
+                (DiffLine.ADD, "", '</rules>'),
+            ]),
+        ], self.get_blocks("Keys.cat"))
+
+
+if __name__ == '__main__':
+    unittest.main()
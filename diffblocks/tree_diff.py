@@ -0,0 +1,301 @@
+import difflib
+from typing import TYPE_CHECKING, Iterator
+
+from diffblocks.diffblock import DiffBlock, DiffLine
+from util.bs_xml_writer import INDENT, escape_attribute, escape_text
+
+if TYPE_CHECKING:
+    from system.node import Node
+    from system.system_file import SystemFile
+
+
+def get_match_key(node: 'Node') -> tuple or None:
+    """
+    What identifies a node between two versions of a file: its id,
+    or for nodes without one, the node or template id BSCopy keeps in its comment.
+    """
+    if node.id:
+        return node.tag, 'id', node.id
+    if node.bscopy_node_id:
+        return node.tag, 'node_id', node.bscopy_node_id
+    if node.template_id:
+        return node.tag, 'template_id', node.template_id
+    return None
+
+
+def get_nodes_by_key(root: 'Node') -> dict[tuple, 'Node']:
+    """
+    Nodes by match key, leaving out keys used more than once in the file, as they can't say which node is which.
+    """
+    nodes_by_key = {}
+    duplicate_keys = set()
+    for node in root.iter_subtree():
+        key = get_match_key(node)
+        if key is None:
+            continue
+        if key in nodes_by_key:
+            duplicate_keys.add(key)
+        nodes_by_key[key] = node
+    for key in duplicate_keys:
+        del nodes_by_key[key]
+    return nodes_by_key
+
+
+def get_own_text(node: 'Node') -> str or None:
+    text = node.text
+    return text if text and text.strip() else None  # Whitespace only text is just indentation
+
+
+def get_start_tag(node: 'Node') -> str:
+    return "<" + node.tag + "".join(f' {key}="{escape_attribute(value)}"' for key, value in node.attrib.items())
+
+
+def get_start_line(node: 'Node') -> str:
+    return get_start_tag(node) + (">" if node.children or get_own_text(node) else "/>")
+
+
+def get_xml_lines(node: 'Node', skipped: dict or set = ()) -> list[str]:
+    """
+    A node and everything under it as lines of XML, indented as BattleScribe writes them.
+    :param skipped: Nodes to leave out along with everything under them, such as those shown as moved instead.
+    """
+    lines = []
+    stack = [(node, 0, False)]
+    while stack:
+        current, depth, is_closing = stack.pop()
+        indentation = INDENT * depth
+        if is_closing:
+            lines.append(f"{indentation}</{current.tag}>")
+            continue
+        text = get_own_text(current)
+        start_tag = indentation + get_start_tag(current)
+        if current.children:
+            lines.extend((start_tag + ">" + (escape_text(text) if text else "")).splitlines())
+            stack.append((current, depth, True))
+            stack.extend((child, depth + 1, False) for child in reversed(current.children) if child not in skipped)
+        elif text:
+            lines.extend((start_tag + ">" + escape_text(text) + f"</{current.tag}>").splitlines())
+        else:
+            lines.append(start_tag + "/>")
+    return lines
+
+
+def get_line_number(node: 'Node') -> int or str:
+    line_number = node.start_line_number  # Only known in diff mode
+    return line_number if line_number is not None else ""
+
+
+class TreeDiff:
+    """
+    Compare two versions of a file node by node rather than line by line.
+    Nodes are matched by id (or BSCopy's node or template id), and other nodes by tag under matched parents,
+    then only the matched pairs whose subtree hashes differ are compared further, so unchanged entries cost
+    nothing past hashing. Where children under a matched parent can't be paired up, those children alone
+    are compared line by line.
+    """
+
+    def __init__(self, left_file: 'SystemFile', right_file: 'SystemFile'):
+        self.left_file = left_file
+        self.right_file = right_file
+        left_by_key = get_nodes_by_key(left_file.root_node)
+        right_by_key = get_nodes_by_key(right_file.root_node)
+        # Nodes with a key used once in their file. Unless matched, these were added or removed.
+        self.left_keyed = set(left_by_key.values())
+        self.right_keyed = set(right_by_key.values())
+        self.left_to_right: dict['Node', 'Node'] = {}
+        self.right_to_left: dict['Node', 'Node'] = {}
+        for key, left_node in left_by_key.items():
+            right_node = right_by_key.get(key)
+            if right_node is not None:
+                self.left_to_right[left_node] = right_node
+                self.right_to_left[right_node] = left_node
+
+    def get_blocks(self) -> Iterator[DiffBlock]:
+        """
+        The changes between the files as blocks, in the order of iter_changes.
+        """
+        for item in self.iter_changes():
+            if isinstance(item, DiffBlock):
+                yield item
+                continue
+            modify_block = self.get_modify_block(*item)
+            if modify_block is not None:
+                yield modify_block
+
+    def iter_changes(self) -> Iterator[DiffBlock or tuple['Node', 'Node']]:
+        """
+        One pass over the matched pairs of nodes whose subtrees differ, each followed by the changes to its children.
+        Children come in document order, with removed children placed by where they were on the left.
+        Children that could only be compared by tag, with no id on either side, come after the rest of their parent's.
+        """
+        # Blocks, and pairs of matched nodes left to compare, as a stack so deep nesting can't hit the recursion limit.
+        stack: list[DiffBlock or tuple['Node', 'Node']] = [(self.left_file.root_node, self.right_file.root_node)]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, DiffBlock):
+                yield item
+                continue
+            left_node, right_node = item
+            if left_node.get_subtree_hash() == right_node.get_subtree_hash():
+                continue
+            yield item
+            stack.extend(reversed(self.compare_children(left_node, right_node)))
+
+    def compare_children(self, left_parent: 'Node', right_parent: 'Node') -> list[DiffBlock or tuple['Node', 'Node']]:
+        """
+        Pair up the children of two matched nodes.
+        :return: Blocks for added, removed and moved children, and pairs of children to compare next, in order.
+        """
+        unkeyed_left = [child for child in left_parent.children
+                        if child not in self.left_to_right and child not in self.left_keyed]
+        unkeyed_right = [child for child in right_parent.children
+                         if child not in self.right_to_left and child not in self.right_keyed]
+        # With unkeyed children on both sides, they're paired up by tag after the rest, rather than added and removed.
+        pair_unkeyed = bool(unkeyed_left and unkeyed_right)
+
+        # (index on the left, block) for removed children, last first, to go before the first child after them
+        removals = []
+        left_indexes = {}
+        for left_index, left_child in enumerate(left_parent.children):
+            if left_child in self.left_to_right:
+                left_indexes[left_child] = left_index  # Compared from wherever it is on the right, which may have moved
+            elif left_child in self.left_keyed or not pair_unkeyed:
+                removals.append((left_index, self.get_removed_block(left_child)))
+        removals.reverse()
+
+        items = []
+        for right_child in right_parent.children:
+            left_child = self.right_to_left.get(right_child)
+            if left_child is not None:
+                if left_child.parent is not left_parent:
+                    items.append(self.get_move_block(left_child, right_child))
+                else:
+                    while removals and removals[-1][0] < left_indexes[left_child]:
+                        items.append(removals.pop()[1])
+                items.append((left_child, right_child))
+            elif right_child in self.right_keyed or not pair_unkeyed:
+                items.append(self.get_added_block(right_child))
+                items.extend(self.compare_moved_into(right_child))
+        items.extend(block for _, block in reversed(removals))
+        if not pair_unkeyed:
+            return items
+
+        left_over = []
+        right_over = []
+        left_hashes = [(child.tag, child.get_subtree_hash()) for child in unkeyed_left]
+        right_hashes = [(child.tag, child.get_subtree_hash()) for child in unkeyed_right]
+        matcher = difflib.SequenceMatcher(None, left_hashes, right_hashes, autojunk=False)
+        for opcode, left_start, left_end, right_start, right_end in matcher.get_opcodes():
+            if opcode == 'equal':
+                continue  # Identical, so nothing under them changed
+            # Changed children with the same tag, in the same order, are taken to be the same child.
+            left_by_tag = {}
+            for left_child in unkeyed_left[left_start:left_end]:
+                left_by_tag.setdefault(left_child.tag, []).append(left_child)
+            for right_child in unkeyed_right[right_start:right_end]:
+                same_tag = left_by_tag.get(right_child.tag)
+                if same_tag:
+                    items.append((same_tag.pop(0), right_child))
+                else:
+                    right_over.append(right_child)
+            unpaired = {left_child for same_tag in left_by_tag.values() for left_child in same_tag}
+            left_over.extend(left_child for left_child in unkeyed_left[left_start:left_end] if left_child in unpaired)
+
+        if left_over and right_over:
+            items.append(self.get_line_diff_block(right_parent, left_over, right_over))
+        else:
+            for left_child in left_over:
+                items.append(self.get_removed_block(left_child))
+            for right_child in right_over:
+                items.append(self.get_added_block(right_child))
+        for right_child in right_over:
+            items.extend(self.compare_moved_into(right_child))
+        return items
+
+    def compare_moved_into(self, added_node: 'Node') -> list[DiffBlock or tuple['Node', 'Node']]:
+        """
+        Matched nodes under an added node were moved into it, so are compared with where they came from.
+        Anything under those is compared along with them.
+        """
+        items = []
+        stack = list(reversed(added_node.children))
+        while stack:
+            right_node = stack.pop()
+            left_node = self.right_to_left.get(right_node)
+            if left_node is None:
+                stack.extend(reversed(right_node.children))
+                continue
+            items.append(self.get_move_block(left_node, right_node))
+            items.append((left_node, right_node))
+        return items
+
+    @staticmethod
+    def get_modify_block(left_node: 'Node', right_node: 'Node') -> DiffBlock or None:
+        """
+        A block for changes to a node's own attributes and text, or None if only its children changed.
+        """
+        if left_node.attrib == right_node.attrib and get_own_text(left_node) == get_own_text(right_node):
+            return None
+        block = DiffBlock(change_type=DiffBlock.MODIFY)
+        block.node = right_node
+        if left_node.attrib != right_node.attrib:
+            block.add_line(DiffLine(get_line_number(left_node), DiffLine.REMOVE, get_start_line(left_node)))
+            block.add_line(DiffLine(get_line_number(right_node), DiffLine.ADD, get_start_line(right_node)))
+        if get_own_text(left_node) != get_own_text(right_node):
+            for line in (get_own_text(left_node) or "").splitlines():
+                block.add_line(DiffLine("", DiffLine.REMOVE, line))
+            for line in (get_own_text(right_node) or "").splitlines():
+                block.add_line(DiffLine("", DiffLine.ADD, line))
+        return block
+
+    @staticmethod
+    def get_move_block(left_node: 'Node', right_node: 'Node') -> DiffBlock:
+        block = DiffBlock(change_type=DiffBlock.MOVE)
+        block.node = right_node
+        block.add_line(DiffLine(get_line_number(left_node), DiffLine.REMOVE, f"From {left_node.parent.path}"))
+        block.add_line(DiffLine(get_line_number(right_node), DiffLine.ADD, f"To {right_node.parent.path}"))
+        return block
+
+    def get_removed_block(self, node: 'Node') -> DiffBlock:
+        """
+        A removed node, leaving out anything under it that's matched on the right, as that's shown as moved.
+        """
+        return self.get_subtree_block(DiffBlock.REMOVE, node, DiffLine.REMOVE, self.left_to_right)
+
+    def get_added_block(self, node: 'Node') -> DiffBlock:
+        """
+        An added node, leaving out anything under it matched on the left, which compare_moved_into shows as moved.
+        """
+        return self.get_subtree_block(DiffBlock.ADD, node, DiffLine.ADD, self.right_to_left)
+
+    @staticmethod
+    def get_subtree_block(change_type: str, node: 'Node', line_change_type: str,
+                          skipped: dict or set = ()) -> DiffBlock:
+        block = DiffBlock(change_type=change_type)
+        block.node = node
+        line_number = get_line_number(node)
+        for line in get_xml_lines(node, skipped):
+            block.add_line(DiffLine(line_number, line_change_type, line))
+            line_number = ""  # Only the first line, as text can span lines
+        return block
+
+    def get_line_diff_block(self, parent: 'Node', left_nodes: list['Node'], right_nodes: list['Node']) -> DiffBlock:
+        """
+        Fall back to comparing lines, for children of a matched node that couldn't be matched to each other.
+        Only those children are compared, so this stays small. Matched nodes under them are left out, as moved.
+        """
+        left_lines = [line for node in left_nodes for line in get_xml_lines(node, self.left_to_right)]
+        right_lines = [line for node in right_nodes for line in get_xml_lines(node, self.right_to_left)]
+        block = DiffBlock(change_type=DiffBlock.MODIFY)
+        block.node = parent
+        last_line_is_left = False
+        for line in difflib.Differ().compare(left_lines, right_lines):
+            if line.startswith(DiffLine.REMOVE):
+                block.add_line(DiffLine("", DiffLine.REMOVE, line[2:]))
+                last_line_is_left = True
+            elif line.startswith(DiffLine.ADD):
+                block.add_line(DiffLine("", DiffLine.ADD, line[2:]))
+                last_line_is_left = False
+            elif line.startswith(DiffLine.NOTE):
+                block.add_line(DiffLine("", DiffLine.NOTE, line[2:].rstrip()), note_is_left=last_line_is_left)
+        return block
@@ -1,4 +1,3 @@
-from util.element_util import get_description, update_page_and_pub
 from util.log_util import STYLES, print_styled, get_diff
 from util.text_utils import bullet_options
 
@@ -105,13 +104,13 @@ def text_to_rules(new_rules_dict, rules_node, page, pub_id):
         if rule in rules_list.keys():
             print(f"\tRule exists in data files: {rules_list[rule]}")
             node = get_node_from_system(rules_list[rule])
-            description = get_description(node)
+            description = node.get_child('description')
             diff = get_diff(description.text, rule_text, 2)
             if diff:
                 print_styled("\tText Differs!", STYLES.PURPLE)
                 print(diff)
                 description.text = rule_text
-            update_page_and_pub(node, page, publication_id)
+            update_node_page_and_pub(node, page, publication_id)
             rules_ids.append(rules_list[rule])
         else:
             print_styled("\tNew Rule!", STYLES.GREEN)
@@ -124,7 +123,8 @@ def text_to_rules(new_rules_dict, rules_node, page, pub_id):
 if __name__ == '__main__':
     # Only import these if being called directly
     from util.system_globals import rules_list, files_in_system
-    from util.system_util import get_node_from_system, read_system, save_system, get_root_rules_node
+    from util.system_util import get_node_from_system, read_system, save_system, get_root_rules_node, \
+        update_node_page_and_pub
 
     read_system()
     tree_to_update = ""
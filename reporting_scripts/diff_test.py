@@ -1,26 +1,32 @@
 import argparse
 import datetime
+import itertools
 import os
 import sys
 
 from git import Repo  # pip install -r GitPython
 
-# Force python XML parser not faster C accelerators
-# because we can't hook the C implementation
-sys.modules['_elementtree'] = None
 print(os.getcwd())
 sys.path.insert(1, os.getcwd() + "/BSCopy")
 
-from diffblocks.system_diff import SystemDiff
+from diffblocks.change_summary import ChangeSummary
+from diffblocks.system_diff import SystemDiff, chunk_pretty_diff
 from settings import default_data_directory
 
 from system.constants import SystemSettingsKeys, GameImportSpecs
+from system.file_source import GitTreeSource
 from system.system import System
 
 if __name__ == '__main__':
 
     parser = argparse.ArgumentParser()
     parser.add_argument("-merge_base")
+    parser.add_argument("-tree", action='store_true',
+                        help="Compare files node by node, matching nodes by id, rather than line by line")
+    parser.add_argument("-workers", type=int, default=os.cpu_count(),
+                        help="Processes to compare files in, 1 to compare them all in this process")
+    parser.add_argument("-summary", action='store_true',
+                        help="Start with a summary of changes by root entry, ahead of the full diff")
     args = parser.parse_args()
 
     merge_base = args.merge_base
@@ -31,12 +37,6 @@ if __name__ == '__main__':
     system_name = 'horus-heresy-3rd-edition'
 
     repo = Repo(os.path.join(default_data_directory, 'horus-heresy-3rd-edition'))
-    original_head = None
-    try:
-        original_head = repo.head.ref
-        print(f"Current head: {original_head}")
-    except Exception as e:
-        pass  # This doesn't work with a detached head, so don't worry about it.
     head_commit = list(repo.iter_commits())[0]
     main_commit = None
     for commit in repo.iter_commits():
@@ -48,41 +48,44 @@ if __name__ == '__main__':
         print(f"Could not find merge base commit {merge_base}")
         exit(1)
 
+    diff_index = main_commit.diff(head_commit)
+    # Only the changed files have all their nodes built, the rest just the nodes looked up while diffing.
+    changed_files = {os.path.basename(path) for diff_item in diff_index
+                     for path in (diff_item.a_path, diff_item.b_path) if path}
+
+    # Both sides are read from the commits without checking anything out.
+    # Files that are the same in both are only parsed once.
+    shared_trees = {}
     system_right = System(system_name,
                           settings={
                               SystemSettingsKeys.GAME_IMPORT_SPEC: GameImportSpecs.HERESY3E,
+                              SystemSettingsKeys.LAZY_NODES: True,
+                              SystemSettingsKeys.EAGER_FILES: changed_files,
                               "diff": True
                           },
+                          file_source=GitTreeSource(head_commit.tree, shared_trees),
                           )
 
-    # Now, check out the status on main so we can get information about those lines.
-    print(f"Checking out system at commit {merge_base}:")
-    repo.git.checkout(main_commit)
+    print(f"Reading system at commit {merge_base}:")
     system_left = System(system_name,
                          settings={
                              SystemSettingsKeys.GAME_IMPORT_SPEC: GameImportSpecs.HERESY3E,
+                             SystemSettingsKeys.LAZY_NODES: True,
+                             SystemSettingsKeys.EAGER_FILES: changed_files,
                              "diff": True
                          },
+                         file_source=GitTreeSource(main_commit.tree, shared_trees),
                          )
 
-    diff_index = main_commit.diff(head_commit)
-
-    system_diff = SystemDiff(system_left, system_right, diff_index)
+    system_diff = SystemDiff(system_left, system_right, diff_index, tree_diff=args.tree, workers=args.workers)
 
-    # Finally, composite all the lines into readable results.
-    output = f"As of {head_commit} at {datetime.datetime.now()}\n" + system_diff.get_pretty_diff()
-    if len(output) > 65536:
-        lines = output.count("\n")
-        truncated = output[:65400]
-        truncated_lines = truncated.count("\n")
-        truncated = f"Truncated due to length: {lines - truncated_lines} lines dropped\n" \
-                    + truncated + "\n```\nOriginal in test output"
-        print(output)
-        output = truncated
-    with open("diff_result.txt", mode='w') as file:
-        file.write(output)
-        print(f"Output written to {file.name}")
-    if original_head:
-        # Restore checkout to normal (for local testing)
-        print(f"Restoring checkout to {original_head}")
-        repo.git.checkout(original_head)
+    # Finally, composite all the lines into readable results, split into files that each fit in a comment.
+    pieces = [f"As of {head_commit} at {datetime.datetime.now()}\n"]
+    if args.summary:
+        pieces = itertools.chain(pieces, ChangeSummary(system_diff).iter_pretty_summary())
+    pieces = itertools.chain(pieces, system_diff.iter_pretty_diff())
+    for chunk_number, chunk in enumerate(chunk_pretty_diff(pieces, 65400)):
+        file_name = "diff_result.txt" if chunk_number == 0 else f"diff_result_{chunk_number + 1}.txt"
+        with open(file_name, mode='w') as file:
+            file.write(chunk)
+            print(f"Output written to {file.name}")
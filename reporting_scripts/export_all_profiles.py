@@ -1,6 +1,7 @@
 import json
 import sys
 
+from system.constants import SystemSettingsKeys
 from system.system import System
 
 if __name__ == '__main__':
@@ -11,12 +12,12 @@ if __name__ == '__main__':
     except IndexError:
         pass
 
-    system = System(system_name)
+    system = System(system_name, settings={SystemSettingsKeys.LAZY_NODES: True})  # Only reads some nodes
 
     json_export = {}
 
     json_export["Publications"] = []
-    for publication_node in system.nodes_with_ids.filter(lambda node: node.tag == 'publication'):
+    for publication_node in system.query(tag='publication'):
         json_export["Publications"].append({
             "Name": publication_node.name,
             "Builder ID": publication_node.id,
@@ -38,7 +39,7 @@ if __name__ == '__main__':
         })
 
     json_export["Profiles"] = []
-    for profile_node in system.nodes_with_ids.filter(lambda node: node.tag == 'profile'):
+    for profile_node in system.query(tag='profile'):
         characteristics = profile_node.get_profile_dict()
         profile_dict = {
             "Name": characteristics.pop('Name'),  # Pull name out of characteristics dict
@@ -52,7 +53,7 @@ if __name__ == '__main__':
         json_export["Profiles"].append(profile_dict)
 
     json_export["Rules"] = []
-    for rule_node in system.nodes_with_ids.filter(lambda node: node.tag == 'rule'):
+    for rule_node in system.query(tag='rule'):
         rule_dict = {
             "Name": rule_node.name,
             "Text": rule_node.get_rules_text(),
@@ -12,7 +12,7 @@ if __name__ == '__main__':
     # get a list of all LA
     legion_ids = []
     blackshields_id = None
-    legion_root = system.all_nodes.get(lambda x: x.id == "4a48-4935-246d-0c2e")
+    legion_root = system.get_node_by_id("4a48-4935-246d-0c2e")
     for legion_node in NodeCollection(legion_root.children).get(lambda x: x.tag == "selectionEntries").children:
         if legion_node.name == "Blackshields":
             blackshields_id = legion_node.id
@@ -27,8 +27,10 @@ if __name__ == '__main__':
     reference_blackshields = NodeCollection([])
     needs_review = NodeCollection([])
 
-    all_conditions_referencing_legions = system.all_nodes.filter(
-        lambda x: x.tag == "condition" and x.condition_search_id in legion_ids)
+    all_conditions_referencing_legions = NodeCollection([])
+    for legion_id in legion_ids:
+        all_conditions_referencing_legions += system.get_nodes_referencing(legion_id, ['childId']).filter(
+            lambda x: x.tag == "condition")
     print(f"There are {len(all_conditions_referencing_legions)} conditions referencing legion Ids")
     for condition in all_conditions_referencing_legions:
         modifier = condition.find_ancestor_with(lambda x: x.tag == "modifier")
@@ -9,7 +9,7 @@ if __name__ == '__main__':
                     )
     # get a list of all LA
     legion_ids = []
-    legion_root = system.all_nodes.get(lambda x: x.id == "4a48-4935-246d-0c2e")
+    legion_root = system.get_node_by_id("4a48-4935-246d-0c2e")
     all_nodes_with_linebreaks = system.all_nodes.filter(
         lambda x: x.text and x.text.strip() and "\n" in x.text.strip())
     for node in all_nodes_with_linebreaks:
@@ -0,0 +1,44 @@
+import sys
+import timeit
+
+from book_reader.pdf_text import get_pdf_text
+from util import text_utils
+from util.text_utils import get_col_dividers, get_section_heatmap, split_into_columns
+
+if __name__ == '__main__':
+    # Usage: heatmap_benchmark.py [book pdf or pdftotext output] [repeats]
+    # Times the column heatmaps on every page of the book, with and without numpy, and checks they agree.
+    book_path = sys.argv[1]
+    repeats = 5
+    try:
+        repeats = int(sys.argv[2])
+    except IndexError:
+        pass
+
+    text_path = book_path.replace('.pdf', '.txt')
+    pages = [page_text for page_text in get_pdf_text(book_path, text_path) if page_text.strip()]
+    numpy = text_utils.np
+    implementations = {'python': None}
+    if numpy is not None:
+        implementations['numpy'] = numpy
+    else:
+        print("numpy is not installed, timing the pure python version only")
+
+    results = {}
+    for name, module in implementations.items():
+        text_utils.np = module
+        heatmaps = [get_section_heatmap(page_text) for page_text in pages]
+        dividers = [get_col_dividers(list(heatmap)) for heatmap in heatmaps]
+        results[name] = (heatmaps, dividers)
+        heatmap_time = timeit.timeit(lambda: [get_section_heatmap(page_text) for page_text in pages],
+                                     number=repeats) / repeats
+        divider_time = timeit.timeit(lambda: [get_col_dividers(list(heatmap)) for heatmap in heatmaps],
+                                     number=repeats) / repeats
+        split_time = timeit.timeit(lambda: [split_into_columns(page_text) for page_text in pages],
+                                   number=repeats) / repeats
+        print(f"{name}: heatmaps {heatmap_time * 1000:.1f}ms, dividers {divider_time * 1000:.1f}ms,"
+              f" split_into_columns {split_time * 1000:.1f}ms for {len(pages)} pages")
+    text_utils.np = numpy
+
+    if len(results) > 1:
+        print("Same output" if results['python'] == results['numpy'] else "Different output")
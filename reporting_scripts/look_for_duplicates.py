@@ -3,7 +3,6 @@ import argparse
 from system.constants import SystemSettingsKeys, GameImportSpecs
 from system.node import Node
 from system.system import System
-from xml.etree import ElementTree as ET
 
 from util.element_util import get_description
 from util.log_util import print_styled, STYLES, get_diff, prompt_y_n
@@ -42,8 +41,7 @@ if __name__ == '__main__':
         rules_texts = {}
         hashes = {}
         for node in nodes:
-            inside_text = "".join([ET.tostring(child, encoding='unicode') for child in node._element])
-            fingerprint = hash(inside_text)
+            fingerprint = node.get_content_fingerprint()
             rules_text = None
             if node.tag == 'rule':
                 rules_text = node.get_rules_text()
@@ -122,9 +120,7 @@ if __name__ == '__main__':
                     style=STYLES.PURPLE)
 
                 # Update all nodes pointing to this node.
-                for link_node in system.nodes_with_ids.filter(lambda x: x.target_id == node.id):
-                    link_node.set_target_id(best_option.id)
-                    link_update_count += 1
+                link_update_count += system.replace_references(node.id, best_option.id, ['targetId'])
                 node.delete()
 
                 grandparent = node.parent.parent
@@ -15,6 +15,7 @@ if __name__ == '__main__':
     system = System('horus-heresy',
                     settings={
                         SystemSettingsKeys.GAME_IMPORT_SPEC: GameImportSpecs.HERESY2E,
+                        SystemSettingsKeys.LAZY_NODES: True,  # Only reads rules and profiles
                     },
                     )
 
@@ -27,7 +28,7 @@ if __name__ == '__main__':
         writer = csv.DictWriter(csvfile, fieldnames=["name", "page", "publication"])
         writer.writeheader()
 
-        for rule in system.nodes_with_ids.filter(lambda x: x.type == "rule"):
+        for rule in system.query(tag='rule'):
             if rule.name is None:
                 continue  # Not sure why there's some blanks here, maybe links are being counted?
             rule_as_dict = {
@@ -44,7 +45,7 @@ if __name__ == '__main__':
         writer = csv.DictWriter(csvfile, fieldnames=["name", "page", "publication"])
         writer.writeheader()
 
-        for rule in system.nodes_with_ids.filter(lambda x: x.type == f"profile:{system.game.WARGEAR_PROFILE_NAME}"):
+        for rule in system.query(tag='profile', type_name=system.game.WARGEAR_PROFILE_NAME):
             if rule.name is None:
                 continue  # Not sure why there's some blanks here, maybe links are being counted?
             rule_as_dict = {
@@ -63,7 +64,7 @@ if __name__ == '__main__':
                                             "node_id", "unit", "model", "file", "path", ])
         writer.writeheader()
 
-        for rule in system.nodes_with_ids.filter(lambda x: x.type == "profile:Weapon"):
+        for rule in system.query(tag='profile', type_name='Weapon'):
             if rule.name is None:
                 continue  # Not sure why there's some blanks here, maybe links are being counted?
             rule_as_dict = {
@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+import tracemalloc
+
+from settings import default_data_directory
+from system.constants import SystemSettingsKeys
+from system.system import System
+
+if __name__ == '__main__':
+    # Usage: node_memory_benchmark.py [system name] [data directory]
+    system_name = "horus-heresy-3rd-edition"
+    data_directory = default_data_directory
+    try:
+        system_name = sys.argv[1]
+        data_directory = sys.argv[2]
+    except IndexError:
+        pass
+
+    tracemalloc.start()
+    start = time.time()
+    system = System(system_name, data_directory, settings={SystemSettingsKeys.CACHE_DIRECTORY: None})
+    load_time = time.time() - start
+    after_load = tracemalloc.take_snapshot()
+    # Comments are parsed when first used, so also measure once every node's have been.
+    start = time.time()
+    for node in system.all_nodes:
+        node.template_id
+    comments_time = time.time() - start
+    after_comments = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    # Elements are allocated by the parser in ElementTree, Nodes and their indexes by the system package.
+    system_package = os.path.dirname(os.path.abspath(sys.modules[System.__module__].__file__))
+    node_count = len(system.all_nodes)
+    print(f"Loaded {node_count} nodes from {len(system.files)} files in {load_time:.2f}s (with tracemalloc)")
+    print(f"Read every node's comments in {comments_time:.2f}s")
+    for label, snapshot in [("After loading", after_load), ("After reading comments", after_comments)]:
+        tree_bytes = 0
+        node_bytes = 0
+        for stat in snapshot.statistics('filename'):
+            filename = stat.traceback[0].filename
+            if os.path.join('xml', 'etree') in filename:
+                tree_bytes += stat.size
+            elif filename.startswith(system_package):
+                node_bytes += stat.size
+        print(f"{label}:")
+        print(f"  Element tree: {tree_bytes / 2 ** 20:.1f} MB, {tree_bytes / node_count:.0f} bytes per node")
+        print(f"  Nodes and indexes: {node_bytes / 2 ** 20:.1f} MB, {node_bytes / node_count:.0f} bytes per node")
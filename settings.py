@@ -5,11 +5,17 @@ from util.generate_util import get_random_bs_id
 
 default_system = 'moreus-heresy'
 default_data_directory = os.getenv("DEFAULT_DATA_DIRECTORY", os.path.expanduser("~/BattleScribe/data/"))
+# Next to the data directory rather than in it, so the cache isn't picked up as a system.
+# Caching is opt-in: pass this, or another directory, as the cache_directory setting.
+default_cache_directory = os.getenv("DEFAULT_CACHE_DIRECTORY",
+                                    os.path.join(os.path.dirname(os.path.normpath(default_data_directory)),
+                                                 "bscopy_cache"))
 
 default_settings = {
     SystemSettingsKeys.SPECIAL_RULE_TYPE: SpecialRulesType.RULE,
     SystemSettingsKeys.WEAPON_AS_DESCRIPTION: False,
-    SystemSettingsKeys.GAME_IMPORT_SPEC: GameImportSpecs.HERESY2E
+    SystemSettingsKeys.GAME_IMPORT_SPEC: GameImportSpecs.HERESY2E,
+    SystemSettingsKeys.CACHE_DIRECTORY: None,
 }
 
 name_synonyms = {
@@ -4,6 +4,11 @@ class SystemSettingsKeys:
     SPECIAL_RULE_TYPE = "special_rule_type"
     WEAPON_AS_DESCRIPTION = "WEAPON_AS_DESCRIPTION"
     GAME_IMPORT_SPEC = "GAME_IMPORT_SPEC"
+    LOAD_WORKERS = "load_workers"  # Processes used to parse files when loading a system, 0 or 1 to load serially
+    SAVE_WORKERS = "save_workers"  # Processes used to write files when saving a system, 0 or 1 to save serially
+    CACHE_DIRECTORY = "cache_directory"  # Where parsed files are cached between runs, None to not cache
+    LAZY_NODES = "lazy_nodes"  # Only build nodes as they're looked up or traversed, for scripts that read a little
+    EAGER_FILES = "eager_files"  # With lazy_nodes, names of files to still build every node of, such as those diffed
 
 
 class SpecialRulesType:
@@ -15,3 +20,13 @@ class GameImportSpecs:
     OLDWORLD = 'OLDWORLD'
     HERESY2E = 'HERESY2e'
     HERESY3E = 'HERESY3e'
+
+
+# Attributes that may hold the id of another node
+REFERENCE_ATTRIBUTES = ['targetId', 'childId', 'scope', 'field', 'value']
+
+# Attributes nodes_with_ids is indexed by
+INDEXED_ATTRIBUTES = ['id', 'name', 'type', 'typeName']
+
+# Attributes the System's name indexes (rules_by_name etc.) depend on
+NAME_INDEXED_ATTRIBUTES = ['id', 'name', 'collective']
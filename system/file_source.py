@@ -0,0 +1,81 @@
+import hashlib
+import io
+import os
+from abc import ABC, abstractmethod
+from xml.etree import ElementTree as ET
+
+from system.line_numbering_parser import read_line_numbers
+from system.tree_cache import flatten_tree, rebuild_tree
+
+SYSTEM_FILE_EXTENSIONS = ['.cat', '.gst']
+
+
+class FileSource(ABC):
+    """
+    Where a System reads its files from other than its directory, such as a git tree, by file name.
+    Parsed files are kept flattened by name and content in shared_trees, so Systems given sources sharing the same
+    dict only parse each distinct version of a file once. Each System still gets its own tree rebuilt from that,
+    as loading and editing nodes changes the tree.
+    """
+
+    def __init__(self, shared_trees: dict[tuple[str, str], tuple[list[tuple], list or None]] = None):
+        # (file name, content id): (flattened tree, line numbers of its elements in document order, if read yet)
+        # By name too, so two files with the same content in one System aren't confused.
+        self.shared_trees = {} if shared_trees is None else shared_trees
+
+    @abstractmethod
+    def get_file_names(self) -> list[str]:
+        pass
+
+    @abstractmethod
+    def read(self, file_name: str) -> bytes:
+        pass
+
+    def get_content_id(self, file_name: str) -> str:
+        """
+        Identifies the content of a file, so versions of a file with the same content are only parsed once.
+        """
+        return hashlib.sha1(self.read(file_name)).hexdigest()
+
+    def get_tree(self, file_name: str) -> ET.ElementTree:
+        """
+        A new tree of the file each time, rebuilt from the flattened tree if this version was already parsed.
+        """
+        key = (file_name, self.get_content_id(file_name))
+        if key not in self.shared_trees:
+            tree = ET.parse(io.BytesIO(self.read(file_name)))
+            self.shared_trees[key] = (flatten_tree(tree.getroot()), None)
+        return rebuild_tree(self.shared_trees[key][0])
+
+    def get_line_numbers(self, file_name: str) -> list[tuple[int, int]]:
+        """
+        (start, end) line numbers of each element of the file, in document order, to zip with the elements of a tree
+        from get_tree before any nodes modify it.
+        """
+        key = (file_name, self.get_content_id(file_name))
+        flat_elements, line_numbers = self.shared_trees[key]
+        if line_numbers is None:
+            line_numbers = read_line_numbers(self.read(file_name))
+            self.shared_trees[key] = (flat_elements, line_numbers)
+        return line_numbers
+
+
+class GitTreeSource(FileSource):
+    """
+    The .cat and .gst files at the top of a git tree, such as commit.tree from GitPython,
+    read from the repository's objects without checking anything out.
+    """
+
+    def __init__(self, tree, shared_trees: dict[tuple[str, str], tuple[list[tuple], list or None]] = None):
+        super().__init__(shared_trees)
+        self.blobs = {blob.name: blob for blob in tree.blobs
+                      if os.path.splitext(blob.name)[1] in SYSTEM_FILE_EXTENSIONS}
+
+    def get_file_names(self) -> list[str]:
+        return list(self.blobs.keys())
+
+    def read(self, file_name: str) -> bytes:
+        return self.blobs[file_name].data_stream.read()
+
+    def get_content_id(self, file_name: str) -> str:
+        return self.blobs[file_name].hexsha  # Already a hash of the content, so the blob isn't read
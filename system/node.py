@@ -1,10 +1,13 @@
 import collections
+import hashlib
+from itertools import repeat
 from typing import Callable
 from typing import TYPE_CHECKING
 from xml.etree import ElementTree as ET
 
 from book_reader.raw_entry import RawProfile, RawModel, RawUnit
-from system.constants import SystemSettingsKeys, SpecialRulesType
+from system.constants import SystemSettingsKeys, SpecialRulesType, REFERENCE_ATTRIBUTES, INDEXED_ATTRIBUTES, \
+    NAME_INDEXED_ATTRIBUTES
 from system.game.heresy3e import Heresy3e
 from util.element_util import get_tag, get_or_create_sub_element, get_sub_element
 from util.generate_util import find_comment_value
@@ -14,47 +17,74 @@ if TYPE_CHECKING:
     from system.system_file import SystemFile
 
 bsc_error_label = "warning: !BSC "  # Trailing space will be followed by timestamp
+old_bsc_error_label = "!BSC Errors from "  # Migrated to bsc_error_label as errors are rewritten
+NO_COMMENTS = ("", "", "", "", "")
+
+
+def split_previous_errors(comment_text: str) -> tuple[str, str, str]:
+    """
+    Split a comment into the comments BSCopy didn't add, and the errors it added in a previous run and their timestamp.
+    :return: (non_error_comments, previous_errors, previous_errors_timestamp)
+    """
+    for label in (bsc_error_label, old_bsc_error_label):
+        if label in comment_text:
+            non_error_comments = comment_text.split(label)[0]
+            previous_errors_timestamp = comment_text.split(label)[1].split()[0]  # newline or space
+            previous_errors = comment_text.split(label + previous_errors_timestamp)[1]
+            return non_error_comments, previous_errors, previous_errors_timestamp
+    return comment_text, "", ""
 
 
 class Node:
+    # A full system is hundreds of thousands of nodes, so only what's needed for indexing and navigation is stored,
+    # anything else is read from the element when used.
+    __slots__ = ['_element', 'system_file', 'parent', '_children', 'tag', 'id', 'name', 'target_id', 'type_name',
+                 'shared', 'is_root_node', 'is_base_level', '_comments', '_subtree_hashes']
 
     def __init__(self, system_file: 'SystemFile', element: ET.Element, parent: 'Node' = None, is_root_node=False):
+        """
+        Create the node for element along with nodes for everything under it,
+        or in lazy mode just the node, with children built when first used.
+        """
+        self._set_up(system_file, element, get_tag(element), parent, is_root_node)
+        if self.system_file.lazy:
+            self.system_file.register_built_nodes([self])
+        else:
+            self.system_file.register_built_nodes(self._build_descendants())
+
+    @classmethod
+    def build_unregistered(cls, system_file: 'SystemFile', element: ET.Element, tag: str, parent: 'Node' or None,
+                           is_root_node: bool = False) -> 'Node':
+        """
+        Create a node without its children and without adding it to any collections,
+        for building many nodes then adding them all with SystemFile.register_built_nodes.
+        :param tag: The element's tag without the namespace
+        """
+        node = cls.__new__(cls)
+        node._set_up(system_file, element, tag, parent, is_root_node)
+        return node
+
+    def _set_up(self, system_file: 'SystemFile', element: ET.Element, tag: str, parent: 'Node' or None,
+                is_root_node: bool):
+        """
+        Set the fields of a node without building its children or adding it to any collections.
+        """
+        attrib = element.attrib
         self._element = element
+        self.tag = tag  # Without the namespace
+        self.id = attrib.get('id')
+        self.target_id = attrib.get('targetId')
+        self.type_name = attrib.get('typeName', attrib.get('type'))  # typeName on profiles, type on SEs
         self.name = None
-        self.id = element.attrib.get('id')
-        self.target_id = element.attrib.get('targetId')
-        self.condition_search_id = element.attrib.get("childId")  # Conditions use childID instead of targetId
-        self.tag = element.tag
-        if "}" in self.tag:
-            self.tag = self.tag.split('}')[1]  # If we don't have the prefix set, tag will have the verbose namespace.
-        self.type_name = element.attrib.get('typeName', element.attrib.get('type'))  # typeName on profiles, type on SEs
-
-        self.pub = self.attrib.get('publicationId')
-        self.page = self.attrib.get('page')
+        if not self.is_link():
+            self.name = attrib.get('name')
 
         self.system_file = system_file
-        self.system_file.all_nodes.append(self)
-        self.system_file.system.all_nodes.append(self)
-
-        self.value = element.attrib.get('value')
-        self.field = element.attrib.get('field')
-        self.condition_scope = element.attrib.get('scope')
-        self.condition_percentValue = element.attrib.get('percentValue')
-        self.includeChildSelections = element.attrib.get('includeChildSelections')
-        self.includeChildForces = element.attrib.get('includeChildForces')
-
-        self.start_line_number = None
-        self.end_line_number = None
-        if self.system.settings.get("diff"):
-            self.start_line_number = element._start_line_number
-            self.end_line_number = element._end_line_number
-
-        if self.id:
-            self.system_file.nodes_with_ids.append(self)
-            self.system_file.system.nodes_with_ids.append(self)
-
-        if not self.is_link():
-            self.name = element.attrib.get('name')
+        self._children = None if system_file.lazy else []
+        # (non_error_comments, previous_errors, previous_errors_timestamp, bscopy_node_id, template_id),
+        # read from the comment when first used, see _get_comments.
+        self._comments = None
+        self._subtree_hashes = None  # {(ignore_ids, ignore_comments, ignore_whitespace): hash}, see get_subtree_hash
 
         self.parent = parent
         self.shared = False
@@ -62,35 +92,46 @@ class Node:
         self.is_base_level = False  # mostly for root selection entries
         if self.parent is not None:
             self.parent.children.append(self)
-            parent_tag = self.parent.tag
-            if "}" in parent_tag:
-                parent_tag = parent_tag.split('}')[1]
-            self.shared = parent_tag.startswith('shared')
-            if self.parent and self.parent.parent:
+            self.shared = self.parent.tag.startswith('shared')
+            if self.parent.parent:
                 # self.parent.parent as the parent would be "selectionEntries"
                 self.is_base_level = self.parent.parent.is_root_node
 
-        self.collective = (self.attrib.get("collective") == "true")
-
-        self.children = []
-        for child in element:
-            Node(system_file, child, parent=self)
-            # Each node will add itself to self.children with the parent check above.
+    def _build_descendants(self) -> list['Node']:
+        """
+        Create nodes for everything under this node's element, with a stack rather than recursion
+        so deeply nested modifiers and conditions can't hit the recursion limit.
+        :return: This node and all the created nodes, in document order
+        """
+        nodes = [self]
+        stripped_tags = {}  # Only a few dozen distinct tags, so strip each namespace once.
+        stack = list(zip(reversed(self._element), repeat(self)))
+        while stack:
+            element, parent = stack.pop()
+            tag = stripped_tags.get(element.tag)
+            if tag is None:
+                tag = stripped_tags[element.tag] = get_tag(element)
+            node = Node.build_unregistered(self.system_file, element, tag, parent)
+            nodes.append(node)
+            if len(element):
+                stack.extend(zip(reversed(element), repeat(node)))
+        return nodes
 
-        self.non_error_comments = ""
-        self.previous_errors = ""
-        self.previous_errors_timestamp = ""
-        self.clean_previous_errors()
+    @property
+    def children(self) -> list['Node']:
+        if self._children is None:
+            self._build_children()
+        return self._children
 
-        # Certain nodes that didn't generally get ids, namely modifiers and conditions,
-        # were given ids by BSCopy to make them easier to find.
-        self.bscopy_node_id = ""
-        if "node_id_" in self.non_error_comments:
-            self.bscopy_node_id = find_comment_value(self._element,
-                                                     node_id=True)  # old code, it's "node" is an element.
-        self.template_id = ""
-        if "template_id_" in self.non_error_comments:
-            self.template_id = find_comment_value(self._element)  # old code, it's "node" is an element.
+    def _build_children(self):
+        """
+        In lazy mode, build the nodes for this node's child elements, but not anything under them.
+        """
+        self._children = []
+        nodes = []
+        for element in self._element:
+            nodes.append(Node.build_unregistered(self.system_file, element, get_tag(element), self))
+        self.system_file.register_built_nodes(nodes)
 
     @property
     def attrib(self) -> dict:
@@ -99,9 +140,121 @@ class Node:
     @attrib.setter
     def attrib(self, value: dict):
         self._element.attrib = value
+        self._mark_changed()
+
+    @property
+    def condition_search_id(self) -> str or None:
+        return self.attrib.get("childId")  # Conditions use childID instead of targetId
+
+    @property
+    def pub(self) -> str or None:
+        return self.attrib.get('publicationId')
+
+    @property
+    def page(self) -> str or None:
+        return self.attrib.get('page')
+
+    @property
+    def value(self) -> str or None:
+        return self.attrib.get('value')
+
+    @property
+    def field(self) -> str or None:
+        return self.attrib.get('field')
+
+    @property
+    def condition_scope(self) -> str or None:
+        return self.attrib.get('scope')
+
+    @property
+    def condition_percentValue(self) -> str or None:
+        return self.attrib.get('percentValue')
+
+    @property
+    def includeChildSelections(self) -> str or None:
+        return self.attrib.get('includeChildSelections')
+
+    @property
+    def includeChildForces(self) -> str or None:
+        return self.attrib.get('includeChildForces')
+
+    @property
+    def collective(self) -> bool:
+        return self.attrib.get("collective") == "true"
+
+    @property
+    def start_line_number(self) -> int or None:
+        # Only read in diff mode, and None for nodes created since loading.
+        line_numbers = self.system_file.line_numbers.get(self._element)
+        return line_numbers[0] if line_numbers else None
+
+    @property
+    def end_line_number(self) -> int or None:
+        line_numbers = self.system_file.line_numbers.get(self._element)
+        return line_numbers[1] if line_numbers else None
+
+    @property
+    def non_error_comments(self) -> str:
+        return self._get_comments()[0]
+
+    @property
+    def previous_errors(self) -> str:
+        return self._get_comments()[1]
+
+    @property
+    def previous_errors_timestamp(self) -> str:
+        return self._get_comments()[2]
+
+    @property
+    def bscopy_node_id(self) -> str:
+        """
+        Certain nodes that didn't generally get ids, namely modifiers and conditions,
+        were given ids by BSCopy to make them easier to find.
+        """
+        return self._get_comments()[3]
+
+    @property
+    def template_id(self) -> str:
+        return self._get_comments()[4]
+
+    def _get_comments(self) -> tuple[str, str, str, str, str]:
+        """
+        Parse the comment the first time any of the fields from it is used, as most nodes have none and most scripts
+        never ask. Anything changing the comment reads it first, so the previous errors are those from the file.
+        """
+        if self._comments is None:
+            comment_element = self._get_comment_element()
+            if comment_element is None or not comment_element.text:
+                self._comments = NO_COMMENTS
+                return self._comments
+            non_error_comments, previous_errors, previous_errors_timestamp = \
+                split_previous_errors(comment_element.text)
+            bscopy_node_id = ""
+            if "node_id_" in non_error_comments:
+                bscopy_node_id = find_comment_value(self._element, node_id=True)  # old code, it's "node" is an element.
+            template_id = ""
+            if "template_id_" in non_error_comments:
+                template_id = find_comment_value(self._element)  # old code, it's "node" is an element.
+            self._comments = (non_error_comments, previous_errors, previous_errors_timestamp, bscopy_node_id,
+                              template_id)
+        return self._comments
 
     def update_attributes(self, attrib: {}):
+        is_in_tree = self.is_in_tree  # Deleted nodes are no longer indexed, so leave them out.
+        updates_references = any(attr in REFERENCE_ATTRIBUTES for attr in attrib) and is_in_tree
+        if updates_references:
+            self.system.references.remove(self)
+        had_id = bool(self.id)
+        updates_indexes = any(attr in INDEXED_ATTRIBUTES for attr in attrib) and is_in_tree
+        if updates_indexes and had_id:
+            self.system_file.nodes_with_ids.unindex(self)
+            self.system.nodes_with_ids.unindex(self)
+        updates_names = any(attr in NAME_INDEXED_ATTRIBUTES for attr in attrib) and is_in_tree
+        if updates_names:
+            self.system.remove_from_name_indexes(self)
         for attr, value in attrib.items():
+            if attr == "id":
+                self.id = value
             if attr == "targetId":
                 self.target_id = value
             if attr == "name":
@@ -114,6 +267,14 @@ class Node:
             if type(value) == bool:
                 attrib[attr] = str(value).lower()
         self.attrib.update(attrib)
+        self._mark_changed()
+        if updates_indexes:
+            self.system_file.nodes_with_ids.update_node(self, had_id)
+            self.system.nodes_with_ids.update_node(self, had_id)
+        if updates_references:
+            self.system.references.add(self)
+        if updates_names:
+            self.system.add_to_name_indexes([self])
 
     def update_pub_and_page(self, page: 'Page'):
         existing_pub_id = self.attrib.get('publicationId')
@@ -128,8 +289,6 @@ class Node:
             'page': page.page_number,
             'publicationId': page.book.pub_id
         })
-        self.page = page.page_number
-        self.pub = page.book.pub_id
 
     @property
     def text(self):
@@ -138,6 +297,7 @@ class Node:
     @text.setter
     def text(self, value):
         self._element.text = value
+        self._mark_changed()
 
     @property
     def system(self) -> 'System':
@@ -202,7 +362,7 @@ class Node:
     @property
     def target(self):
         target_id = self.target_id if self.target_id is not None else self.condition_search_id
-        return self.system.nodes_with_ids.get(lambda x: x.id == target_id)
+        return self.system.get_node_by_id(target_id)
 
     @property
     def parent_name(self):
@@ -273,17 +433,98 @@ class Node:
     def is_link(self):
         return self.target_id is not None
 
+    def get_subtree_hash(self, ignore_ids: bool = False, ignore_comments: bool = False,
+                         ignore_whitespace: bool = False) -> str:
+        """
+        Hash of this node and everything under it, built bottom up from the hashes of its children and cached,
+        so comparing two subtrees is a string comparison once they've been hashed.
+        Attribute order and indentation never change the hash. Caches are dropped up the ancestor path when
+        a node is changed through Node methods, but not if its element is edited directly.
+        :param ignore_ids: Leave out id attributes, so copies with generated ids match.
+        :param ignore_comments: Leave out comment children, where BSCopy keeps node ids, template ids and errors.
+        :param ignore_whitespace: Collapse whitespace in text.
+        """
+        options = (ignore_ids, ignore_comments, ignore_whitespace)
+        if self._subtree_hashes is not None and options in self._subtree_hashes:
+            return self._subtree_hashes[options]
+        # Children before parents, with a stack so deeply nested modifiers can't hit the recursion limit.
+        stack = [(self, False)]
+        while stack:
+            node, children_hashed = stack.pop()
+            if node._subtree_hashes is not None and options in node._subtree_hashes:
+                continue
+            if not children_hashed:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children)
+                continue
+            subtree_hash = hashlib.sha1(node._get_own_content(options).encode('utf-8'))
+            for child in node.children:
+                if not (ignore_comments and child.tag == 'comment'):
+                    subtree_hash.update(child._subtree_hashes[options].encode('utf-8'))
+            if node._subtree_hashes is None:
+                node._subtree_hashes = {}
+            node._subtree_hashes[options] = subtree_hash.hexdigest()
+        return self._subtree_hashes[options]
+
+    def _get_own_content(self, options: tuple[bool, bool, bool]) -> str:
+        ignore_ids, _, ignore_whitespace = options
+        element = self._element
+        attributes = sorted(element.attrib.items())
+        if ignore_ids:
+            attributes = [(key, value) for key, value in attributes if key != 'id']
+        text = element.text
+        tail = element.tail
+        if ignore_whitespace:
+            text = " ".join(text.split()) if text else None
+            tail = " ".join(tail.split()) if tail else None
+        # Whitespace only text is just indentation
+        text = text if text and text.strip() else None
+        tail = tail if tail and tail.strip() else None
+        return repr((self.tag, attributes, text, tail))
+
+    def get_content_fingerprint(self, ignore_ids: bool = False, ignore_comments: bool = False,
+                                ignore_whitespace: bool = False) -> str:
+        """
+        Hash of everything inside this node, from the subtree hashes of its children,
+        but not this node's own attributes, so copies of the same entry in different places match.
+        Options are as for get_subtree_hash.
+        """
+        content_hash = hashlib.sha1()
+        for child in self.children:
+            if not (ignore_comments and child.tag == 'comment'):
+                content_hash.update(child.get_subtree_hash(ignore_ids, ignore_comments,
+                                                           ignore_whitespace).encode('utf-8'))
+        return content_hash.hexdigest()
+
+    def _mark_changed(self):
+        """
+        Mark this node's file as needing saving, and drop the cached subtree hashes of this node and its ancestors.
+        A node's ancestors only have hashes cached if it does, so this can stop at the first node without.
+        """
+        self.system_file.dirty = True
+        node = self
+        while node is not None and node._subtree_hashes is not None:
+            node._subtree_hashes = None
+            node = node.parent
+
     def set_target_id(self, new_target_id):
+        self.system.references.remove(self)
         self.target_id = new_target_id
         self._element.attrib['targetId'] = new_target_id
+        self._mark_changed()
+        if self.is_in_tree:
+            self.system.references.add(self)
 
     def remove(self, child: 'Node'):
         if child.parent != self:
             raise Exception("Cannot remove a node from something that's not it's parent")
         child.parent = None
         self._element.remove(child._element)  # Remove from XML
+        self._mark_changed()
         self.children.remove(child)  # Remove from list of children in the python view
         # The node is still likely in all nodes list. Do we want this (for copying?)
+        # It should not be found by id or reference lookups anymore though.
+        child.unregister_from_indexes()
         if len(self.children) == 0:
             self.parent.remove(self)
 
@@ -291,10 +532,59 @@ class Node:
         self.parent.remove(self)
 
     def move_node_to_here(self, moving_node: 'Node'):
+        children = self.children  # In lazy mode, build the existing children before the new element is added.
         self._element.append(moving_node._element)  # Copy the xml element
         moving_node.delete()  # Delete the xml element,
         moving_node.parent = self
-        self.children.append(moving_node)
+        children.append(moving_node)
+        self._mark_changed()  # The file it was moved from is marked by delete
+        for node in moving_node.iter_subtree():
+            node.system_file = self.system_file  # In case we moved it from another file.
+        moving_node.register_in_indexes()
+
+    def iter_subtree(self):
+        """
+        Iterate over this node and all of its descendants in document order.
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def register_in_indexes(self):
+        """
+        Add this node and its descendants to the id indexes of their file and the system,
+        and to the system's reference and name indexes.
+        """
+        for node in self.iter_subtree():
+            if node.id:
+                node.system_file.nodes_with_ids.append(node)
+                node.system.nodes_with_ids.append(node)
+            node.system.references.add(node)
+            node.system.add_to_name_indexes([node])
+
+    def unregister_from_indexes(self):
+        """
+        Remove this node and its descendants from the id indexes of their file and the system,
+        and from the system's reference and name indexes.
+        """
+        for node in self.iter_subtree():
+            if node.id:
+                node.system_file.nodes_with_ids.discard(node)
+                node.system.nodes_with_ids.discard(node)
+            node.system.references.remove(node)
+            node.system.remove_from_name_indexes(node)
+
+    @property
+    def is_in_tree(self) -> bool:
+        """
+        Whether this node is still in its file, rather than deleted or under a deleted node.
+        """
+        node = self
+        while node.parent is not None:
+            node = node.parent
+        return node.is_root_node
 
     def find_ancestor_with(self, condition_function: Callable[['Node'], bool]):
         if not self.parent:
@@ -335,7 +625,7 @@ class Node:
     def is_wargear_link(self):
         if not self.is_link():
             return False
-        return self.system.nodes_with_ids.get(lambda x: x.id == self.target_id).is_wargear_se
+        return self.system.get_node_by_id(self.target_id).is_wargear_se
 
     @property
     def is_wargear_se(self):
@@ -369,14 +659,16 @@ class Node:
             for attr, value in attrib.items():
                 attrib[attr] = str(value)  # All values must be strings to serialize properly.
 
+        children = self.children  # In lazy mode, build the existing children before a new element is added.
         et_element, created = get_or_create_sub_element(self._element, tag, attrib)
         if created:
             if defaults:
                 et_element.attrib.update(defaults)
+            self._mark_changed()
             return Node(self.system_file, et_element, self)
 
         # Not created so we should have an existing node
-        for child in self.children:
+        for child in children:
             if child._element == et_element:
                 return child
         raise Exception(f"While looking for {tag}, we expected {et_element.tag}"
@@ -409,6 +701,9 @@ class Node:
         element = self.get_rules_text_element()
         if element is not None:
             element.text = text
+            self._mark_changed()
+            for node in self.iter_subtree():  # The element is a descendant, so its node's hashes need dropping too
+                node._subtree_hashes = None
 
     def get_profile_node(self, type_name=None) -> 'Node':
         """
@@ -423,7 +718,7 @@ class Node:
             profile_link = links.get_child('infoLink', {"type": "profile"})
             if profile_link is None:
                 return
-            return self.system.nodes_with_ids.get(lambda x: x.id == profile_link.target_id)
+            return self.system.get_node_by_id(profile_link.target_id)
         if type_name:
             return profiles.get_child('profile', attrib={'typeName': type_name})
         return profiles.get_child('profile')
@@ -450,7 +745,7 @@ class Node:
         return categories
 
     def set_profile_characteristics(self, raw_profile: RawProfile, profile_type):
-        self._element.attrib['name'] = raw_profile.name
+        self.update_attributes({'name': raw_profile.name})
         existing_characteristics = []
         # Set existing characteristic fields
         stats = raw_profile.stats
@@ -776,34 +1071,43 @@ class Node:
         comment_node.text = text
 
     def clean_previous_errors(self):
-        comment_node = self.get_child('comment')
-        if comment_node is None:
-            return
-        if comment_node.text is None or comment_node.text == "":
-            comment_node.delete()
+        """
+        Remove the errors from the previous run from this node's comment, deleting the comment if that leaves it empty.
+        Done when saving, see SystemFile.clean_previous_errors, so loading doesn't have to look at every comment.
+        """
+        comment_element = self._get_comment_element()
+        if comment_element is None:
             return
-        if bsc_error_label in comment_node.text:
-            self.non_error_comments = comment_node.text.split(bsc_error_label)[0]
-            self.previous_errors_timestamp = comment_node.text.split(bsc_error_label)[1].split()[0]  # newline or space
-            self.previous_errors = comment_node.text.split(bsc_error_label + self.previous_errors_timestamp)[1]
-        elif "!BSC Errors from " in comment_node.text:
-            self.non_error_comments = comment_node.text.split("!BSC Errors from ")[0]
-            self.previous_errors_timestamp = comment_node.text.split("!BSC Errors from ")[1].split()[
-                0]  # newline or space
-            self.previous_errors = comment_node.text.split("!BSC Errors from " + self.previous_errors_timestamp)[1]
-        else:
-            self.non_error_comments = comment_node.text
-            return  # Don't delete the comment node we just created and are populating
-
-        comment_node.text = self.non_error_comments
+        self._get_comments()  # Before the errors are removed, so previous_errors still has them
+        if comment_element.text:
+            non_error_comments = split_previous_errors(comment_element.text)[0]
+            if non_error_comments != comment_element.text:
+                comment_element.text = non_error_comments
+                self._mark_changed()
+        if comment_element.text is None or comment_element.text == "":
+            self._delete_child_element(comment_element)
+
+    def _get_comment_element(self) -> ET.Element or None:
+        """
+        Same as get_child('comment'), without searching the element or building children in lazy mode.
+        """
+        if self._children is not None:
+            comment_node = next((child for child in self._children if child.tag == 'comment'), None)
+            return None if comment_node is None else comment_node._element
+        return next((element for element in self._element if get_tag(element) == 'comment'), None)
 
-        if comment_node.text is None or comment_node.text == "":
-            comment_node.delete()
+    def _delete_child_element(self, element: ET.Element):
+        next(child for child in self.children if child._element is element).delete()
 
     def append_error_comment(self, error_text, heading_for_system_errors=None):
         if heading_for_system_errors is not None:
             self.system.errors.append(heading_for_system_errors + ": " + error_text)
+        self._get_comments()  # Before the comment changes, so previous_errors are those from the file
         comment_node = self.get_or_create_child('comment')
+        if comment_node._element not in self.system.new_error_comments:
+            # Errors from the previous run are replaced rather than added to.
+            comment_node.text = self.non_error_comments
+            self.system.new_error_comments.add(comment_node._element)
 
         if comment_node.text is None:
             comment_node.text = ""
@@ -814,9 +1118,9 @@ class Node:
             existing_timestamp = comment_node.text.split(bsc_error_label)[1].split()[0]  # newline or space
             existing_errors_text = comment_node.text.split(bsc_error_label + existing_timestamp)[1]
             new_errors_text = existing_errors_text + new_errors_text
-        elif "!BSC Errors from " in comment_node.text:  # Migration from old label
-            existing_timestamp = comment_node.text.split("!BSC Errors from ")[1].split()[0]  # newline
-            existing_errors_text = comment_node.text.split("!BSC Errors from " + existing_timestamp)[1]
+        elif old_bsc_error_label in comment_node.text:  # Migration from old label
+            existing_timestamp = comment_node.text.split(old_bsc_error_label)[1].split()[0]  # newline
+            existing_errors_text = comment_node.text.split(old_bsc_error_label + existing_timestamp)[1]
             new_errors_text = existing_errors_text + new_errors_text
 
         timestamp_to_use = self.system.run_timestamp
@@ -1,6 +1,9 @@
+import bisect
 import collections
-from typing import Callable
+import itertools
+from typing import Callable, Iterable
 
+from system.constants import REFERENCE_ATTRIBUTES
 from system.node import Node
 
 
@@ -16,3 +19,312 @@ class NodeCollection(collections.UserList):
 
     def get(self, sort_condition: Callable[[Node], bool]) -> 'Node' or None:
         return next(filter(sort_condition, self.data), None)
+
+
+class IndexedNodeCollection(NodeCollection):
+    """
+    A collection of nodes with ids, that also hashes its nodes by id so id lookups don't have to scan every node.
+    Nodes should only be added or removed through append, extend, remove or discard to keep the index correct.
+    Before changing an indexed value of a node, call unindex, then update_node afterwards.
+    """
+
+    def __init__(self, nodes: Iterable[Node] = ()):
+        super().__init__([])
+        self._by_id: dict[str, list[Node]] = {}
+        self.extend(nodes)
+
+    @property
+    def data(self) -> list[Node]:
+        """
+        The nodes in the order they were added. Membership is kept in a dict so removing a node doesn't scan the list,
+        which is rebuilt from it on the first read after any removals.
+        """
+        if self._data is None:
+            self._data = list(self._members)
+        return self._data
+
+    @data.setter
+    def data(self, nodes: list[Node]):
+        self._members: dict[Node, None] = dict.fromkeys(nodes)
+        self._data: list[Node] or None = None
+
+    def append(self, node: Node) -> None:
+        self._members[node] = None
+        if self._data is not None:
+            self._data.append(node)
+        self.index(node)
+
+    def extend(self, nodes: Iterable[Node]) -> None:
+        for node in nodes:
+            self.append(node)
+
+    def remove(self, node: Node) -> None:
+        self._remove_member(node)
+        self.unindex(node)
+
+    def _remove_member(self, node: Node) -> None:
+        del self._members[node]
+        self._data = None
+
+    def __contains__(self, node: Node) -> bool:
+        return node in self._members
+
+    def discard(self, node: Node) -> None:
+        """
+        Remove the node if it's in this collection, used when a node may have already been removed.
+        """
+        if node in self:
+            self.remove(node)
+
+    def update_node(self, node: Node, had_id: bool) -> None:
+        """
+        Re-index a node after unindex and changing its values, adding or removing it if it gained or lost its id.
+        """
+        if not had_id:
+            if node.id:
+                self.append(node)
+            return
+        if not node.id:
+            self._remove_member(node)
+            return
+        self.index(node)
+
+    def index(self, node: Node) -> None:
+        if node.id:
+            self._by_id.setdefault(node.id, []).append(node)
+
+    def unindex(self, node: Node) -> None:
+        if not node.id:
+            return
+        nodes = self._by_id[node.id]
+        nodes.remove(node)
+        if not nodes:
+            del self._by_id[node.id]
+
+    def get_by_id(self, node_id: str) -> 'Node' or None:
+        nodes = self._by_id.get(node_id)
+        if nodes:
+            return nodes[0]
+        return None
+
+    def get_all_by_id(self, node_id: str) -> NodeCollection:
+        return NodeCollection(list(self._by_id.get(node_id, [])))
+
+    def get_duplicate_ids(self) -> dict[str, NodeCollection]:
+        return {node_id: NodeCollection(list(nodes)) for node_id, nodes in self._by_id.items() if len(nodes) > 1}
+
+
+class QueryableNodeCollection(IndexedNodeCollection):
+    """
+    An IndexedNodeCollection that also buckets nodes by tag, type_name and lower case name,
+    so common queries only look at the nodes in the smallest matching bucket.
+    Buckets are dicts used as ordered sets. A node changed since it was added is re-added at the end of its buckets,
+    so results are sorted by when each node was added, the order filter gives.
+    """
+
+    def __init__(self, nodes: Iterable[Node] = ()):
+        self._by_tag: dict[str, dict[Node, None]] = {}
+        self._by_type_name: dict[str, dict[Node, None]] = {}
+        self._by_name: dict[str, dict[Node, None]] = {}
+        self._positions: dict[Node, int] = {}  # When each node was added, which updates don't change
+        self._next_position = itertools.count()
+        super().__init__(nodes)
+
+    def append(self, node: Node) -> None:
+        self._positions[node] = next(self._next_position)
+        super().append(node)
+
+    def remove(self, node: Node) -> None:
+        super().remove(node)
+        del self._positions[node]
+
+    def update_node(self, node: Node, had_id: bool) -> None:
+        super().update_node(node, had_id)
+        if had_id and not node.id:
+            del self._positions[node]  # Removed from the collection
+
+    def index(self, node: Node) -> None:
+        super().index(node)
+        for bucket_key, buckets in self._get_bucket_keys(node):
+            buckets.setdefault(bucket_key, {})[node] = None
+
+    def unindex(self, node: Node) -> None:
+        super().unindex(node)
+        for bucket_key, buckets in self._get_bucket_keys(node):
+            bucket = buckets.get(bucket_key, {})
+            bucket.pop(node, None)
+            if not bucket:
+                buckets.pop(bucket_key, None)
+
+    def _get_bucket_keys(self, node: Node) -> list[tuple[str, dict]]:
+        keys = [(node.tag, self._by_tag)]
+        if node.type_name:
+            keys.append((node.type_name, self._by_type_name))
+        if node.name:
+            keys.append((node.name.lower(), self._by_name))
+        return keys
+
+    def query(self, tag: str = None, type_name: str = None, name: str = None, name_ci: str = None,
+              shared: bool = None, condition: Callable[[Node], bool] = None) -> NodeCollection:
+        """
+        Find nodes by intersecting the tag, type_name and name buckets,
+        then checking anything the buckets don't cover against the remaining nodes.
+        :param tag: Tag without the namespace, such as 'selectionEntry'
+        :param type_name: typeName for profiles, type for selection entries
+        :param name: Exact name
+        :param name_ci: Case-insensitive name
+        :param shared: If the node must (or must not) be in a shared container
+        :param condition: Any other filter, as would be passed to filter
+        :return:
+        """
+        buckets = []
+        if tag is not None:
+            buckets.append(self._by_tag.get(tag, {}))
+        if type_name is not None:
+            buckets.append(self._by_type_name.get(type_name, {}))
+        for lookup_name in [name, name_ci]:
+            if lookup_name is not None:
+                buckets.append(self._by_name.get(lookup_name.lower(), {}))
+
+        candidates = self.data
+        if buckets:
+            buckets.sort(key=len)
+            smallest_bucket, other_buckets = buckets[0], buckets[1:]
+            candidates = [node for node in smallest_bucket if all(node in bucket for bucket in other_buckets)]
+            candidates.sort(key=self._positions.__getitem__)
+
+        return NodeCollection([node for node in candidates
+                               if (name is None or node.name == name)
+                               and (shared is None or node.shared == shared)
+                               and (condition is None or condition(node))])
+
+
+class ReferenceIndex:
+    """
+    Reverse index from an id to every node referencing it through one of the REFERENCE_ATTRIBUTES.
+    Nodes are stored in dicts rather than lists so removing one doesn't need a scan of everything referencing an id.
+    """
+
+    def __init__(self):
+        self._by_id: dict[str, dict[Node, None]] = {}
+
+    def add(self, node: Node) -> None:
+        attrib = node.attrib
+        for attr in REFERENCE_ATTRIBUTES:
+            value = attrib.get(attr)
+            if value and could_be_id(value):
+                self._by_id.setdefault(value, {})[node] = None
+
+    def remove(self, node: Node) -> None:
+        attrib = node.attrib
+        for attr in REFERENCE_ATTRIBUTES:
+            value = attrib.get(attr)
+            nodes = self._by_id.get(value)
+            if nodes is None:
+                continue
+            nodes.pop(node, None)
+            if not nodes:
+                del self._by_id[value]
+
+    def get(self, node_id: str, attributes: list[str] = None) -> NodeCollection:
+        """
+        Get all nodes referencing node_id, optionally only through the given attributes.
+        """
+        nodes = self._by_id.get(node_id, {})
+        if attributes is None:
+            return NodeCollection(list(nodes))
+        return NodeCollection([node for node in nodes if any(node.attrib.get(attr) == node_id
+                                                             for attr in attributes)])
+
+
+def could_be_id(value: str or None) -> bool:
+    """
+    Cheap check to keep counts and flags out of the reference index, as 'value' and 'field' often hold those.
+    """
+    if not value or value in ['true', 'false']:
+        return False
+    return not value.lstrip('-').replace('.', '', 1).isdigit()
+
+
+class NameIndex:
+    """
+    Index from a key made from a node's name to the nodes matching a condition, kept up to date as nodes are
+    registered, removed or renamed rather than rebuilt from a query.
+    by_name holds the last node added for each key, which is the one a full rebuild in document order would pick.
+    """
+
+    def __init__(self, condition: Callable[[Node], bool], get_key: Callable[[Node], str or None]):
+        self.condition = condition
+        self.get_key = get_key
+        self.by_name: dict[str, Node] = {}
+        self._nodes_by_name: dict[str, dict[Node, None]] = {}
+        self._keys: dict[Node, str] = {}  # The key each node is indexed under, as its name may have changed since.
+
+    def add(self, node: Node) -> None:
+        if node in self._keys or not self.condition(node):
+            return
+        key = self.get_key(node)
+        if key is None:
+            return
+        self._keys[node] = key
+        self._nodes_by_name.setdefault(key, {})[node] = None
+        self.by_name[key] = node
+
+    def remove(self, node: Node) -> bool:
+        """
+        :return: If the node was indexed
+        """
+        key = self._keys.pop(node, None)
+        if key is None:
+            return False
+        nodes = self._nodes_by_name[key]
+        del nodes[node]
+        if nodes:
+            self.by_name[key] = next(reversed(nodes))
+        else:
+            del self._nodes_by_name[key]
+            del self.by_name[key]
+        return True
+
+    def clear(self) -> None:
+        self.by_name.clear()
+        self._nodes_by_name.clear()
+        self._keys.clear()
+
+
+class LineIndex:
+    """
+    Nodes by the lines of their file they span, from the line numbers set when parsing in diff mode.
+    Elements nest, so their spans do too: the innermost node around a line is the last node to start at or before it,
+    or the first of that node's ancestors that hasn't ended by it. Built once, for files that aren't being changed.
+    """
+
+    def __init__(self, nodes: Iterable[Node]):
+        """
+        :param nodes: All nodes of the file, in document order, so they're in order of their start lines.
+        """
+        self._nodes = [node for node in nodes if node.start_line_number is not None]
+        self._start_line_numbers = [node.start_line_number for node in self._nodes]
+
+    def get_node_starting_at(self, line_number: int) -> Node or None:
+        """
+        :return: The node starting at line_number, or None if no node or more than one does.
+        """
+        index = bisect.bisect_left(self._start_line_numbers, line_number)
+        if index == len(self._nodes) or self._start_line_numbers[index] != line_number:
+            return None
+        if index + 1 < len(self._nodes) and self._start_line_numbers[index + 1] == line_number:
+            return None
+        return self._nodes[index]
+
+    def get_enclosing_node(self, line_number: int) -> Node or None:
+        """
+        :return: The innermost node that line_number is part of, or None if it's outside the root.
+        """
+        index = bisect.bisect_right(self._start_line_numbers, line_number) - 1
+        if index < 0:
+            return None
+        node = self._nodes[index]
+        while node is not None and (node.end_line_number or node.start_line_number) < line_number:
+            node = node.parent
+        return node
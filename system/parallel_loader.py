@@ -0,0 +1,34 @@
+import marshal
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Iterator
+from xml.etree import ElementTree as ET
+
+from system.tree_cache import flatten_tree, rebuild_tree, store_cached_tree
+
+# Kept free of System/Node imports, so spawned workers start quickly.
+
+
+def read_file_compact(path: str, cache_directory: str = None) -> bytes:
+    """
+    Parse a .cat or .gst in a worker process and flatten it for sending back to the parent.
+    Pickling the Elements themselves is slower to load than just parsing again,
+    so the tree is sent as the marshalled output of flatten_tree.
+    If a cache_directory is given, the worker also writes the cache entry for the file.
+    """
+    tree = ET.parse(path)
+    flat_elements = flatten_tree(tree.getroot())
+    if cache_directory:
+        store_cached_tree(cache_directory, path, tree, flat_elements)
+    return marshal.dumps(flat_elements)
+
+
+def load_trees(paths: list[str], workers: int, cache_directory: str = None) -> Iterator[tuple[str, ET.ElementTree]]:
+    """
+    Parse files in a process pool, yielding trees in the order of paths as soon as each is ready,
+    so the caller can build nodes for one file while the rest are still parsing.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        compact_trees = executor.map(partial(read_file_compact, cache_directory=cache_directory), paths)
+        for path, compact_tree in zip(paths, compact_trees):
+            yield path, rebuild_tree(marshal.loads(compact_tree))
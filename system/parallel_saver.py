@@ -0,0 +1,38 @@
+import marshal
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator
+from xml.etree import ElementTree as ET
+
+from system.tree_cache import flatten_tree, rebuild_tree
+from util.bs_xml_writer import write_bs_xml
+
+# Kept free of System/Node imports, so spawned workers start quickly.
+
+
+def write_file_compact(path: str, namespace: str, compact_tree: bytes) -> str:
+    """
+    Write a file in a worker process from the marshalled output of flatten_tree.
+    """
+    write_bs_xml(rebuild_tree(marshal.loads(compact_tree)), path, namespace)
+    return path
+
+
+def save_trees(files: list[tuple[str, str, ET.ElementTree]], workers: int) -> Iterator[str]:
+    """
+    Write (path, namespace, tree) in a process pool, yielding each path once it has been written.
+    The trees are indented here first, so they end up the same as if they were written in this process.
+    Trees that can't be marshalled (such as with comment elements) are written in this process instead.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for path, namespace, tree in files:
+            ET.indent(tree)
+            try:
+                compact_tree = marshal.dumps(flatten_tree(tree.getroot()))
+            except ValueError:
+                write_bs_xml(tree, path, namespace)
+                yield path
+                continue
+            futures.append(executor.submit(write_file_compact, path, namespace, compact_tree))
+        for future in as_completed(futures):
+            yield future.result()
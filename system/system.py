@@ -1,18 +1,20 @@
 import datetime
 import json
 import os
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
 
 if TYPE_CHECKING:
     from book_reader.page import Page
+    from system.file_source import FileSource
 
 from book_reader.raw_entry import RawUnit, RawProfile
 from settings import default_system, default_data_directory, default_settings
-from system.constants import SystemSettingsKeys
+from system.constants import SystemSettingsKeys, REFERENCE_ATTRIBUTES
 from system.game.games_list import get_game
 from system.node import Node
-from system.node_collection import NodeCollection
-from system.system_file import SystemFile, set_namespace_from_file
+from system.node_collection import NodeCollection, QueryableNodeCollection, ReferenceIndex, NameIndex
+from system.system_file import SystemFile
+from system.tree_cache import load_cached_tree, remove_cached_tree
 from util.log_util import STYLES, print_styled
 from util.text_utils import get_generic_rule_name, remove_plural, check_alt_names
 
@@ -20,6 +22,30 @@ IGNORE_FOR_DUPE_CHECK = ['selectionEntryGroup', 'selectionEntry', 'constraint',
                          'characteristicType', 'modifier']
 
 
+def get_category_type_name(name: str) -> (str, str or None):
+    """
+    Get the name a category is indexed under, and the model type or subtype it's for if it is one.
+    """
+    is_model_type = False
+    name = name.strip()
+    if name.endswith(":"):
+        name = name[:-1]
+    if name.lower().endswith(" sub-type"):
+        name = name[:-len(" sub-type")]
+        if name.lower().endswith(" unit"):
+            name = name[:-len(" unit")]
+        if name.lower().endswith(" model"):
+            name = name[:-len(" model")]
+        is_model_type = True
+    elif name.lower().endswith(" unit type"):
+        name = name[:-len(" unit type")]
+        is_model_type = True
+    elif name.lower().endswith(" model type"):
+        is_model_type = True
+        name = name[:-len(" model type")]
+    return name, name if is_model_type else None
+
+
 class System:
 
     def __str__(self):
@@ -27,11 +53,15 @@ class System:
 
     def __init__(self, system_name: str = default_system, data_directory: str = default_data_directory,
                  settings=None,
-                 include_raw=False, raw_import_settings=None):
+                 include_raw=False, raw_import_settings=None, file_source: 'FileSource' = None):
+        """
+        :param file_source: Read the files from here, such as a git tree, rather than from the system's directory.
+        """
 
         self.run_timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M")
         print(f"Initializing {system_name}")
         self.errors = []
+        self.new_error_comments = set()  # Comment elements given errors this run, which are kept when saving
         print(settings)
         if settings is None:
             settings = {}
@@ -43,34 +73,58 @@ class System:
 
         self.gst = None
         self.files: [SystemFile] = []
+        self.file_source = file_source
 
         self.all_nodes = NodeCollection([])
-        self.nodes_with_ids = NodeCollection([])
+        self.nodes_with_ids = QueryableNodeCollection()
+        self.reported_duplicate_ids = set()
+        self.references = ReferenceIndex()  # id: nodes pointing at that id
+        # Name lookups for importing, updated as nodes are registered, removed and renamed.
+        self.rule_names = NameIndex(lambda node: node.shared and node.id and node.name,
+                                    lambda node: node.name.lower())
+        self.wargear_names = NameIndex(lambda node: node.shared and node.id and node.name and not node.collective,
+                                       lambda node: node.name.lower())
+        self.wargear_list_names = NameIndex(lambda node: node.parent is not None and node.name
+                                            and node.parent.tag == 'sharedSelectionEntryGroups',
+                                            lambda node: node.name.lower())
+        self.category_names = NameIndex(lambda node: node.id and node.name,
+                                        lambda node: get_category_type_name(node.name)[0])
+        self.model_type_names = NameIndex(lambda node: node.id and node.name,
+                                          lambda node: get_category_type_name(node.name)[1])
+        self.name_indexes: dict[str, list[NameIndex]] = {
+            'rule': [self.rule_names],
+            'selectionEntry': [self.wargear_names],
+            'selectionEntryGroup': [self.wargear_list_names],
+            'categoryEntry': [self.category_names, self.model_type_names],
+        }
 
         # profileType name: {characteristicType name: typeId}
         self.profile_types: dict[str: str] = {}
         self.profile_characteristics: dict[str: dict[str: str]] = {}
 
-        self.categories: dict[str: str] = {}
-
         self.system_name = system_name
         if self.system_name == 'noop':
             return
         self.game_system_location = os.path.join(data_directory, system_name)
-        game_files = os.listdir(self.game_system_location)
+        if file_source is not None:
+            game_files = file_source.get_file_names()
+        else:
+            game_files = os.listdir(self.game_system_location)
         temp_file_list = []  # List so we can get a count for progress bar
         for file_name in game_files:
             filepath = os.path.join(self.game_system_location, file_name)
-            if os.path.isdir(filepath) or os.path.splitext(file_name)[1] not in ['.cat', '.gst']:
+            if os.path.splitext(file_name)[1] not in ['.cat', '.gst']:
                 continue  # Skip this iteration
+            if file_source is None and os.path.isdir(filepath):
+                continue
             temp_file_list.append(filepath)
         count = len(temp_file_list)
         i = 0
-        for filepath in temp_file_list:
+        for filepath, source_tree in self.read_source_trees(temp_file_list):
             i += 1
             print('\r', end="")
             print(f"Loading file ({i}/{count}): {filepath}", end="")
-            file = SystemFile(self, filepath)
+            file = SystemFile(self, filepath, source_tree)
             self.files.append(file)
             if file.is_gst:
                 self.gst = file
@@ -78,61 +132,107 @@ class System:
 
         self.define_profile_characteristics()  # These should not be updated during a session, so it's OK to index them.
 
-        self.wargear_by_name = {}
-        self.rules_by_name = {}
-        self.wargear_lists_by_name = {}
-        self.categories = {}  # Don't use this for types and subtypes anymore.
-        self.model_types_and_subtypes = {}
-        self.refresh_index()
+        if self.lazy:
+            self.refresh_index()  # Build the nodes the name indexes cover
 
         self.raw_pub_priority = {}
         self.raw_files = {}
         if include_raw:
             self.init_raw_game(raw_import_settings)
 
-    def refresh_index(self):
-        self.rules_by_name = {node.name.lower(): node for node in
-                              self.nodes_with_ids.filter(lambda node: node.tag == 'rule' and node.shared and node.name)}
-        self.wargear_by_name = {node.name.lower(): node for node in
-                                self.nodes_with_ids.filter(lambda node: node.tag == 'selectionEntry'
-                                                                        and node.shared and node.name
-                                                                        and not node.collective)}
+    @property
+    def cache_directory(self) -> str or None:
+        """
+        Where parsed files are cached, or None if not caching.
+        """
+        return self.settings.get(SystemSettingsKeys.CACHE_DIRECTORY)
+
+    def read_source_trees(self, file_paths: list[str]):
+        """
+        Yields each path with its tree if cached or using the parallel loader, otherwise None to be parsed in SystemFile.
+        """
+        if self.file_source is not None:
+            for filepath in file_paths:
+                yield filepath, self.file_source.get_tree(os.path.basename(filepath))
+            return
+        cache_directory = self.cache_directory
+        cached_trees = {}
+        if cache_directory:
+            cached_trees = {filepath: load_cached_tree(cache_directory, filepath) for filepath in file_paths}
+        to_parse = [filepath for filepath in file_paths if cached_trees.get(filepath) is None]
+
+        parsed_trees = None
+        workers = self.settings.get(SystemSettingsKeys.LOAD_WORKERS)
+        if workers and workers >= 2 and len(to_parse) >= 2:
+            from system.parallel_loader import load_trees
+            parsed_trees = load_trees(to_parse, workers, cache_directory)
+
+        for filepath in file_paths:
+            if cached_trees.get(filepath) is not None:
+                yield filepath, cached_trees[filepath]
+            elif parsed_trees is not None:
+                yield next(parsed_trees)
+            else:
+                yield filepath, None
+
+    @property
+    def rules_by_name(self) -> dict[str, Node]:
+        return self.rule_names.by_name
+
+    @property
+    def wargear_by_name(self) -> dict[str, Node]:
+        return self.wargear_names.by_name
+
+    @property
+    def wargear_lists_by_name(self) -> dict[str, Node]:
+        return self.wargear_list_names.by_name
+
+    @property
+    def categories(self) -> dict[str, Node]:
+        """
+        Don't use this for types and subtypes anymore.
+        """
+        return self.category_names.by_name
+
+    @property
+    def model_types_and_subtypes(self) -> dict[str, Node]:
+        return self.model_type_names.by_name
+
+    def add_to_name_indexes(self, nodes: list[Node]):
+        name_indexes = self.name_indexes
+        for node in nodes:
+            indexes = name_indexes.get(node.tag)
+            if indexes:
+                for index in indexes:
+                    index.add(node)
+
+    def remove_from_name_indexes(self, node: Node) -> bool:
+        """
+        :return: If the node was in any of the name indexes
+        """
+        was_indexed = False
+        for index in self.name_indexes.get(node.tag, []):
+            was_indexed = index.remove(node) or was_indexed
+        return was_indexed
 
+    def refresh_index(self):
+        """
+        Rebuild the name indexes from scratch. They're kept up to date as nodes change, so this is only needed to build
+        the nodes they cover in lazy mode, and to put them back in document order after.
+        """
+        for indexes in self.name_indexes.values():
+            for index in indexes:
+                index.clear()
+        self.add_to_name_indexes(self.query(tag='rule', shared=True))
+        self.add_to_name_indexes(self.query(tag='selectionEntry', shared=True))
         for file in self.files:
             ssegs = file.root_node.get_child('sharedSelectionEntryGroups')
-            if ssegs is None:
-                continue
-            for node in ssegs.children:
-                self.wargear_lists_by_name[node.name.lower()] = node
-
-        categories = {node.name: node for node in
-                      self.nodes_with_ids.filter(lambda node: node.tag == 'categoryEntry')}
-
-        # Map categories to model types and subtypes
-        for name, category in categories.items():
-            is_model_type = False
-            name = name.strip()
-            if name.endswith(":"):
-                name = name[:-1]
-            if name.lower().endswith(" sub-type"):
-                name = name[:-len(" sub-type")]
-                if name.lower().endswith(" unit"):
-                    name = name[:-len(" unit")]
-                if name.lower().endswith(" model"):
-                    name = name[:-len(" model")]
-                is_model_type = True
-            elif name.lower().endswith(" unit type"):
-                name = name[:-len(" unit type")]
-                is_model_type = True
-            elif name.lower().endswith(" model type"):
-                is_model_type = True
-                name = name[:-len(" model type")]
-            if is_model_type:
-                self.model_types_and_subtypes[name] = category
-            self.categories[name] = category
+            if ssegs is not None:
+                self.add_to_name_indexes(ssegs.children)
+        self.add_to_name_indexes(self.query(tag='categoryEntry'))
 
     def define_profile_characteristics(self):
-        for node in self.nodes_with_ids.filter(lambda x: x.type == 'profileType'):
+        for node in self.query(tag='profileType'):
             self.profile_types[node.name] = node.id
             self.profile_characteristics[node.name] = {}
             for element in node.get_sub_elements_with_tag('characteristicType'):
@@ -215,7 +315,6 @@ class System:
                         print(f"\t\tWeapon: {weapon.name}")
                         self.create_or_update_upgrade(weapon)
             if Actions.LOAD_UNITS in all_actions_to_take:
-                self.refresh_index()  # We need to update the index before loading units
                 for page in book.pages:
                     print(f"\t{page.page_number} {str(page.page_type or '')}")
                     for unit in page.units:
@@ -283,9 +382,7 @@ class System:
         return None
 
     def get_profile_type_id(self, profile_type: str):
-        return self.nodes_with_ids.filter(lambda node: (
-                node.type == f"profileType"
-                and (node.name == profile_type)))[0].id
+        return self.query(tag='profileType', name=profile_type)[0].id
 
     def get_characteristic_name_and_id(self, characteristic_name: str, profile_type: str = None):
         if profile_type is None:
@@ -295,8 +392,56 @@ class System:
             raise ValueError(f"'{full_name}' is not a valid characteristic in the game system")
         return full_name, self.profile_characteristics[profile_type][full_name]
 
-    def get_node_by_id(self, node_id):
-        return self.nodes_with_ids.get(lambda x: x.id == node_id)
+    def query(self, tag: str = None, type_name: str = None, name: str = None, name_ci: str = None,
+              shared: bool = None, condition: Callable[[Node], bool] = None) -> NodeCollection:
+        """
+        Indexed lookup of nodes with ids, see QueryableNodeCollection.query
+        """
+        if self.lazy:
+            if tag is None:
+                self.build_all_nodes()
+            for file in self.files:
+                file.build_nodes_for_query(tag, type_name, name_ci or name, shared)
+        nodes = self.nodes_with_ids.query(tag=tag, type_name=type_name, name=name, name_ci=name_ci,
+                                          shared=shared, condition=condition)
+        return self.in_document_order(nodes)
+
+    @property
+    def lazy(self) -> bool:
+        return bool(self.settings.get(SystemSettingsKeys.LAZY_NODES))
+
+    def build_all_nodes(self):
+        """
+        In lazy mode, build every node not built yet, for anything that needs all_nodes, nodes_with_ids
+        or the reference index to be complete.
+        """
+        for file in self.files:
+            file.build_all_nodes()
+
+    def in_document_order(self, nodes: NodeCollection) -> NodeCollection:
+        """
+        Nodes are indexed in the order they're built, which in lazy mode depends on what was looked up first.
+        Sort them back into the order eager loading gives, so results don't depend on that.
+        """
+        if not self.lazy or len(nodes) < 2:
+            return nodes
+        file_positions = {file: i for i, file in enumerate(self.files)}
+        return NodeCollection(sorted(nodes, key=lambda node: (file_positions.get(node.system_file, len(self.files)),
+                                                              node.system_file.get_document_position(node))))
+
+    def get_node_by_id(self, node_id) -> Node or None:
+        if self.lazy:
+            for file in self.files:
+                file.build_nodes_with_id(node_id)
+        nodes = self.in_document_order(self.nodes_with_ids.get_all_by_id(node_id))
+        if len(nodes) > 1 and node_id not in self.reported_duplicate_ids:
+            # Only report each duplicate once, as names are looked up every time a node is printed.
+            self.reported_duplicate_ids.add(node_id)
+            locations = ", ".join([f"{node.path} in {node.system_file}" for node in nodes])
+            print_styled(f"\n{node_id} is used by {len(nodes)} nodes, using the first: {locations}", STYLES.YELLOW)
+        if nodes:
+            return nodes[0]
+        return None
 
     def create_or_update_category(self, page, name, text):
         name = name.title()
@@ -334,7 +479,7 @@ class System:
         if not node_id:
             print(f"Could not find {upgrade_profile.name} to update in place")  # TODO make the weapon new.
             return False
-        node = self.nodes_with_ids.get(lambda x: x.id == node_id)
+        node = self.get_node_by_id(node_id)
         if not node:
             print(f"Could not find {node_id} to update in place")  # TODO make the weapon new.
             return False
@@ -364,10 +509,8 @@ class System:
     def get_or_create_unit(self, raw_unit) -> Node or None:
         raw_unit.name = raw_unit.name.title()
 
-        nodes = raw_unit.page.target_system_file.nodes_with_ids.filter(lambda node: (
-                node.type == f"selectionEntry:unit"
-                and (node.name and node.name.lower() == raw_unit.name.lower())
-        ))
+        nodes = self.query(tag='selectionEntry', type_name='unit', name_ci=raw_unit.name,
+                           condition=lambda node: node.system_file == raw_unit.page.target_system_file)
         # Find existing units
         if len(nodes) > 0:
             if len(nodes) > 1:
@@ -392,38 +535,108 @@ class System:
                                                                               'type': 'unit',
                                                                           })
         if highest_index:
-            unit.attrib['sortIndex'] = str(highest_index + 1)
+            unit.update_attributes({'sortIndex': highest_index + 1})
         return unit
 
-    def get_duplicates(self) -> dict[str, list['Node']]:
+    def get_duplicates(self, fingerprint: bool = False) -> dict[str, list['Node']]:
+        """
+        Group nodes with ids that share a tag and name.
+        :param fingerprint: Only keep nodes whose content exactly matches another in their group, using
+            Node.get_content_fingerprint. Groups with more than one distinct content are split by fingerprint.
+        :return: Groups of more than one node, by "name - tag", in document order.
+        """
+        self.build_all_nodes()
+        nodes_to_check = self.in_document_order(self.nodes_with_ids.filter(lambda x: not (x.tag in IGNORE_FOR_DUPE_CHECK
+                                                                                          or x.is_link()
+                                                                                          )))
+        nodes_by_tag_and_name = {}
+        for node in nodes_to_check:
+            nodes_by_tag_and_name.setdefault((node.tag, node.name), []).append(node)
+
         duplicate_groups = {}
-        nodes_to_check = self.nodes_with_ids.filter(lambda x: not (x.tag in IGNORE_FOR_DUPE_CHECK
-                                                                   or x.is_link()
-                                                                   ))
-        number_of_nodes = len(nodes_to_check)
-        for i, node in enumerate(nodes_to_check):
-            print('\r', end="")
-            print(f"Checking node ({i}/{number_of_nodes}): {node}", end="")
-            duplicates = nodes_to_check.filter(lambda x: x.tag == node.tag and x.name == node.name)
-            if len(duplicates) > 1:
-                duplicate_groups[f"{node.name} - {node.tag}"] = duplicates
-        print()
+        for (tag, name), nodes in nodes_by_tag_and_name.items():
+            if len(nodes) < 2:
+                continue
+            if not fingerprint:
+                duplicate_groups[f"{name} - {tag}"] = NodeCollection(nodes)
+                continue
+            nodes_by_fingerprint = {}
+            for node in nodes:
+                nodes_by_fingerprint.setdefault(node.get_content_fingerprint(), []).append(node)
+            matching_groups = [(content_hash, matches) for content_hash, matches in nodes_by_fingerprint.items()
+                               if len(matches) > 1]
+            for content_hash, matches in matching_groups:
+                group_name = f"{name} - {tag}"
+                if len(matching_groups) > 1:
+                    group_name += f" ({content_hash[:8]})"
+                duplicate_groups[group_name] = NodeCollection(matches)
         return duplicate_groups
 
+    def get_nodes_referencing(self, node_id: str, attributes: list[str] = None) -> NodeCollection:
+        """
+        Get all nodes pointing at node_id through targetId, childId, scope, field or value.
+        :param node_id:
+        :param attributes: Only return nodes referencing node_id through one of these attributes.
+        :return:
+        """
+        self.build_all_nodes()
+        return self.references.get(node_id, attributes)
+
+    def replace_references(self, old_id: str, new_id: str, attributes: list[str] = None) -> int:
+        """
+        Point everything referencing old_id at new_id instead.
+        :return: The number of nodes updated
+        """
+        referencing_nodes = self.get_nodes_referencing(old_id, attributes)
+        for node in referencing_nodes:
+            node.update_attributes({attr: new_id for attr in (attributes or REFERENCE_ATTRIBUTES)
+                                    if node.attrib.get(attr) == old_id})
+        return len(referencing_nodes)
+
     def try_get_name(self, value):
-        node = self.nodes_with_ids.get(lambda x: x.id == value)
+        node = self.get_node_by_id(value)
         if node:
             return node.generated_name
         return value
 
-    def save_system(self):
+    def save_system(self, all_files: bool = False):
+        """
+        Save the files that have been changed since they were loaded or last saved.
+        :param all_files: Save every file, such as to clean up formatting, or if elements were edited directly.
+        """
         print(f"Saving {self.system_name}")
-        count = len(self.files)
-        i = 0
         for system_file in self.files:
+            system_file.clean_previous_errors()  # Files with errors from the previous run are saved without them
+        files_to_save = [system_file for system_file in self.files if system_file.dirty or all_files]
+        count = len(files_to_save)
+        i = 0
+        for system_file in self.save_files(files_to_save):
             i += 1
             print('\r', end="")
             print(f"Saving file ({i}/{count}): {system_file.path}", end="")
-            set_namespace_from_file(system_file.path)
-            system_file.save()
-        print()  # newline to clean up
+            if self.cache_directory:
+                # Saving changes whitespace and escaping, so re-parse rather than caching the tree in memory.
+                remove_cached_tree(self.cache_directory, system_file.path)
+        if files_to_save:
+            print()  # newline to clean up
+            print(f"Saved {count} of {len(self.files)} files: {', '.join(str(file) for file in files_to_save)}")
+        else:
+            print("No files changed")
+
+    def save_files(self, files_to_save: list['SystemFile']):
+        """
+        Save files, in a process pool if there are enough of them and SAVE_WORKERS is set.
+        Yields each file once it has been written, which may be out of order.
+        """
+        workers = self.settings.get(SystemSettingsKeys.SAVE_WORKERS)
+        if not workers or workers < 2 or len(files_to_save) < 2:
+            for system_file in files_to_save:
+                system_file.save()
+                yield system_file
+            return
+        from system.parallel_saver import save_trees
+        files_by_path = {system_file.path: system_file for system_file in files_to_save}
+        for path in save_trees([(system_file.path, system_file.namespace, system_file.source_tree)
+                                for system_file in files_to_save], workers):
+            files_by_path[path].dirty = False
+            yield files_by_path[path]
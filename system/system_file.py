@@ -1,11 +1,14 @@
 import os
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable
 from xml.etree import ElementTree as ET
 
-from system.line_numbering_parser import LineNumberingParser
-from system.node import Node
-from system.node_collection import NodeCollection
-from util.generate_util import cleanup_file_match_bs_whitespace
+from system.constants import SystemSettingsKeys
+from system.line_numbering_parser import read_line_numbers
+from system.node import Node, bsc_error_label, old_bsc_error_label
+from system.node_collection import NodeCollection, IndexedNodeCollection, LineIndex
+from system.tree_cache import store_cached_tree
+from util.bs_xml_writer import write_bs_xml
+from util.element_util import get_tag, iter_element_events
 from util.text_utils import make_plural
 
 if TYPE_CHECKING:
@@ -14,39 +17,205 @@ if TYPE_CHECKING:
 
 class SystemFile:
 
-    def __init__(self, system: 'System', path):
+    def __init__(self, system: 'System', path, source_tree: ET.ElementTree = None):
         self.system = system  # Link to parent
         self.name = os.path.split(path)[1]
         self.path = path
 
         self.is_gst = os.path.splitext(path)[1] == ".gst"
+        self.dirty = False  # Set by node changes, so save_system only writes files that changed
         self.is_template = "Template" in self.name
 
         self.namespace = set_namespace_from_file(path)
 
         self.all_nodes = NodeCollection([])
-        self.nodes_with_ids = NodeCollection([])
+        self.nodes_with_ids = IndexedNodeCollection()
+        # In lazy mode, all_nodes and nodes_with_ids only hold the nodes built so far.
+        self.lazy = bool(self.system.settings.get(SystemSettingsKeys.LAZY_NODES)) \
+            and self.name not in self.system.settings.get(SystemSettingsKeys.EAGER_FILES, ())
+        self.nodes_by_element: dict[ET.Element, Node] = {}  # Only filled in lazy mode
+        self._line_index: LineIndex or None = None
 
+        if source_tree is not None:  # From the cache or already parsed by the parallel loader
+            events = iter_element_events(source_tree.getroot())
+        else:
+            events = ET.iterparse(path, events=('start', 'end'))
+        root, nodes = self._read_events(events)
+        # (start, end) line numbers of each element, only read in diff mode.
+        self.line_numbers: dict[ET.Element, tuple[int, int]] = {}
         if self.system.settings.get("diff"):
-            self._source_tree = ET.parse(path, parser=LineNumberingParser())
+            # Before any nodes modify the tree, so the elements still line up with the file.
+            if self.system.file_source is not None:
+                line_numbers = self.system.file_source.get_line_numbers(self.name)
+            else:
+                line_numbers = read_line_numbers(path)
+            self.line_numbers = dict(zip(root.iter(), line_numbers))
+        self._source_tree = source_tree if source_tree is not None else ET.ElementTree(root)
+        if source_tree is None and self.system.cache_directory:
+            store_cached_tree(self.system.cache_directory, path, self._source_tree)  # Before nodes modify it
+
+        self.library = root.get('library') == "true"
+        self.id = root.get('id')
+        self.revision = root.get('revision')
+        self.game_system_revision = root.get('gameSystemRevision')
+
+        if self.lazy:
+            self.root_node = Node(self, root, is_root_node=True)
         else:
-            self._source_tree = ET.parse(path)
+            self.root_node = nodes[0]
+            self.register_built_nodes(nodes)
+
+    def _read_events(self, events: Iterable[tuple[str, ET.Element]]) -> tuple[ET.Element, list[Node]]:
+        """
+        Go through the file once, as start and end events, to build the nodes (or in lazy mode, the element indexes)
+        and the list of imported catalogues.
+        :return: The root element and the nodes built, in document order.
+        """
+        self.import_ids = []
+        catalogue_link_tag = f"{self.get_namespace_tag()}catalogueLink"
+        if self.lazy:
+            self._parent_map: dict[ET.Element, ET.Element] = {}
+            self._elements_by_id: dict[str, list[ET.Element]] = {}
+            # Only elements with ids, as System.query only returns nodes with ids.
+            self._elements_with_ids_by_tag: dict[str, list[ET.Element]] = {}
+            self._id_element_positions: dict[ET.Element, int] = {}  # To sort lazily built nodes into document order
+        root = None
+        nodes = []
+        stack = []  # Nodes, or elements in lazy mode, of the elements currently open.
+        stripped_tags = {}  # Only a few dozen distinct tags, so strip each namespace once.
+        for event, element in events:
+            if event == 'end':
+                stack.pop()
+                continue
+            tag = stripped_tags.get(element.tag)
+            if tag is None:
+                tag = stripped_tags[element.tag] = get_tag(element)
+            if element.tag == catalogue_link_tag:
+                self.import_ids.append(element.get('targetId'))
+            if root is None:
+                root = element
+
+            if not self.lazy:
+                node = Node.build_unregistered(self, element, tag, stack[-1] if stack else None, not stack)
+                nodes.append(node)
+                stack.append(node)
+                continue
+
+            if stack:
+                self._parent_map[element] = stack[-1]
+            stack.append(element)
+            element_id = element.get('id')
+            if element_id:
+                self._elements_by_id.setdefault(element_id, []).append(element)
+                self._elements_with_ids_by_tag.setdefault(tag, []).append(element)
+                self._id_element_positions[element] = len(self._id_element_positions)
+        return root, nodes
 
-        self.library = self._source_tree.getroot().get('library') == "true"
-        self.id = self._source_tree.getroot().get('id')
-        self.import_ids = [c.get('targetId') for c in
-                           self._source_tree.findall(f'.//{self.get_namespace_tag()}catalogueLink')]
-        self.revision = self._source_tree.getroot().get('revision')
-        self.game_system_revision = self._source_tree.getroot().get('gameSystemRevision')
+    def register_built_nodes(self, nodes: list[Node]):
+        """
+        Add nodes built by Node.build_unregistered to this file's and the system's collections and indexes.
+        """
+        self.all_nodes.extend(nodes)
+        self.system.all_nodes.extend(nodes)
+        nodes_with_ids = [node for node in nodes if node.id]
+        self.nodes_with_ids.extend(nodes_with_ids)
+        self.system.nodes_with_ids.extend(nodes_with_ids)
+        for node in nodes:
+            self.system.references.add(node)
+        self.system.add_to_name_indexes(nodes)
+        if self.lazy:
+            for node in nodes:
+                self.nodes_by_element[node._element] = node
+
+    def get_node(self, element: ET.Element) -> Node:
+        """
+        Lazy mode: get the node for an element of this file, building it and any missing ancestors.
+        Nodes are built a whole set of siblings at a time, to keep each node's children in order.
+        """
+        node = self.nodes_by_element.get(element)
+        if node is not None:
+            return node
+        unbuilt_ancestors = []
+        while node is None:
+            unbuilt_ancestors.append(element)
+            element = self._parent_map[element]  # The root node is always built, so this stops there.
+            node = self.nodes_by_element.get(element)
+        for element in reversed(unbuilt_ancestors):
+            node.children  # Builds the node for element, along with its siblings.
+            node = self.nodes_by_element[element]
+        return node
+
+    def build_nodes_with_id(self, node_id: str):
+        if self.lazy:
+            for element in self._elements_by_id.get(node_id, []):
+                self.get_node(element)
 
-        self._parent_map = {c: p for p in self._source_tree.iter() for c in p}
-        self.root_node = Node(self, self._source_tree.getroot(), is_root_node=True)
+    def build_nodes_for_query(self, tag: str, type_name: str = None, name: str = None, shared: bool = None):
+        """
+        Lazy mode: build the nodes that could match System.query, skipping elements that can't.
+        """
+        if not self.lazy:
+            return
+        for element in self._elements_with_ids_by_tag.get(tag, []):
+            if type_name is not None and element.get('typeName', element.get('type')) != type_name:
+                continue
+            if name is not None and (element.get('name') or "").lower() != name.lower():
+                continue
+            parent = self._parent_map.get(element)
+            if shared is not None and parent is not None and get_tag(parent).startswith('shared') != shared:
+                continue
+            self.get_node(element)
+
+    def build_all_nodes(self):
+        if self.lazy:
+            for _ in self.root_node.iter_subtree():
+                pass  # Traversing builds the nodes
+
+    def get_document_position(self, node: Node) -> int:
+        """
+        Lazy mode: position of a node with an id in the file as loaded, for sorting nodes into the order eager loading
+        would have indexed them in. Nodes created since loading come last.
+        Files loaded eagerly alongside lazy ones already index their nodes in order, so theirs all sort the same.
+        """
+        if not self.lazy:
+            return 0
+        return self._id_element_positions.get(node._element, len(self._id_element_positions))
+
+    @property
+    def source_tree(self) -> ET.ElementTree:
+        return self._source_tree
+
+    @property
+    def line_index(self) -> LineIndex:
+        """
+        Nodes by line number, built the first time it's used. Only has nodes in diff mode, where lines are numbered.
+        """
+        if self._line_index is None:
+            self._line_index = LineIndex(self.root_node.iter_subtree())
+        return self._line_index
+
+    def clean_previous_errors(self):
+        """
+        Before saving, remove errors from the previous run from comments, other than comments given errors again
+        this run, and delete comments left empty. Marks the file as changed if there were any.
+        Only comments needing a change are looked up as nodes, as most have neither.
+        """
+        comment_tag = f"{self.get_namespace_tag()}comment"
+        new_error_comments = self.system.new_error_comments
+        stale_comments = [element for element in self._source_tree.getroot().iter(comment_tag)
+                          if element not in new_error_comments
+                          and (not element.text or bsc_error_label in element.text
+                               or old_bsc_error_label in element.text)]
+        if not stale_comments:
+            return
+        nodes_by_element = None if self.lazy else {node._element: node for node in self.all_nodes}
+        for element in stale_comments:
+            comment_node = self.get_node(element) if self.lazy else nodes_by_element[element]
+            comment_node.parent.clean_previous_errors()
 
     def save(self):
-        ET.indent(self._source_tree)
-        # utf-8 to keep special characters un-escaped.
-        self._source_tree.write(self.path, encoding="utf-8")
-        cleanup_file_match_bs_whitespace(self.path)
+        write_bs_xml(self._source_tree, self.path, self.namespace)
+        self.dirty = False
 
     def __str__(self):
         return self.name
@@ -31,14 +31,14 @@ class BasicSystemTests(unittest.TestCase):
             for node_id, count in duplicates.items():
                 duplicate_sets.append({
                     f"{node_id} appears {count} times": [str(node) for node in
-                                                         system.nodes_with_ids.filter(lambda x: x.id == node_id)]
+                                                         system.nodes_with_ids.get_all_by_id(node_id)]
                 })
             self.assertTrue(len(duplicate_sets) == 0, "Duplicate IDs found: " + json.dumps(duplicate_sets, indent=2))
 
         for node in system.nodes_with_ids:
             if node.target_id:
                 with self.subTest(f"Link validity on {node}"):
-                    self.assertTrue(node.target_id in id_list,
+                    self.assertTrue(system.get_node_by_id(node.target_id) is not None,
                                     f"Link {node.attrib['name']} targets {node.target_id} which does not exist")
 
     @staticmethod
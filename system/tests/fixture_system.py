@@ -0,0 +1,34 @@
+import contextlib
+import io
+import os
+import shutil
+
+from system.constants import SystemSettingsKeys
+from system.file_source import FileSource
+from system.system import System
+
+FIXTURES_DIRECTORY = os.path.join(os.path.dirname(__file__), "fixtures")
+FIXTURE_SYSTEM_NAME = "testsys"
+
+
+def load_fixture_system(settings: dict = None, file_source: FileSource = None) -> System:
+    """
+    The small system in fixtures/testsys, loaded without the cache so each test gets its own trees.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        return System(FIXTURE_SYSTEM_NAME, FIXTURES_DIRECTORY,
+                      settings={SystemSettingsKeys.CACHE_DIRECTORY: None} | (settings or {}), file_source=file_source)
+
+
+def load_fixture_system_copy(directory: str, settings: dict = None) -> System:
+    """
+    A copy of the fixture system in directory, such as a temporary directory, for tests that save it.
+    """
+    shutil.copytree(os.path.join(FIXTURES_DIRECTORY, FIXTURE_SYSTEM_NAME), os.path.join(directory, FIXTURE_SYSTEM_NAME))
+    with contextlib.redirect_stdout(io.StringIO()):
+        return System(FIXTURE_SYSTEM_NAME, directory,
+                      settings={SystemSettingsKeys.CACHE_DIRECTORY: None} | (settings or {}))
+
+
+def get_file(system: System, name: str):
+    return next(file for file in system.files if file.name == name)
@@ -0,0 +1,61 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from system.node import bsc_error_label
+from system.system import System
+from system.tests.fixture_system import FIXTURE_SYSTEM_NAME, load_fixture_system, load_fixture_system_copy
+
+
+def reload(system: System) -> System:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return System(FIXTURE_SYSTEM_NAME, os.path.dirname(system.game_system_location), settings=system.settings)
+
+
+class CommentTests(unittest.TestCase):
+    """
+    Comments are only read when their fields are used, and errors from the previous run are removed when saving.
+    """
+
+    def test_read_when_used(self):
+        system = load_fixture_system()
+        bulky = system.get_node_by_id("rule-bulky")
+        self.assertIsNone(bulky._comments)
+        self.assertEqual("rule-bulky-template-", bulky.template_id)
+        self.assertEqual("template_id_rule-bulky-template-0 ", bulky.non_error_comments)
+        self.assertEqual("\nOld error", bulky.previous_errors)
+        self.assertEqual("20240101-1200", bulky.previous_errors_timestamp)
+        self.assertEqual("", system.get_node_by_id("se-bolter").non_error_comments)
+        self.assertFalse(any(file.dirty for file in system.files))  # Nothing is cleaned up until saving
+
+    def test_previous_errors_removed_when_saving(self):
+        with tempfile.TemporaryDirectory() as directory:
+            system = load_fixture_system_copy(directory)
+            system.get_node_by_id("se-bolter").append_error_comment("New error")
+            with contextlib.redirect_stdout(io.StringIO()):
+                system.save_system()
+            self.assertEqual("\nOld error", system.get_node_by_id("rule-bulky").previous_errors)
+
+            saved_system = reload(system)
+            bulky = saved_system.get_node_by_id("rule-bulky")
+            self.assertEqual("template_id_rule-bulky-template-0 ", bulky.get_child("comment").text)
+            self.assertIsNone(saved_system.get_node_by_id("se-sword").get_child("comment"))  # Was empty
+            bolter = saved_system.get_node_by_id("se-bolter")
+            self.assertEqual("\nNew error", bolter.previous_errors)
+            self.assertEqual(system.run_timestamp, bolter.previous_errors_timestamp)
+
+    def test_same_errors_keep_their_timestamp(self):
+        with tempfile.TemporaryDirectory() as directory:
+            system = load_fixture_system_copy(directory)
+            system.get_node_by_id("rule-bulky").append_error_comment("Old error")
+            self.assertEqual(f"template_id_rule-bulky-template-0 {bsc_error_label}20240101-1200\nOld error",
+                             system.get_node_by_id("rule-bulky").get_child("comment").text)
+            with contextlib.redirect_stdout(io.StringIO()):
+                system.save_system()
+            self.assertEqual("\nOld error", reload(system).get_node_by_id("rule-bulky").previous_errors)
+
+
+if __name__ == '__main__':
+    unittest.main()
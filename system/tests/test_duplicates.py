@@ -0,0 +1,56 @@
+import unittest
+
+from system.tests.fixture_system import get_file, load_fixture_system
+
+
+class DuplicateTests(unittest.TestCase):
+    """
+    get_duplicates groups nodes by tag and name, and with fingerprint=True only keeps copies with the same content.
+    """
+
+    def setUp(self):
+        self.system = load_fixture_system()
+        self.shared_rules = get_file(self.system, "Test.cat").root_node.get_child("sharedRules")
+
+    def add_rule(self, name: str, text: str):
+        # A unique name to start with, as get_or_create_child would return an earlier copy
+        unique_name = f"{name} {len(self.shared_rules.children)}"
+        rule = self.shared_rules.get_or_create_child("rule", attrib={"name": unique_name})
+        rule.update_attributes({"name": name})
+        rule.set_rules_text(text)
+        return rule
+
+    def get_duplicate_ids(self, fingerprint: bool) -> dict[str, list[str]]:
+        return {group_name: [node.id for node in nodes]
+                for group_name, nodes in self.system.get_duplicates(fingerprint).items()}
+
+    def test_no_duplicates(self):
+        self.assertEqual({}, self.get_duplicate_ids(fingerprint=False))
+        self.assertEqual({}, self.get_duplicate_ids(fingerprint=True))
+
+    def test_grouped_by_name(self):
+        first = self.add_rule("Stubborn", "Never retreats.")
+        second = self.add_rule("Stubborn", "Rarely retreats.")
+        self.assertEqual({"Stubborn - rule": [first.id, second.id]}, self.get_duplicate_ids(fingerprint=False))
+        self.assertEqual({}, self.get_duplicate_ids(fingerprint=True))  # Different text
+
+    def test_single_matching_group(self):
+        first = self.add_rule("Stubborn", "Never retreats.")
+        self.add_rule("Stubborn", "Rarely retreats.")
+        third = self.add_rule("Stubborn", "Never retreats.")
+        self.assertEqual({"Stubborn - rule": [first.id, third.id]}, self.get_duplicate_ids(fingerprint=True))
+
+    def test_several_matching_groups(self):
+        first = self.add_rule("Stubborn", "Never retreats.")
+        second = self.add_rule("Stubborn", "Rarely retreats.")
+        third = self.add_rule("Stubborn", "Never retreats.")
+        fourth = self.add_rule("Stubborn", "Rarely retreats.")
+        expected = {f"Stubborn - rule ({first.get_content_fingerprint()[:8]})": [first.id, third.id],
+                    f"Stubborn - rule ({second.get_content_fingerprint()[:8]})": [second.id, fourth.id]}
+        self.assertEqual(expected, self.get_duplicate_ids(fingerprint=True))
+        self.assertEqual({"Stubborn - rule": [first.id, second.id, third.id, fourth.id]},
+                         self.get_duplicate_ids(fingerprint=False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import unittest
+
+from system.constants import SystemSettingsKeys
+from system.file_source import FileSource
+from system.tests.fixture_system import FIXTURE_SYSTEM_NAME, FIXTURES_DIRECTORY, get_file, load_fixture_system
+
+
+class FixtureSource(FileSource):
+    """
+    The fixture system's files, read through a FileSource the way a git tree's are.
+    """
+
+    def get_file_names(self) -> list[str]:
+        return sorted(os.listdir(os.path.join(FIXTURES_DIRECTORY, FIXTURE_SYSTEM_NAME)))
+
+    def read(self, file_name: str) -> bytes:
+        with open(os.path.join(FIXTURES_DIRECTORY, FIXTURE_SYSTEM_NAME, file_name), 'rb') as f:
+            return f.read()
+
+
+class FileSourceTests(unittest.TestCase):
+
+    def test_shared_trees_are_not_shared_between_systems(self):
+        shared_trees = {}
+        system_left = load_fixture_system({"diff": True}, FixtureSource(shared_trees))
+        system_right = load_fixture_system({"diff": True}, FixtureSource(shared_trees))
+        self.assertEqual(2, len(shared_trees))  # Each file parsed once
+
+        left_file = get_file(system_left, "Test.cat")
+        right_file = get_file(system_right, "Test.cat")
+        self.assertIsNot(left_file.source_tree.getroot(), right_file.source_tree.getroot())
+        system_left.get_node_by_id("se-bolter").update_attributes({"name": "Heavy Bolter"})
+        system_left.get_node_by_id("rule-bulky").delete()
+        self.assertEqual("Bolter", system_right.get_node_by_id("se-bolter").name)
+        self.assertIsNotNone(system_right.get_node_by_id("rule-bulky"))
+
+        right_marine = system_right.get_node_by_id("se-marine")
+        self.assertIsNotNone(right_marine.start_line_number)
+        self.assertEqual(system_left.get_node_by_id("se-marine").start_line_number, right_marine.start_line_number)
+
+    def test_eager_files_in_lazy_mode(self):
+        settings = {SystemSettingsKeys.LAZY_NODES: True, SystemSettingsKeys.EAGER_FILES: {"Test.cat"}}
+        system = load_fixture_system(settings, FixtureSource())
+        catalogue = get_file(system, "Test.cat")
+        self.assertFalse(catalogue.lazy)
+        self.assertTrue(get_file(system, "Test.gst").lazy)
+        self.assertCountEqual(list(catalogue.root_node.iter_subtree()), list(catalogue.all_nodes))
+
+        eager_system = load_fixture_system()
+        for query_arguments in [{}, {'tag': 'rule'}, {'tag': 'categoryEntry'}, {'name': "Fearless"}]:
+            with self.subTest(str(query_arguments)):
+                self.assertEqual([node.id for node in eager_system.query(**query_arguments)],
+                                 [node.id for node in system.query(**query_arguments)])
+
+
+if __name__ == '__main__':
+    unittest.main()
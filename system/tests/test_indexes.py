@@ -0,0 +1,167 @@
+import contextlib
+import io
+import unittest
+
+from system.constants import REFERENCE_ATTRIBUTES
+from system.node_collection import NameIndex, could_be_id
+from system.tests.fixture_system import get_file, load_fixture_system
+
+
+class IndexTests(unittest.TestCase):
+    """
+    The id, reference and name indexes are kept up to date as nodes change rather than rebuilt,
+    so after each change they should match indexes built from scratch from the tree as it is now.
+    """
+
+    def setUp(self):
+        self.system = load_fixture_system()
+        self.catalogue = get_file(self.system, "Test.cat")
+        self.game_system = get_file(self.system, "Test.gst")
+
+    def assertIndexesMatchTree(self, old_ids: list[str] = ()):
+        """
+        :param old_ids: Ids that may no longer be in the tree, to check nothing is still indexed under them.
+        """
+        system = self.system
+        live_nodes = [node for file in system.files for node in file.root_node.iter_subtree()]
+
+        nodes_with_ids = [node for node in live_nodes if node.id]
+        self.assertCountEqual(nodes_with_ids, list(system.nodes_with_ids))
+        for node_id in {node.id for node in nodes_with_ids} | set(old_ids):
+            self.assertCountEqual([node for node in nodes_with_ids if node.id == node_id],
+                                  list(system.nodes_with_ids.get_all_by_id(node_id)), node_id)
+        for file in system.files:
+            self.assertCountEqual([node for node in file.root_node.iter_subtree() if node.id],
+                                  list(file.nodes_with_ids), file.name)
+            for node in file.nodes_with_ids:
+                self.assertIs(file, node.system_file)
+
+        references = {}
+        for node in live_nodes:
+            for attribute in REFERENCE_ATTRIBUTES:
+                value = node.attrib.get(attribute)
+                if could_be_id(value):
+                    references.setdefault(value, set()).add(node)
+        for node_id in references.keys() | set(old_ids):
+            self.assertCountEqual(references.get(node_id, []), list(system.references.get(node_id)), node_id)
+
+        for tag, name_indexes in system.name_indexes.items():
+            for name_index in name_indexes:
+                rebuilt_index = NameIndex(name_index.condition, name_index.get_key)
+                for node in live_nodes:
+                    if node.tag == tag:
+                        rebuilt_index.add(node)
+                self.assertEqual(set(rebuilt_index.by_name), set(name_index.by_name), tag)
+                for key, node in name_index.by_name.items():
+                    self.assertIn(node, live_nodes)
+                    self.assertEqual(key, name_index.get_key(node))
+
+    def test_loaded(self):
+        self.assertIndexesMatchTree()
+        self.assertEqual("Bolter", self.system.get_node_by_id("se-bolter").name)
+        self.assertCountEqual(["il-squad-fearless", "il-sword-fearless"],
+                              [node.id for node in self.system.references.get("rule-fearless")])
+
+    def test_create(self):
+        shared_entries = self.catalogue.root_node.get_child("sharedSelectionEntries")
+        entry = shared_entries.get_or_create_child("selectionEntry", attrib={"name": "Chainsword", "type": "upgrade"})
+        info_link = entry.get_or_create_child("infoLinks").get_or_create_child("infoLink", attrib={
+            "name": "Bulky", "targetId": "rule-bulky", "type": "rule"})
+
+        self.assertIsNotNone(entry.id)  # Given a new id when created
+        self.assertIs(entry, self.system.get_node_by_id(entry.id))
+        self.assertIs(entry, self.catalogue.nodes_with_ids.get_by_id(entry.id))
+        self.assertIs(entry, self.system.wargear_by_name["chainsword"])
+        self.assertIn(info_link, self.system.references.get("rule-bulky"))
+        self.assertIndexesMatchTree()
+
+    def test_update(self):
+        sword = self.system.get_node_by_id("se-sword")
+        sword.update_attributes({"name": "Relic Blade"})
+        self.assertIs(sword, self.system.wargear_by_name["relic blade"])
+        self.assertNotIn("power sword", self.system.wargear_by_name)
+
+        sword.update_attributes({"id": "se-relic-blade"})
+        self.assertIsNone(self.system.get_node_by_id("se-sword"))
+        self.assertIs(sword, self.system.get_node_by_id("se-relic-blade"))
+
+        info_link = self.system.get_node_by_id("il-sword-fearless")
+        info_link.update_attributes({"targetId": "rule-bulky"})
+        self.assertNotIn(info_link, self.system.references.get("rule-fearless"))
+        self.assertIn(info_link, self.system.references.get("rule-bulky"))
+
+        category_link = self.system.get_node_by_id("cl-squad-hq")
+        category_link.set_target_id("cat-inf")
+        self.assertEqual([], list(self.system.references.get("cat-hq")))
+
+        grenades = self.system.get_node_by_id("se-grenades")
+        grenades.update_attributes({"id": ""})
+        self.assertNotIn(grenades, self.system.nodes_with_ids)
+        self.assertIndexesMatchTree(old_ids=["se-sword", "se-grenades"])
+
+    def test_move(self):
+        bolter_link = self.system.get_node_by_id("el-marine-bolter")
+        melee_links = self.system.get_node_by_id("seg-melee").get_child("entryLinks")
+        melee_links.move_node_to_here(bolter_link)
+        self.assertIs(melee_links, bolter_link.parent)
+        self.assertIn(bolter_link, self.system.references.get("se-bolter"))
+
+        # To another file, leaving the catalogue's sharedRules empty, so that's removed too
+        bulky = self.system.get_node_by_id("rule-bulky")
+        self.game_system.root_node.get_child("sharedRules").move_node_to_here(bulky)
+        self.assertIs(self.game_system, bulky.system_file)
+        self.assertIsNone(self.catalogue.nodes_with_ids.get_by_id("rule-bulky"))
+        self.assertIs(bulky, self.game_system.nodes_with_ids.get_by_id("rule-bulky"))
+        self.assertIs(bulky, self.system.rules_by_name["bulky"])
+        self.assertIsNone(self.catalogue.root_node.get_child("sharedRules"))
+        self.assertIndexesMatchTree()
+
+    def test_delete(self):
+        self.system.get_node_by_id("se-squad").delete()
+        for node_id in ["se-squad", "se-marine", "el-marine-bolter", "il-squad-fearless"]:
+            self.assertIsNone(self.system.get_node_by_id(node_id), node_id)
+        self.assertEqual([], list(self.system.references.get("cat-hq")))
+        self.assertEqual(["il-sword-fearless"], [node.id for node in self.system.references.get("rule-fearless")])
+        self.assertNotIn("tactical squad", self.system.wargear_by_name)
+        self.assertIndexesMatchTree(old_ids=["se-squad", "se-marine", "el-marine-bolter"])
+
+    def test_edit_deleted_node(self):
+        squad = self.system.get_node_by_id("se-squad")
+        marine = self.system.get_node_by_id("se-marine")  # Under the deleted node
+        bolter_link = self.system.get_node_by_id("el-marine-bolter")
+        squad.delete()
+        squad.update_attributes({"name": "Relic Blade", "id": "se-squad-2"})
+        marine.update_attributes({"id": "", "name": "Bolter"})
+        marine.update_attributes({"id": "se-marine-2"})
+        bolter_link.update_attributes({"targetId": "se-sword"})
+        bolter_link.set_target_id("se-grenades")
+        for node_id in ["se-squad-2", "se-marine-2"]:
+            self.assertIsNone(self.system.get_node_by_id(node_id), node_id)
+        self.assertNotIn("relic blade", self.system.wargear_by_name)
+        self.assertIs(self.system.get_node_by_id("se-bolter"), self.system.wargear_by_name["bolter"])
+        self.assertEqual(["el-melee-sword"], [node.id for node in self.system.references.get("se-sword")])
+        self.assertEqual([], list(self.system.references.get("se-grenades")))
+        self.assertIndexesMatchTree(old_ids=["se-squad", "se-squad-2", "se-marine", "se-marine-2"])
+
+    def test_duplicate_ids(self):
+        bolter = self.system.get_node_by_id("se-bolter")
+        shared_entries = self.catalogue.root_node.get_child("sharedSelectionEntries")
+        duplicate = shared_entries.get_or_create_child("selectionEntry", attrib={"name": "Bolter Copy"})
+        duplicate.update_attributes({"id": "se-bolter"})
+        self.assertCountEqual([bolter, duplicate],
+                              list(self.system.nodes_with_ids.get_duplicate_ids()["se-bolter"]))
+
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            self.assertIs(bolter, self.system.get_node_by_id("se-bolter"))  # The first in the file
+            self.system.get_node_by_id("se-bolter")
+        self.assertEqual(1, output.getvalue().count("se-bolter is used by 2 nodes"))  # Reported once
+        self.assertIndexesMatchTree()
+
+        duplicate.delete()
+        self.assertEqual({}, self.system.nodes_with_ids.get_duplicate_ids())
+        self.assertIs(bolter, self.system.get_node_by_id("se-bolter"))
+        self.assertIndexesMatchTree()
+
+
+if __name__ == '__main__':
+    unittest.main()
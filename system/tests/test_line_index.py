@@ -0,0 +1,45 @@
+import unittest
+
+from system.tests.fixture_system import get_file, load_fixture_system
+
+
+class LineIndexTests(unittest.TestCase):
+    """
+    LineIndex looks nodes up by line with a binary search, so should give the same nodes as checking every node.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.system = load_fixture_system({"diff": True})
+
+    def test_matches_every_node_checked(self):
+        for file in self.system.files:
+            nodes = list(file.root_node.iter_subtree())
+            line_count = max(node.end_line_number or node.start_line_number for node in nodes)
+            for line_number in range(line_count + 2):
+                with self.subTest(file.name, line_number=line_number):
+                    starting = [node for node in nodes if node.start_line_number == line_number]
+                    self.assertIs(starting[0] if len(starting) == 1 else None,
+                                  file.line_index.get_node_starting_at(line_number))
+
+                    enclosing = [node for node in nodes if node.start_line_number <= line_number
+                                 <= (node.end_line_number or node.start_line_number)]
+                    self.assertIs(enclosing[-1] if enclosing else None,
+                                  file.line_index.get_enclosing_node(line_number))
+
+    def test_nodes_starting_on_the_same_line(self):
+        catalogue = get_file(self.system, "Test.cat")
+        costs = self.system.get_node_by_id("se-grenades").get_child("costs")
+        cost = costs.get_child("cost")
+        self.assertEqual(costs.start_line_number, cost.start_line_number)
+        self.assertIsNone(catalogue.line_index.get_node_starting_at(costs.start_line_number))
+        self.assertIs(cost, catalogue.line_index.get_enclosing_node(cost.start_line_number))
+
+    def test_multi_line_text(self):
+        comment = self.system.get_node_by_id("rule-bulky").get_child("comment")
+        catalogue = get_file(self.system, "Test.cat")
+        self.assertIs(comment, catalogue.line_index.get_enclosing_node(comment.start_line_number + 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import glob
+import os
+import unittest
+from xml.etree import ElementTree as ET
+from xml.parsers import expat
+
+from system.line_numbering_parser import read_line_numbers
+from system.tests.fixture_system import FIXTURES_DIRECTORY
+
+# Line breaks in attributes, text, comments and CDATA, and elements opening and closing on the same line
+TRICKY_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<!-- A comment
+over two lines -->
+<root xmlns="http://www.battlescribe.net/schema/catalogueSchema">
+  <a name="one
+two"><b/><c>text</c></a>
+  <?processing instruction?>
+  <d><![CDATA[
+  <not-an-element/>
+  ]]></d>
+  <e
+    id="split-tag"
+  />
+</root>
+"""
+
+
+def read_line_numbers_from_tree(source: bytes) -> list[tuple[int, int, str]]:
+    """
+    The line numbers as the old LineNumberingParser set them, from expat's position as each element is built,
+    with the tags to check they line up with the elements of the usual parser.
+    """
+    builder = ET.TreeBuilder()
+    parser = expat.ParserCreate(namespace_separator="}")
+    line_numbers = {}
+
+    def start(tag, attributes):
+        element = builder.start(tag, attributes)
+        line_numbers[element] = [parser.CurrentLineNumber, None]
+
+    def end(tag):
+        element = builder.end(tag)
+        line_numbers[element][1] = parser.CurrentLineNumber
+
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.Parse(source, True)
+    # expat gives namespaced tags as namespace}tag, where ElementTree has {namespace}tag
+    return [(*line_numbers[element], "{" + element.tag if "}" in element.tag else element.tag)
+            for element in builder.close().iter()]
+
+
+class LineNumberTests(unittest.TestCase):
+
+    def assertMatchesTree(self, source: bytes):
+        expected = read_line_numbers_from_tree(source)
+        root = ET.fromstring(source)
+        self.assertEqual([tag for _, _, tag in expected], [element.tag for element in root.iter()])
+        self.assertEqual([(start, end) for start, end, _ in expected], read_line_numbers(source))
+
+    def test_fixture_files(self):
+        paths = [path for extension in ["cat", "gst"]
+                 for path in glob.glob(os.path.join(FIXTURES_DIRECTORY, "**", f"*.{extension}"), recursive=True)]
+        self.assertTrue(paths)
+        for path in paths:
+            with self.subTest(os.path.basename(path)):
+                with open(path, 'rb') as f:
+                    source = f.read()
+                self.assertMatchesTree(source)
+                self.assertEqual(read_line_numbers(source), read_line_numbers(path))
+
+    def test_tricky_xml(self):
+        self.assertMatchesTree(TRICKY_XML)
+        self.assertEqual([(4, 14), (5, 6), (6, 6), (6, 6), (8, 10), (11, 13)], read_line_numbers(TRICKY_XML))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+from xml.etree import ElementTree as ET
+
+from system.constants import SystemSettingsKeys
+from system.system import System
+from system.tests.fixture_system import load_fixture_system
+
+
+def describe_system(system: System) -> list:
+    """
+    Everything loading sets up: the trees, and each node with where it is and what it's indexed by.
+    """
+    return [(file.name, ET.tostring(file.source_tree.getroot()),
+             [(node.path, node.tag, node.id, node.name, node.target_id, node.type_name, node.shared,
+               node.is_base_level, node.parent.path if node.parent else None)
+              for node in file.all_nodes])
+            for file in system.files]
+
+
+class ParallelLoaderTests(unittest.TestCase):
+
+    def test_parallel_load_matches_serial(self):
+        serial_system = load_fixture_system()
+        parallel_system = load_fixture_system({SystemSettingsKeys.LOAD_WORKERS: 2})
+        self.assertEqual(describe_system(serial_system), describe_system(parallel_system))
+        self.assertEqual([node.path for node in serial_system.nodes_with_ids],
+                         [node.path for node in parallel_system.nodes_with_ids])
+        for name_index in ["rules_by_name", "wargear_by_name", "categories"]:
+            self.assertEqual(sorted(getattr(serial_system, name_index)), sorted(getattr(parallel_system, name_index)))
+        self.assertEqual([node.path for node in serial_system.references.get("rule-fearless")],
+                         [node.path for node in parallel_system.references.get("rule-fearless")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+
+from system.constants import SystemSettingsKeys
+from system.tests.fixture_system import load_fixture_system
+
+# query arguments, and the filter they replace
+QUERY_CASES = [
+    ({}, lambda node: True),
+    ({'tag': 'selectionEntry'}, lambda node: node.tag == 'selectionEntry'),
+    ({'tag': 'selectionEntry', 'type_name': 'model'}, lambda node: node.type == "selectionEntry:model"),
+    ({'tag': 'profile', 'type_name': 'Weapon'}, lambda node: node.type == "profile:Weapon"),
+    ({'type_name': 'upgrade', 'shared': True}, lambda node: node.type_name == 'upgrade' and node.shared),
+    ({'tag': 'rule', 'shared': True, 'condition': lambda node: node.name},
+     lambda node: node.tag == 'rule' and node.shared and node.name),
+    ({'tag': 'selectionEntry', 'shared': True, 'name_ci': "power SWORD"},
+     lambda node: node.tag == 'selectionEntry' and node.shared and node.name.lower() == "power sword"),
+    ({'name': "Fearless"}, lambda node: node.name == "Fearless"),
+    ({'name': "fearless"}, lambda node: node.name == "fearless"),
+    ({'name_ci': "FEARLESS"}, lambda node: node.name is not None and node.name.lower() == "fearless"),
+    ({'tag': 'entryLink', 'condition': lambda node: node.target_id == 'se-bolter'},
+     lambda node: node.tag == 'entryLink' and node.target_id == 'se-bolter'),
+    ({'tag': 'categoryEntry', 'shared': False}, lambda node: node.tag == 'categoryEntry' and not node.shared),
+    ({'tag': 'missingTag'}, lambda node: node.tag == 'missingTag'),
+]
+
+
+def get_paths(nodes) -> list[str]:
+    return [f"{node.system_file.name}: {node.path}" for node in nodes]
+
+
+class QueryTests(unittest.TestCase):
+    """
+    System.query should give the same nodes, in the same order, as filtering every node with an id,
+    and the same in lazy mode as when every node is built up front.
+    """
+
+    def setUp(self):
+        self.system = load_fixture_system()
+
+    def assertQueriesMatchFilters(self, system):
+        for query_arguments, filter_condition in QUERY_CASES:
+            with self.subTest(str(query_arguments)):
+                self.assertEqual(list(system.nodes_with_ids.filter(filter_condition)),
+                                 list(system.query(**query_arguments)))
+
+    def test_query_matches_filter(self):
+        self.assertQueriesMatchFilters(self.system)
+        self.assertEqual(["se-sword"], [node.id for node in self.system.query(
+            tag='selectionEntry', shared=True, name_ci="power sword")])
+
+    def test_query_after_changes(self):
+        sword = self.system.get_node_by_id("se-sword")
+        sword.update_attributes({"name": "Fearless", "type": "model"})
+        shared_entries = self.system.get_node_by_id("se-bolter").parent
+        shared_entries.get_or_create_child("selectionEntry", attrib={"name": "Fearless", "type": "upgrade"})
+        self.system.get_node_by_id("rule-bulky").delete()
+        self.assertQueriesMatchFilters(self.system)
+        self.assertEqual([], list(self.system.query(name_ci="power sword")))
+        self.assertEqual([], list(self.system.query(tag='rule', name="Bulky")))
+
+    def test_lazy_query_matches_eager(self):
+        for query_arguments, _ in QUERY_CASES:
+            with self.subTest(str(query_arguments)):
+                # A new lazy system each time, as what a query builds depends on what was built before it
+                lazy_system = load_fixture_system({SystemSettingsKeys.LAZY_NODES: True})
+                self.assertEqual(get_paths(self.system.query(**query_arguments)),
+                                 get_paths(lazy_system.query(**query_arguments)))
+
+
+if __name__ == '__main__':
+    unittest.main()
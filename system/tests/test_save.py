@@ -0,0 +1,94 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from system.constants import SystemSettingsKeys
+from system.tests.fixture_system import FIXTURE_SYSTEM_NAME, get_file, load_fixture_system_copy
+
+OLD_MTIME_NS = 1_000_000_000_000_000_000
+
+
+class SaveTests(unittest.TestCase):
+    """
+    save_system only writes the files with changes, which nodes mark as they're changed.
+    """
+
+    def setUp(self):
+        data_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(data_directory.cleanup)
+        self.system = load_fixture_system_copy(data_directory.name)
+        self.paths = {file.name: file.path for file in self.system.files}
+        self.save()  # Removes the fixture's errors from the previous run, so the files start clean
+
+    def save(self) -> list[str]:
+        """
+        :return: Names of the files written
+        """
+        for path in self.paths.values():
+            os.utime(path, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.system.save_system()
+        return sorted(name for name, path in self.paths.items() if os.stat(path).st_mtime_ns != OLD_MTIME_NS)
+
+    def test_unchanged_files_not_written(self):
+        self.assertEqual([], self.save())
+        self.system.get_node_by_id("se-bolter").name  # Reading doesn't count as a change
+        self.assertEqual([], self.save())
+
+    def test_changed_file_written(self):
+        self.system.get_node_by_id("rule-fearless").update_attributes({"name": "Stubborn"})
+        self.assertEqual(["Test.gst"], self.save())
+        with open(self.paths["Test.gst"], encoding='utf-8') as f:
+            self.assertIn('name="Stubborn"', f.read())
+
+        self.system.get_node_by_id("rule-bulky").set_rules_text("Takes up even more room.")
+        self.system.get_node_by_id("el-marine-bolter").set_target_id("se-sword")
+        self.assertEqual(["Test.cat"], self.save())
+
+    def test_move_between_files_writes_both(self):
+        bulky = self.system.get_node_by_id("rule-bulky")
+        get_file(self.system, "Test.gst").root_node.get_child("sharedRules").move_node_to_here(bulky)
+        self.assertEqual(["Test.cat", "Test.gst"], self.save())
+        self.assertEqual([], self.save())
+
+    def test_previous_errors_written_out(self):
+        with tempfile.TemporaryDirectory() as data_directory:
+            system = load_fixture_system_copy(data_directory)
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                system.save_system()
+            self.assertIn("Saved 1 of 2 files: Test.cat", output.getvalue())  # Only the catalogue had old errors
+
+    def test_failed_write_leaves_file_intact(self):
+        with open(self.paths["Test.gst"], 'rb') as f:
+            original = f.read()
+        self.system.get_node_by_id("rule-fearless").update_attributes({"name": "Stubborn"})
+        with mock.patch("util.bs_xml_writer.os.replace", side_effect=OSError("Disk full")):
+            with self.assertRaises(OSError), contextlib.redirect_stdout(io.StringIO()):
+                self.system.save_system()
+        with open(self.paths["Test.gst"], 'rb') as f:
+            self.assertEqual(original, f.read())
+        directory = os.path.dirname(self.paths["Test.gst"])
+        self.assertEqual([], [name for name in os.listdir(directory) if name.endswith(".tmp")])
+
+    def test_parallel_save_matches_serial(self):
+        written = []
+        for settings in [None, {SystemSettingsKeys.SAVE_WORKERS: 2}]:
+            with tempfile.TemporaryDirectory() as data_directory:
+                system = load_fixture_system_copy(data_directory, settings)
+                system.get_node_by_id("rule-fearless").update_attributes({"name": "Stubborn"})
+                system.get_node_by_id("rule-bulky").set_rules_text("Takes up even more room.")
+                with contextlib.redirect_stdout(io.StringIO()):
+                    system.save_system()
+                contents = {}
+                for file in system.files:
+                    with open(file.path, 'rb') as f:
+                        contents[file.name] = f.read()
+                written.append(contents)
+        self.assertEqual(written[0], written[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
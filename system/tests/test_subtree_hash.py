@@ -0,0 +1,58 @@
+import unittest
+
+from system.tests.fixture_system import get_file, load_fixture_system
+
+# Changes through Node methods, each of which should drop the cached hashes it makes stale
+CHANGES = {
+    "update_attributes": lambda system: system.get_node_by_id("se-sword").update_attributes({"name": "Relic Blade"}),
+    "text": lambda system: setattr(system.get_node_by_id("rule-bulky").get_child("description"), "text", "Roomy."),
+    "set_rules_text": lambda system: system.get_node_by_id("rule-bulky").set_rules_text("Takes up even more room."),
+    "set_target_id": lambda system: system.get_node_by_id("el-marine-bolter").set_target_id("se-sword"),
+    "get_or_create_child": lambda system: system.get_node_by_id("se-grenades").get_or_create_child("profiles"),
+    "delete": lambda system: system.get_node_by_id("il-sword-fearless").delete(),
+    "move_node_to_here": lambda system: system.get_node_by_id("seg-melee").get_child("entryLinks").move_node_to_here(
+        system.get_node_by_id("el-marine-bolter")),
+    "append_error_comment": lambda system: system.get_node_by_id("se-bolter").append_error_comment("Test error"),
+}
+
+HASH_OPTIONS = [(False, False, False), (True, True, True)]
+
+
+def get_root_hashes(system, options) -> dict[str, str]:
+    return {file.name: file.root_node.get_subtree_hash(*options) for file in system.files}
+
+
+class SubtreeHashTests(unittest.TestCase):
+    """
+    Subtree hashes are cached, so after a change the cached hashes should match hashes worked out from scratch.
+    """
+
+    def test_changes_invalidate_hashes(self):
+        for change_name, change in CHANGES.items():
+            for options in HASH_OPTIONS:
+                with self.subTest(change_name, options=options):
+                    system = load_fixture_system()
+                    system.build_all_nodes()
+                    hashes_before = get_root_hashes(system, options)
+                    change(system)
+                    cached_hashes = get_root_hashes(system, options)
+
+                    for file in system.files:
+                        for node in file.root_node.iter_subtree():
+                            node._subtree_hashes = None
+                    self.assertEqual(get_root_hashes(system, options), cached_hashes)
+                    if not (change_name == "append_error_comment" and options[1]):  # Unless comments are ignored
+                        self.assertNotEqual(hashes_before, cached_hashes)
+
+    def test_unchanged_subtree_keeps_hash(self):
+        system = load_fixture_system()
+        bolter = system.get_node_by_id("se-bolter")
+        bolter_hash = bolter.get_subtree_hash()
+        get_file(system, "Test.cat").root_node.get_subtree_hash()
+        system.get_node_by_id("se-sword").update_attributes({"name": "Relic Blade"})
+        self.assertIsNotNone(bolter._subtree_hashes)
+        self.assertEqual(bolter_hash, bolter.get_subtree_hash())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from xml.etree import ElementTree as ET
+
+from system.constants import SystemSettingsKeys
+from system.system import System
+from system.tests.fixture_system import FIXTURE_SYSTEM_NAME, load_fixture_system_copy
+from system.tree_cache import get_cache_path, load_cached_tree
+
+
+class TreeCacheTests(unittest.TestCase):
+    """
+    A copy of the fixture system in a temporary directory, with its cache in another.
+    """
+
+    def setUp(self):
+        data_directory = tempfile.TemporaryDirectory()
+        cache_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(data_directory.cleanup)
+        self.addCleanup(cache_directory.cleanup)
+        self.data_directory = data_directory.name
+        self.cache_directory = cache_directory.name
+        self.system = load_fixture_system_copy(self.data_directory,
+                                               {SystemSettingsKeys.CACHE_DIRECTORY: self.cache_directory})
+        self.path = os.path.join(self.data_directory, FIXTURE_SYSTEM_NAME, "Test.cat")
+
+    def test_loaded_from_cache(self):
+        for file in self.system.files:
+            self.assertTrue(os.path.isfile(get_cache_path(self.cache_directory, file.path)), file.name)
+        tree = load_cached_tree(self.cache_directory, self.path)
+        self.assertEqual(ET.tostring(ET.parse(self.path).getroot()), ET.tostring(tree.getroot()))
+
+    def test_changed_file_not_loaded(self):
+        stat = os.stat(self.path)
+        with open(self.path, 'rb') as f:
+            content = f.read()
+        # Same size and mtime, as from an edit within the same second
+        with open(self.path, 'wb') as f:
+            f.write(content.replace(b'name="Bolter"', b'name="Boltar"'))
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertIsNone(load_cached_tree(self.cache_directory, self.path))
+
+        with open(self.path, 'wb') as f:
+            f.write(content + b"\n")
+        self.assertIsNone(load_cached_tree(self.cache_directory, self.path))
+
+        with open(self.path, 'wb') as f:
+            f.write(content)
+        self.assertIsNotNone(load_cached_tree(self.cache_directory, self.path))  # Back to what was cached
+
+    def test_entry_dropped_on_save(self):
+        self.system.get_node_by_id("se-bolter").update_attributes({"name": "Heavy Bolter"})
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.system.save_system()
+        self.assertFalse(os.path.exists(get_cache_path(self.cache_directory, self.path)))
+        gst_path = os.path.join(self.data_directory, FIXTURE_SYSTEM_NAME, "Test.gst")
+        self.assertTrue(os.path.isfile(get_cache_path(self.cache_directory, gst_path)))  # Not saved, so kept
+
+    def test_corrupt_entry_parsed_again(self):
+        cache_path = get_cache_path(self.cache_directory, self.path)
+        with open(cache_path, 'rb') as f:
+            entry = f.read()
+        for corrupt_entry in [b"", b"not marshal", entry[:len(entry) // 2]]:
+            with self.subTest(corrupt_entry[:20]):
+                with open(cache_path, 'wb') as f:
+                    f.write(corrupt_entry)
+                self.assertIsNone(load_cached_tree(self.cache_directory, self.path))
+                with contextlib.redirect_stdout(io.StringIO()):
+                    system = System(FIXTURE_SYSTEM_NAME, self.data_directory, settings=self.system.settings)
+                self.assertEqual("Bolter", system.get_node_by_id("se-bolter").name)
+                self.assertIsNotNone(load_cached_tree(self.cache_directory, self.path))  # Written again
+
+
+if __name__ == '__main__':
+    unittest.main()
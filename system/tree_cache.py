@@ -0,0 +1,94 @@
+import hashlib
+import marshal
+import os
+from xml.etree import ElementTree as ET
+
+# Bump when the layout of cache entries changes, so old entries are ignored.
+CACHE_VERSION = 2
+
+
+def flatten_tree(root: ET.Element) -> list[tuple]:
+    """
+    Flatten a tree into (parent index, tag, attrib, text, tail) tuples in document order.
+    This is both quicker to marshal and quicker to turn back into Elements than pickling the Elements themselves.
+    """
+    flat_elements = []
+    stack = [(root, -1)]
+    while stack:
+        element, parent_index = stack.pop()
+        flat_elements.append((parent_index, element.tag, element.attrib, element.text, element.tail))
+        index = len(flat_elements) - 1
+        stack.extend((child, index) for child in reversed(element))
+    return flat_elements
+
+
+def rebuild_tree(flat_elements: list[tuple]) -> ET.ElementTree:
+    elements = []
+    make_element = ET.Element
+    make_sub_element = ET.SubElement
+    for parent_index, tag, attrib, text, tail in flat_elements:
+        if parent_index < 0:
+            element = make_element(tag, attrib)
+        else:
+            element = make_sub_element(elements[parent_index], tag, attrib)
+        element.text = text
+        element.tail = tail
+        elements.append(element)
+    return ET.ElementTree(elements[0])
+
+
+def get_file_hash(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def get_cache_path(cache_directory: str, path: str) -> str:
+    path = os.path.abspath(path)
+    system_name = os.path.basename(os.path.dirname(path))
+    path_hash = hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]  # In case two data directories share a system
+    return os.path.join(cache_directory, f"{system_name}-{path_hash}", os.path.basename(path) + ".marshal")
+
+
+def load_cached_tree(cache_directory: str, path: str) -> ET.ElementTree or None:
+    """
+    Get the tree for path from the cache, if the file is unchanged since it was cached.
+    The content is always hashed rather than trusting the mtime, which an edit within the same second or a checkout
+    may leave the same. Hashing takes a few milliseconds for a large catalogue, a small part of loading the entry.
+    :return: The tree, or None if it needs to be parsed.
+    """
+    cache_path = get_cache_path(cache_directory, path)
+    if not os.path.isfile(cache_path):
+        return None
+    try:
+        with open(cache_path, 'rb') as f:
+            # The header is its own marshal object, so stale entries are rejected without loading the tree.
+            version, cached_path, size, file_hash = marshal.load(f)
+            if version != CACHE_VERSION or cached_path != os.path.abspath(path) or size != os.path.getsize(path):
+                return None
+            if file_hash != get_file_hash(path):
+                return None
+            return rebuild_tree(marshal.loads(f.read()))  # Much quicker than marshal.load for large objects
+    except (EOFError, ValueError, TypeError, IndexError):
+        return None  # Partially written or otherwise unreadable entry, it will be overwritten.
+
+
+def store_cached_tree(cache_directory: str, path: str, tree: ET.ElementTree, flat_elements: list[tuple] = None):
+    """
+    Cache the tree for path. This must be called with the tree as it was parsed, before any nodes modify it.
+    """
+    if flat_elements is None:
+        flat_elements = flatten_tree(tree.getroot())
+    cache_path = get_cache_path(cache_directory, path)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    header = (CACHE_VERSION, os.path.abspath(path), os.path.getsize(path), get_file_hash(path))
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        marshal.dump(header, f)
+        marshal.dump(flat_elements, f)
+    os.replace(temp_path, cache_path)  # Never leave a half written entry in place
+
+
+def remove_cached_tree(cache_directory: str, path: str):
+    cache_path = get_cache_path(cache_directory, path)
+    if os.path.isfile(cache_path):
+        os.remove(cache_path)
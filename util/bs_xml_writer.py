@@ -0,0 +1,212 @@
+import os
+import threading
+from xml.etree import ElementTree as ET
+
+from util.generate_util import cleanup_file_match_bs_whitespace
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'  # Files start with this line always
+INDENT = "  "
+
+_namespace_registry_lock = threading.Lock()
+
+
+class UnsupportedForStreaming(Exception):
+    """
+    The tree has something the streaming writer doesn't handle (comments, processing instructions,
+    other namespaces), so it has to go through ElementTree and cleanup_file_match_bs_whitespace instead.
+    """
+    pass
+
+
+def escape_text(text: str) -> str:
+    """
+    Escape text and tails the way ElementTree does, plus what cleanup_file_match_bs_whitespace changes afterwards.
+    """
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    if "'" in text:
+        text = text.replace("'", "&apos;")
+    if '"' in text:
+        text = text.replace('"', "&quot;")
+    if "\xa0" in text:
+        text = text.replace("\xa0", " ")  # Strip NBSP (as NR does on save now)
+    if "\r" in text:
+        # Reading the file back in text mode used to turn these into newlines.
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def escape_attribute(value: str) -> str:
+    """
+    Escape an attribute value the way ElementTree does, plus what cleanup_file_match_bs_whitespace changes afterwards.
+    """
+    if "&" in value:
+        value = value.replace("&", "&amp;")
+    if "<" in value:
+        value = value.replace("<", "&lt;")
+    if ">" in value:
+        value = value.replace(">", "&gt;")
+    if '"' in value:
+        value = value.replace('"', "&quot;")
+    if "\r" in value:
+        value = value.replace("\r", "&#13;")
+    if "\n" in value:
+        value = value.replace("\n", "&#10;")
+    if "\t" in value:
+        value = value.replace("\t", "&#09;")
+    if "'" in value:
+        value = value.replace("'", "&apos;")
+    if "\xa0" in value:
+        value = value.replace("\xa0", " ")
+    return value
+
+
+def serialize_bs_xml(root: ET.Element, namespace: str) -> str:
+    """
+    Serialize a tree to a string matching what ET.indent, ET.write and cleanup_file_match_bs_whitespace produce,
+    with the namespace as the default namespace, in a single pass.
+    Like ET.indent, this sets the whitespace text and tails of the tree to the indentation.
+    :raises UnsupportedForStreaming: If the tree needs to be written the old way.
+    """
+    try:
+        return _serialize(root, namespace)
+    except TypeError as e:  # Non-string text or attributes
+        raise UnsupportedForStreaming(str(e))
+
+
+def _serialize(root: ET.Element, namespace: str) -> str:
+    namespace_prefix = "{" + namespace + "}"
+    uses_namespace = False
+    tags = {}  # tag: tag as written
+    attribute_starts = {}  # key: ' key="'
+    escaped_values = {}  # value: escaped value and closing quote. Most repeat (ids, "false", "0.0"), so escape once.
+    indentations = ["\n", "\n" + INDENT]
+
+    def get_tag(element):
+        nonlocal uses_namespace
+        tag = element.tag
+        if not isinstance(tag, str):
+            raise UnsupportedForStreaming(f"Cannot stream {tag}")  # Comments and processing instructions
+        if tag.startswith(namespace_prefix):
+            uses_namespace = True
+            tags[tag] = tag[len(namespace_prefix):]
+        elif tag.startswith("{"):
+            raise UnsupportedForStreaming(f"Cannot stream {tag}, which is not in {namespace}")
+        else:
+            tags[tag] = tag
+        return tags[tag]
+
+    def get_attribute_start(key):
+        if key.startswith("{"):
+            raise UnsupportedForStreaming(f"Cannot stream namespaced attribute {key}")
+        attribute_starts[key] = ' ' + key + '="'
+        return attribute_starts[key]
+
+    parts = [XML_HEADER]
+    append = parts.append
+    get_written_tag = tags.get
+    get_attribute_start_cached = attribute_starts.get
+    get_escaped_value = escaped_values.get
+
+    tag = tags.get(root.tag) or get_tag(root)
+    append("<" + tag)
+    root_attributes_index = len(parts)  # The namespace declaration goes before the root's attributes
+    append("")
+    for key, value in root.attrib.items():
+        append((attribute_starts.get(key) or get_attribute_start(key)) + escape_attribute(value) + '"')
+    if len(root):
+        if not root.text or not root.text.strip():
+            root.text = indentations[1]
+        append(">" + escape_text(root.text))
+        stack = [(root, iter(root), 1, tag)]  # (element, its remaining children, level of children, tag)
+    elif root.text:
+        append(">" + escape_text(root.text) + "</" + tag + ">")
+        stack = []
+    else:
+        append("/>")
+        stack = []
+
+    while stack:
+        parent, children, level, parent_tag = stack[-1]
+        indentation = indentations[level]
+        for child in children:
+            tag = get_written_tag(child.tag) or get_tag(child)
+            append("<" + tag)
+            for key, value in child.attrib.items():
+                escaped = get_escaped_value(value)
+                if escaped is None:
+                    escaped = escaped_values[value] = escape_attribute(value) + '"'
+                append((get_attribute_start_cached(key) or get_attribute_start(key)) + escaped)
+
+            if len(child):
+                if not child.text or not child.text.strip():
+                    if len(indentations) <= level + 1:
+                        indentations.append(indentation + INDENT)
+                    child.text = indentations[level + 1]
+                append(">" + escape_text(child.text))
+                stack.append((child, iter(child), level + 1, tag))
+                break  # Carry on with this parent's children once the child's are written
+
+            if child.text:
+                append(">" + escape_text(child.text) + "</" + tag + ">")
+            else:
+                append("/>")  # No space before the slash, as BattleScribe writes it
+            tail = child.tail
+            if not tail or not tail.strip():
+                child.tail = indentation
+                append(indentation)
+            else:
+                append(escape_text(tail))
+        else:
+            # All children written, so parts[-1] is the last child's tail. Dedent it, as ET.indent does.
+            stack.pop()
+            last_child = parent[-1]
+            if not last_child.tail.strip():
+                last_child.tail = indentations[level - 1]
+                parts[-1] = last_child.tail
+            append("</" + parent_tag + ">")
+            if parent is not root:
+                tail = parent.tail
+                if not tail or not tail.strip():
+                    parent.tail = indentations[level - 1]
+                    append(parent.tail)
+                else:
+                    append(escape_text(tail))
+
+    if root.tail:  # ET.indent leaves the root's tail alone
+        append(escape_text(root.tail))
+    if uses_namespace:
+        parts[root_attributes_index] = ' xmlns="' + escape_attribute(namespace) + '"'
+    if not parts[-1].endswith("\n"):
+        append("\n")  # Newline at end of file, if not from tag tail
+    return "".join(parts)
+
+
+def write_bs_xml(tree: ET.ElementTree, path: str, namespace: str):
+    """
+    Write a tree the way BattleScribe would.
+    The file is written next to path then renamed over it, so an interrupted save never leaves a half written file.
+    """
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        try:
+            content = serialize_bs_xml(tree.getroot(), namespace)
+        except UnsupportedForStreaming:
+            # ElementTree only writes a default namespace from the global registry, so other threads have to wait.
+            with _namespace_registry_lock:
+                ET.register_namespace("", namespace)
+                ET.indent(tree)
+                # utf-8 to keep special characters un-escaped.
+                tree.write(temp_path, encoding="utf-8")
+            cleanup_file_match_bs_whitespace(temp_path)
+        else:
+            with open(temp_path, 'w', encoding="utf-8") as f:
+                f.write(content)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
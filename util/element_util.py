@@ -29,6 +29,23 @@ def get_tag(element):
     return tag
 
 
+def iter_element_events(root: ET.Element):
+    """
+    Go through an already parsed tree the same way ET.iterparse goes through a file with events=('start', 'end').
+    """
+    yield 'start', root
+    stack = [(root, iter(root))]
+    while stack:
+        element, children = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            yield 'end', element
+            continue
+        yield 'start', child
+        stack.append((child, iter(child)))
+
+
 elements_that_get_id = [
     'entryLink', 'categoryLink', 'constraint', 'selectionEntry', 'rule', 'profile', 'infoLink', 'selectionEntryGroup',
     'catalogueLink', 'categoryEntry', 'publication', 'profileType', 'characteristicType',
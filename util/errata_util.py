@@ -1,6 +1,5 @@
 from util.log_util import print_styled, STYLES, get_diff, style_text
-from util.element_util import get_description, update_page_and_pub
-from util.system_util import find_similar_items, get_node_from_system, remove_node
+from util.system_util import find_similar_items, get_node_from_system, remove_node, update_node_page_and_pub
 from util.system_globals import rules_list
 from util.text_utils import get_bullet_type, column_text_to_paragraph_text
 
@@ -43,7 +42,7 @@ def handle_special_rules_errata(change, mode, page, pub):
         options = find_similar_items(rules_list.keys(), target, similarity_threshold=1)
         print("Did you mean? " + " or ".join(options.keys()))
         exit()
-    description = get_description(node_to_errata)
+    description = node_to_errata.get_child('description')
     existing_text = description.text
     # Check existing text isn't already in statement
     check_text = new_text
@@ -76,7 +75,7 @@ def handle_special_rules_errata(change, mode, page, pub):
             diff = get_diff(existing_text, description.text, 2)
             print(diff)
     # Update the node's source
-    update_page_and_pub(node_to_errata, page, pub)
+    update_node_page_and_pub(node_to_errata, page, pub)
 
     # Update list of associated nodes
     change['associated_nodes'] = [rules_list[target]]
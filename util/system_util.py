@@ -1,15 +1,19 @@
 import os
 import re
+from typing import TYPE_CHECKING
 from xml.etree import ElementTree as ET
 
 import util.system_globals
 from settings import default_system, default_data_directory
 from system.system_file import set_namespace_from_file, read_categories
-from util.log_util import style_text, STYLES
+from util.log_util import print_styled, style_text, STYLES
 from util.system_globals import files_in_system, system
 from util.text_utils import cleanup_disallowed_bs_characters
 from util.generate_util import SHARED_RULES_TYPE, BS_NAMESPACES
 
+if TYPE_CHECKING:
+    from system.node import Node
+
 
 def read_system(system_name=default_system):
     game_system_location = os.path.join(default_data_directory, system_name)
@@ -77,27 +81,34 @@ def all_nodes_for_tree(source_tree: ET.ElementTree, tag=''):
     return nodes
 
 
-def get_node_from_system(node_id):
-    for source_tree in files_in_system.values():
-        node = source_tree.find(f".//*[@id='{node_id}']")
-        if node:
-            return node
+def get_node_from_system(node_id) -> 'Node' or None:
+    return system.get_node_by_id(node_id)
+
+
+def update_node_page_and_pub(node: 'Node', page, publication_id):
+    """
+    util.element_util.update_page_and_pub for a node, so the file is saved with the change.
+    """
+    if node.attrib.get('page') != page:
+        print_styled("\tUpdated page number")
+        node.update_attributes({'page': page})
+    if node.attrib.get('publicationId') != publication_id:
+        print_styled("\tUpdated publication ID")
+        node.update_attributes({'publicationId': publication_id})
 
 
 def update_links(old_node_id, new_node_id):
-    for source_tree in files_in_system.values():
-        for node in source_tree.iter(f".//*[@target_id='{old_node_id}']"):
-            node.attrib['target_id'] = new_node_id
+    for node in list(system.references.get(old_node_id)):
+        if node.target_id == old_node_id:
+            node.update_attributes({'targetId': new_node_id})
 
 
 def remove_node(node_id):
     print(style_text("UNTESTED",
                      [STYLES.BOLD, STYLES.RED]))
-    for source_tree in files_in_system.values():
-        parent_node = source_tree.find(f".//..[@id='{node_id}']")
-        node = parent_node.find(f".//*[@id='{node_id}']")
-        if node and parent_node:
-            parent_node.remove(node)
+    node = system.get_node_by_id(node_id)
+    if node is not None:
+        node.delete()
 
 
 def save_system():
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+from xml.etree import ElementTree as ET
+
+from util.bs_xml_writer import UnsupportedForStreaming, serialize_bs_xml, write_bs_xml
+from util.generate_util import cleanup_file_match_bs_whitespace
+
+NAMESPACE = "http://www.battlescribe.net/schema/catalogueSchema"
+
+# Quotes, apostrophes, ampersands, angle brackets, tabs, CRLF and NBSP in attributes, text and tails,
+# with empty elements, elements with only text, and indentation that needs replacing.
+FIXTURE_XML = f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<catalogue id="cat-1" name="Quotes &quot;double&quot; and 'single'" xmlns="{NAMESPACE}">
+<sharedRules>
+    <rule id="rule-1" name="Fish &amp; Chips &lt;3 &gt; tab&#9;here" page="1&#13;&#10;2">
+      <description>Line one&#13;&#10;line two&#13;"quoted" it's &amp; &lt;tag&gt; non\xa0breaking</description>
+    </rule>
+    <rule id="rule-2" name="Non\xa0breaking" hidden="false"/>
+    <rule id="rule-3" name="Mixed">Text<b>bold</b>tail &amp; "more"<i/>
+    </rule>
+  </sharedRules>
+  <sharedSelectionEntries/>
+</catalogue>
+"""
+
+
+def parse_fixture() -> ET.ElementTree:
+    return ET.ElementTree(ET.fromstring(FIXTURE_XML.encode("utf-8")))
+
+
+def write_with_element_tree(tree: ET.ElementTree, path: str):
+    """
+    How files were written before serialize_bs_xml.
+    """
+    ET.register_namespace("", NAMESPACE)
+    ET.indent(tree)
+    tree.write(path, encoding="utf-8")
+    cleanup_file_match_bs_whitespace(path)
+
+
+def read(path: str) -> str:
+    with open(path, encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+class BsXmlWriterTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def get_expected(self, tree: ET.ElementTree) -> str:
+        path = os.path.join(self.directory.name, "expected.cat")
+        write_with_element_tree(tree, path)
+        return read(path)
+
+    def test_matches_element_tree(self):
+        expected = self.get_expected(parse_fixture())
+        self.assertEqual(expected, serialize_bs_xml(parse_fixture().getroot(), NAMESPACE))
+
+    def test_write_matches_element_tree(self):
+        expected = self.get_expected(parse_fixture())
+        path = os.path.join(self.directory.name, "streamed.cat")
+        write_bs_xml(parse_fixture(), path, NAMESPACE)
+        self.assertEqual(expected, read(path))
+        self.assertEqual(["expected.cat", "streamed.cat"], sorted(os.listdir(self.directory.name)))  # No temp files
+
+    def test_sets_indentation_like_element_tree(self):
+        indented = parse_fixture()
+        ET.indent(indented)
+        streamed = parse_fixture()
+        serialize_bs_xml(streamed.getroot(), NAMESPACE)
+        self.assertEqual(ET.tostring(indented.getroot()), ET.tostring(streamed.getroot()))
+
+    def test_unsupported_falls_back_to_element_tree(self):
+        def add_comment(tree):
+            tree.getroot().find(f"{{{NAMESPACE}}}sharedRules").append(ET.Comment(" a comment "))
+
+        def add_other_namespace(tree):
+            ET.SubElement(tree.getroot(), "{http://example.com/other}extra")
+
+        def add_number_attribute(tree):
+            tree.getroot().set("revision", 2)
+
+        for change_tree in [add_comment, add_other_namespace, add_number_attribute]:
+            with self.subTest(change_tree.__name__):
+                tree = parse_fixture()
+                change_tree(tree)
+                with self.assertRaises(UnsupportedForStreaming):
+                    serialize_bs_xml(tree.getroot(), NAMESPACE)
+
+                if change_tree is add_number_attribute:
+                    continue  # ElementTree can't write that either
+                expected_tree = parse_fixture()
+                change_tree(expected_tree)
+                expected = self.get_expected(expected_tree)
+                path = os.path.join(self.directory.name, "fallback.cat")
+                write_bs_xml(tree, path, NAMESPACE)
+                self.assertEqual(expected, read(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
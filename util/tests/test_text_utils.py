@@ -0,0 +1,94 @@
+import random
+import unittest
+
+from util import text_utils
+from util.text_utils import get_col_dividers, get_section_heatmap, split_into_columns
+
+
+def get_section_heatmap_reference(section_text):
+    """
+    The heatmap as it was counted before, a character at a time.
+    """
+    lines = section_text.splitlines()
+    heatmap = [0] * len(max(lines, key=len))
+    for line in lines:
+        for char_index in range(len(heatmap)):
+            if char_index >= len(line) or line[char_index] == " ":
+                heatmap[char_index] += 1
+    return heatmap
+
+
+def get_col_dividers_reference(heatmap, margins=None):
+    """
+    get_col_dividers as it was before, with no array version.
+    """
+    if margins is None:
+        margins = 10
+    section_start = 0
+    longest_edge = 0
+    longest_edge_height = 0
+    for index in range(len(heatmap) - 1):
+        edge_height = heatmap[index] - heatmap[index + 1]
+        if index < margins:
+            continue
+        if edge_height > longest_edge_height:
+            longest_edge = index
+            longest_edge_height = edge_height
+    for index, item in enumerate(reversed(heatmap[:longest_edge])):
+        if item != heatmap[longest_edge]:
+            section_start = len(heatmap[:longest_edge]) - index
+            break
+    section_end = longest_edge + 1
+    if section_end - section_start < 2:
+        section_start = section_end - 2
+    return section_start, section_end
+
+
+def get_random_text(rng: random.Random, line_count: int, max_width: int) -> str:
+    return "\n".join("".join(rng.choice("ab  -") for _ in range(rng.randint(0, max_width)))
+                     for _ in range(line_count)) + "\nx"
+
+
+class HeatmapTests(unittest.TestCase):
+    """
+    The heatmap and dividers are worked out with numpy when it's installed and the page is large enough,
+    and per column in python otherwise. Either way they should match the old character at a time versions.
+    """
+
+    def test_matches_reference(self):
+        rng = random.Random(19)
+        # Small enough for the python versions, and wide enough for the numpy ones
+        for line_count, max_width in [(1, 5), (5, 20), (60, 100), (20, 400)]:
+            for _ in range(5):
+                text = get_random_text(rng, line_count, max_width)
+                with self.subTest(line_count=line_count, max_width=max_width):
+                    heatmap = get_section_heatmap(text)
+                    self.assertEqual(get_section_heatmap_reference(text), heatmap)
+                    for margins in [None, 0, 3.5, max_width / 2 - 10]:
+                        self.assertEqual(get_col_dividers_reference(heatmap, margins),
+                                         get_col_dividers(heatmap, margins))
+
+    @unittest.skipIf(text_utils.np is None, "numpy is not installed")
+    def test_numpy_dividers_match_reference(self):
+        rng = random.Random(19)
+        for _ in range(20):
+            heatmap = [rng.randint(0, 5) for _ in range(rng.randint(2, 50))]
+            for margins in [0, 3.5, 10]:
+                self.assertEqual(get_col_dividers_reference(heatmap, margins),
+                                 text_utils.get_col_dividers_numpy(heatmap, margins, 2))
+
+    def test_split_into_columns(self):
+        text = "\n".join(f"{left:<30}{right}" for left, right in [
+            ("Bulky: This model takes up", "Fearless: This model never"),
+            ("more room in a transport.", "falls back."),
+            ("", "Stubborn: Rarely falls back."),
+        ])
+        header, left_column, right_column, _ = split_into_columns(text, ensure_middle=True)
+        self.assertEqual("Bulky: This model takes up\nmore room in a transport.",
+                         "\n".join(line.rstrip() for line in left_column.splitlines()).strip())
+        self.assertIn("Fearless: This model never", right_column)
+        self.assertIn("Stubborn: Rarely falls back.", right_column)
+
+
+if __name__ == '__main__':
+    unittest.main()
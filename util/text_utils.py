@@ -1,6 +1,17 @@
+import math
+
 from settings import name_synonyms
 from util.log_util import style_text, STYLES, print_styled
 
+try:
+    import numpy as np  # Optional, only makes the column heatmaps quicker. pip install numpy
+except ImportError:
+    np = None
+
+# Below these sizes, converting to and from arrays takes longer than the pure python versions.
+NUMPY_MIN_HEATMAP_CHARACTERS = 500
+NUMPY_MIN_HEATMAP_COLUMNS = 300
+
 errors = ""
 
 
@@ -158,19 +169,20 @@ def get_bullet_type(existing_text):
 
 
 def get_section_heatmap(section_text):
-    heatmap = []
+    """
+    Count, for each column, the lines with whitespace in that column or that end before it.
+    """
     lines = section_text.splitlines()
 
     # First, find the longest line
-    # Populate empty slots in the heatmap
-    heatmap = [0] * len(max(lines, key=len))
-
-    # For each line, track whitespace and characters past the end of the line
-    for line in section_text.splitlines():
-        for char_index in range(len(heatmap)):
-            if char_index >= len(line) or line[char_index] == " ":
-                heatmap[char_index] += 1
-    return heatmap
+    width = len(max(lines, key=len))
+    # Past the end of a line counts the same as whitespace, so pad every line to the longest.
+    padded_lines = [line.ljust(width) for line in lines]
+    if np is not None and len(lines) * width >= NUMPY_MIN_HEATMAP_CHARACTERS:
+        # One fixed width code point per character, so the lines become the rows of a character matrix.
+        characters = np.frombuffer("".join(padded_lines).encode('utf-32-le'), dtype=np.uint32)
+        return (characters.reshape(len(lines), width) == ord(" ")).sum(axis=0).tolist()
+    return [column.count(" ") for column in zip(*padded_lines)]
 
 
 def print_heatmap_thresholds(heatmap, indicate_columns=None, debug_print=None):
@@ -212,6 +224,9 @@ def get_col_dividers(heatmap, margins=None):
     longest_edge = 0
     longest_edge_height = 0
 
+    if np is not None and len(heatmap) >= NUMPY_MIN_HEATMAP_COLUMNS:
+        return get_col_dividers_numpy(heatmap, margins, min_width)
+
     for index in range(len(heatmap) - 1):
         edge_height = heatmap[index] - heatmap[index + 1]
         if index < margins:
@@ -235,6 +250,27 @@ def get_col_dividers(heatmap, margins=None):
     return section_start, section_end
 
 
+def get_col_dividers_numpy(heatmap, margins, min_width):
+    """
+    get_col_dividers as array operations, for wide heatmaps.
+    """
+    heatmap = np.asarray(heatmap)
+    edge_heights = heatmap[:-1] - heatmap[1:]
+    first_index = max(math.ceil(margins), 0)  # Skip the first few lines
+    longest_edge = 0
+    if edge_heights[first_index:].size and edge_heights[first_index:].max() > 0:
+        longest_edge = first_index + int(edge_heights[first_index:].argmax())  # The first, if several are as long
+
+    # The section starts after the last value before the longest edge that isn't the same length as it.
+    different_indexes = np.flatnonzero(heatmap[:longest_edge] != heatmap[longest_edge])
+    section_start = int(different_indexes[-1]) + 1 if different_indexes.size else 0
+
+    section_end = longest_edge + 1  # the next section starts at the character after our longest_edge char.
+    if section_end - section_start < min_width:  # But this could also make our divider too small.
+        section_start = section_end - min_width
+    return section_start, section_end
+
+
 def split_into_columns(text, ensure_middle=False, debug_print_level=0):
     if text.strip() == "":
         raise Exception("No text passed to split_into_columns")